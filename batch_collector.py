@@ -1,131 +1,331 @@
 import requests
 import pandas as pd
-import xml.etree.ElementTree as ET
 import time
 import os
+import asyncio
+import glob
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+
+from pipeline.accumulator import RowAccumulator
+from pipeline.cache import ResponseCache
+from pipeline.checkpoint import CheckpointStore
+from pipeline.collector import (QUOTA_EXCEEDED_CODES, CollectStats, TokenBucket, build_units, is_retryable,
+                                iter_collect, page_count, report_api_error, report_failures, report_rows, retry_delay)
+from pipeline.config import (API_CONCURRENCY, API_MAX_RETRIES, API_PAGE_SIZE, API_RATE_LIMIT, ENDPOINTS, OUTPUT_FORMAT,
+                             TARGET_DISTRICTS)
+from pipeline.metrics import METRICS, stage
+from pipeline.output import write_parquet_partitions
+from pipeline.parser import parse_bytes
+from pipeline.validate import validate_csv, validate_frame, write_quarantine
 
 
 SERVICE_KEY = os.getenv("API_SERVICE_KEY")
+CHECKPOINT_DIR = "checkpoints"
+PARQUET_DIR = "parquet"
+# 검증에 걸린 행 (사유 컬럼 포함)
+QUARANTINE_DIR = "quarantine"
+
+
+async def collect_data_async(units, store, concurrency, rate, page_size, cache=None, replay_only=False,
+                             stats=None):
+    """비동기 모드: 100건 단위로 동시 요청하고, 단위마다 새 행만 세그먼트로 저장"""
+    async for completed, rows in iter_collect(units, concurrency=concurrency, rate=rate, chunk_size=100,
+                                              service_key=SERVICE_KEY, cache=cache,
+                                              replay_only=replay_only, page_size=page_size, stats=stats):
+        store.write_segment(completed, rows)
+
+def request_page_sync(url, params, unit, page_no):
+    """순차 모드 요청 한 번. ((parser, rows), None) 또는 (None, 실패 사유)"""
+    try:
+        response = requests.get(url, params=params, timeout=10)
+    except requests.Timeout:
+        return None, "timeout"
+    except requests.ConnectionError:
+        return None, "connection"
+    if response.status_code != 200:
+        print(f"HTTP 오류: {response.status_code}")
+        return None, f"http_{response.status_code}"
+
+    # 스트리밍 파서로 item 당 한 번만 훑어서 행 생성
+    parser, page_rows = parse_bytes(response.content, unit)
+    if not parser.ok:
+        report_api_error(parser, unit, page_no)
+        return None, f"api_{parser.result_code}"
+    return (parser, page_rows), None
+
+def collect_data_sync(target_type, units, store, page_size, stats=None, rate=API_RATE_LIMIT):
+    """기존 순차 모드: (월, 구) 를 하나씩 요청 (일시적 오류는 지수 백오프로 재시도)
+
+    요청 간격은 비동기 수집과 같은 TokenBucket(rate) 으로 맞추고, 일일 한도 초과 코드를 받으면
+    남은 단위는 요청하지 않고 실패(quota_exceeded)로 남긴다.
+    """
+    url = ENDPOINTS[target_type]['url']
+    stats = stats if stats is not None else CollectStats()
+    bucket = TokenBucket(rate)
+    pending_units, pending_rows = [], []
+    total_requests = 0
+    flushed_at = 0
+
+    # 반복문 시작
+    for unit in units:
+        ymd, code, district_name = unit.deal_ymd, unit.lawd_cd, unit.district_name
+        rows, page_no, pages = [], 1, 1
+        if target_type in stats.quota_exceeded:
+            stats.failed[unit] = "p1 quota_exceeded"
+            continue
+
+        try:
+            # totalCount 를 보고 남은 페이지를 차례로 요청
+            while page_no <= pages:
+                params = {
+                    'serviceKey': SERVICE_KEY,
+                    'LAWD_CD': code,
+                    'DEAL_YMD': ymd,
+                    'numOfRows': str(page_size),
+                    'pageNo': str(page_no)
+                }
+                for attempt in range(API_MAX_RETRIES + 1):
+                    bucket.acquire_sync() # 트래픽 조절 (초당 rate 회)
+                    result, reason = request_page_sync(url, params, unit, page_no)
+                    total_requests += 1
+                    stats.requests[target_type] += 1
+                    if result is not None or not is_retryable(reason) or attempt == API_MAX_RETRIES:
+                        break
+                    stats.retries[target_type] += 1
+                    time.sleep(retry_delay(attempt))
+
+                if result is None:
+                    if reason in [f"api_{quota_code}" for quota_code in QUOTA_EXCEEDED_CODES]:
+                        stats.quota_exceeded.add(target_type)
+                    stats.failed[unit] = f"p{page_no} {reason}"
+                    rows = None
+                    break
+                parser, page_rows = result
+                rows.extend(page_rows)
+                pages = page_count(parser.total_count, page_size)
+                page_no += 1
+
+            if rows is not None:
+                report_rows(rows, unit)
+                pending_units.append(unit)
+                pending_rows.extend(rows)
+
+        except Exception as e:
+            print(f"에러 발생 ({ymd} {district_name}): {e}")
+            stats.failed[unit] = f"p{page_no} error: {e}"
+
+        # 100회 요청마다 지난 저장 이후의 새 행만 세그먼트로 저장
+        if total_requests - flushed_at >= 100:
+            flushed_at = total_requests
+            store.write_segment(pending_units, pending_rows)
+            pending_units, pending_rows = [], []
+
+    store.write_segment(pending_units, pending_rows)
+
+def shard_units(units, workers):
+    """시군구 단위로 나눠서 같은 시군구는 항상 같은 작업자에 배정 (코드 순서대로 돌아가며)"""
+    codes = sorted({unit.lawd_cd for unit in units})
+    owner = {code: i % workers for i, code in enumerate(codes)}
+    shards = [[] for _ in range(workers)]
+    for unit in units:
+        shards[owner[unit.lawd_cd]].append(unit)
+    return [shard for shard in shards if shard]
+
+def list_shard_dirs(store_dir):
+    return sorted(path for path in glob.glob(os.path.join(store_dir, "shard-*")) if os.path.isdir(path))
+
+def collect_shard(shard_dir, units, concurrency, rate, page_size, use_cache):
+    """작업자 프로세스: 자기 몫의 단위를 비동기로 수집해서 자기 체크포인트(shard_dir)에 저장"""
+    store = CheckpointStore(shard_dir)
+    stats = CollectStats()
+    cache = ResponseCache() if use_cache else None
+    with stage("collect"):
+        asyncio.run(collect_data_async(units, store, concurrency, rate, page_size, cache, stats=stats))
+    METRICS.write_report(f"{os.path.basename(os.path.dirname(shard_dir))}_{os.path.basename(shard_dir)}")
+    return stats.failed
+
+def write_shard_output(shard_dir, output_format):
+    """작업자 프로세스: 샤드 체크포인트를 자기 파티션 파일(part-shard-NNN)로 씀. CSV 는 샤드 CSV 경로를 돌려줌"""
+    store = CheckpointStore(shard_dir)
+    if not store.row_count:
+        return None
+    if output_format == "parquet":
+        accumulator = RowAccumulator()
+        accumulator.extend(store.iter_rows())
+        df, rejected = validate_frame(accumulator.to_pandas())
+        shard_name = os.path.basename(shard_dir)
+        write_quarantine(rejected, os.path.join(QUARANTINE_DIR, f"{os.path.basename(os.path.dirname(shard_dir))}_{shard_name}.csv"))
+        write_parquet_partitions(df, PARQUET_DIR, part_name=f"part-{shard_name}")
+        return None
+    csv_path = shard_dir + ".csv"
+    store.merge(csv_path)
+    return csv_path
+
+def concat_csv(paths, file_name):
+    """샤드 CSV (각각 utf-8-sig 헤더 포함) 를 헤더 한 번만 남기고 이어 붙임"""
+    tmp_path = file_name + ".tmp"
+    with open(tmp_path, "wb") as out:
+        for i, path in enumerate(paths):
+            with open(path, "rb") as shard:
+                header = shard.readline()
+                if i == 0:
+                    out.write(header)
+                shutil.copyfileobj(shard, out)
+    os.replace(tmp_path, file_name)
 
-SEOUL_DISTRICTS = {
-    '11110': '종로구', '11140': '중구', '11170': '용산구', '11200': '성동구', 
-    '11215': '광진구', '11230': '동대문구', '11260': '중랑구', '11290': '성북구', 
-    '11305': '강북구', '11320': '도봉구', '11350': '노원구', '11380': '은평구', 
-    '11410': '서대문구', '11440': '마포구', '11470': '양천구', '11500': '강서구', 
-    '11530': '구로구', '11545': '금천구', '11560': '영등포구', '11590': '동작구', 
-    '11620': '관악구', '11650': '서초구', '11680': '강남구', '11710': '송파구', 
-    '11740': '강동구'
-}
+def collect_data_parallel(target_type, months, districts, store_dir, workers, concurrency, rate, page_size,
+                          use_cache, output_format, file_name):
+    """프로세스 풀 수집: 시군구별로 나눈 샤드를 작업자 프로세스마다 따로 수집/파싱/저장
 
-def get_text(item, tag):
-    """XML 노드에서 텍스트 추출 (없으면 '0' 반환)"""
-    node = item.find(tag)
-    return node.text.strip() if node is not None and node.text else "0"
+    API 한도는 서비스 키 하나에 걸리므로 초당 요청 수와 동시 요청 수를 작업자 수로 나눠 갖는다.
+    체크포인트는 store_dir/shard-NNN 에 작업자별로 쌓이고, 완료 여부는 모든 샤드를 합쳐서 본다
+    (작업자 수를 바꿔 다시 실행해도 이어서 수집).
+    """
+    done = set().union(*(CheckpointStore(path).completed() for path in list_shard_dirs(store_dir)))
+    units = [unit for unit in build_units([target_type], months, districts)
+             if (unit.type, unit.lawd_cd, unit.deal_ymd) not in done]
+    shards = shard_units(units, workers)
+    print(f"프로세스 {len(shards)}개로 수집: 시군구 {len(districts)}개, 남은 단위 {len(units)}개"
+          + (f" (완료 {len(done)}개 건너뜀)" if done else ""))
 
-def collect_data(target_type, start_year, end_year):
+    stats = CollectStats()
+    worker_rate = rate / max(1, len(shards))
+    worker_concurrency = max(1, concurrency // max(1, len(shards)))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        with stage("collect"):
+            # 기존 샤드 디렉터리 번호와 겹치지 않게 새 번호를 이어서 씀
+            start = len(list_shard_dirs(store_dir))
+            futures = [pool.submit(collect_shard, os.path.join(store_dir, f"shard-{start + i:03d}"), shard,
+                                   worker_concurrency, worker_rate, page_size, use_cache)
+                       for i, shard in enumerate(shards)]
+            for future in futures:
+                stats.failed.update(future.result())
+        report_failures(stats, os.path.join(store_dir, "failed_units.json"))
 
+        paths = list_shard_dirs(store_dir)
+        with stage(f"write_{output_format}"):
+            outputs = list(pool.map(write_shard_output, paths, [output_format] * len(paths)))
+
+    completed = set().union(*(CheckpointStore(path).completed() for path in paths))
+    total = sum(CheckpointStore(path).row_count for path in paths)
+    csv_paths = [path for path in outputs if path]
+    if csv_paths:
+        concat_csv(csv_paths, file_name)
+        total, _ = validate_csv(file_name, os.path.join(QUARANTINE_DIR, file_name))
+        print(f"\n최종 완료! {file_name} 저장됨. (총 {total}건)")
+    elif total:
+        print(f"\nParquet 저장 완료: {PARQUET_DIR} (총 {total}건)")
+    else:
+        print("\n데이터가 수집되지 않았습니다. API 키나 기간을 확인하세요.")
+
+    remaining = len(months) * len(districts) - len(completed)
+    if remaining:
+        print(f"미완료 단위 {remaining}개 - 다시 실행하면 이어서 수집합니다.")
+    else:
+        shutil.rmtree(store_dir, ignore_errors=True)
+
+def collect_data(target_type, start_year, end_year, use_async=False,
+                 concurrency=API_CONCURRENCY, rate=API_RATE_LIMIT, page_size=API_PAGE_SIZE,
+                 use_cache=True, replay_only=False, output_format=OUTPUT_FORMAT,
+                 districts=TARGET_DISTRICTS, workers=1):
+    """target_type 의 start_year~end_year 전월세 데이터를 {target_type}_data.csv 로 저장
+
+    use_async/use_cache: 비동기 수집 엔진과 응답 디스크 캐시 사용
+    page_size: 페이지당 행 수 (totalCount 가 더 크면 나머지 페이지도 수집)
+    replay_only: API 를 호출하지 않고 캐시된 응답만으로 CSV 를 처음부터 다시 생성
+    output_format: "csv" 면 {target_type}_data.csv, "parquet" 면 parquet/ 아래 파티션 파일
+    districts: {LAWD_CD: 시군구} (기본은 RTMS_PROVINCES 로 고른 시도, pipeline/regions.py)
+    workers: 2 이상이면 시군구를 나눠 프로세스 풀로 수집 (비동기 엔진, 작업자마다 자기 파티션 파일 출력)
+    """
+
+    file_name = f"{target_type}_data.csv"
     if target_type == "officetel":
-        url = "http://apis.data.go.kr/1613000/RTMSDataSvcOffiRent/getRTMSDataSvcOffiRent"
-        file_name = "officetel_data.csv"
-        tags = {
-            'name': 'offiNm',       # 단지명
-            'area': 'excluUseAr'    # 전용면적
-        }
         print(f"[오피스텔] 데이터 수집 시작... (저장파일명: {file_name})")
     else:
-        url = "http://apis.data.go.kr/1613000/RTMSDataSvcRHRent/getRTMSDataSvcRHRent"
-        file_name = "townhouse_data.csv"
-        tags = {
-            'name': 'mhouseNm',     # 연립다세대명
-            'area': 'excluUseAr'    # 전용면적
-        }
         print(f"[연립다세대] 데이터 수집 시작... (저장파일명: {file_name})")
 
-    all_data = []
-    total_requests = 0
-    
     # 기간 설정
     months = []
     for year in range(start_year, end_year + 1):
         for month in range(1, 13):
             months.append(f"{year}{str(month).zfill(2)}")
-            
-    # 반복문 시작
-    for ymd in months:
-        for code, district_name in SEOUL_DISTRICTS.items():
-            
-            params = {
-                'serviceKey': SERVICE_KEY,
-                'LAWD_CD': code,
-                'DEAL_YMD': ymd,
-                'numOfRows': '9999',
-                'pageNo': '1'
-            }
-            
-            try:
-                response = requests.get(url, params=params, timeout=10)
-                total_requests += 1
-                
-                if response.status_code == 200:
-                    root = ET.fromstring(response.content)
-                    res_code = root.find('.//resultCode')
-                    
-                    # 성공 코드 체크 ('00' 또는 '000')
-                    if res_code is not None and res_code.text in ['00', '000']:
-                        items = root.findall('.//item')
-                        if items:
-                            for item in items:
-                                row = {
-                                    'year_month': ymd,
-                                    'district_code': code,
-                                    'district_name': district_name,
-                                    'dong': get_text(item, 'umdNm'),       # 법정동
-                                    'jibun': get_text(item, 'jibun'),      # 지번
-                                    'name': get_text(item, tags['name']),  # 건물명 (분기처리됨)
-                                    'floor': get_text(item, 'floor'),      # 층
-                                    'area': get_text(item, tags['area']),  # 전용면적
-                                    'deposit': get_text(item, 'deposit').replace(',', ''),       # 보증금 (쉼표제거)
-                                    'monthly_rent': get_text(item, 'monthlyRent').replace(',', ''), # 월세 (쉼표제거)
-                                    'build_year': get_text(item, 'buildYear'), # 건축년도
-                                    'deal_day': get_text(item, 'dealDay'),     # 계약일
-                                    'type': target_type
-                                }
-                                all_data.append(row)
-                                
-                            print(f"{ymd} {district_name}: {len(items)}건 수집")
-                        else:
-                            print(f"pass - {ymd} {district_name}: 거래 없음")
-                    else:
-                        res_msg = root.find('.//resultMsg')
-                        print(f"API 오류: {res_code.text} - {res_msg.text if res_msg else ''}")
-                else:
-                    print(f"HTTP 오류: {response.status_code}")
-                
-                time.sleep(0.3) # 트래픽 조절
-                
-            except Exception as e:
-                print(f"에러 발생 ({ymd} {district_name}): {e}")
-                time.sleep(1)
-
-            # 100회 요청마다 중간 저장
-            if total_requests % 100 == 0:
-                if all_data:
-                    pd.DataFrame(all_data).to_csv(file_name, index=False, encoding='utf-8-sig')
-                    print(f"중간 저장 완료 ({len(all_data)}건)")
-
-    # 최종 저장
-    if all_data:
-        final_df = pd.DataFrame(all_data)
-        final_df.to_csv(file_name, index=False, encoding='utf-8-sig')
-        print(f"\n최종 완료! {file_name} 저장됨. (총 {len(final_df)}건)")
+
+    if workers > 1 and not replay_only:
+        store_dir = os.path.join(CHECKPOINT_DIR, f"{target_type}_{start_year}_{end_year}_parallel")
+        collect_data_parallel(target_type, months, districts, store_dir, workers, concurrency, rate, page_size,
+                              use_cache, output_format, file_name)
+        prom_path, _ = METRICS.write_report(f"batch_{target_type}_{start_year}_{end_year}")
+        print(f"수집 지표: {prom_path}")
+        return
+
+    # 체크포인트: 이전 실행에서 완료된 (유형, 구, 월) 은 건너뜀
+    store_dir = os.path.join(CHECKPOINT_DIR, f"{target_type}_{start_year}_{end_year}")
+    if replay_only:
+        # 재처리는 항상 처음부터 (수집용 체크포인트와 분리)
+        store_dir += "_replay"
+        shutil.rmtree(store_dir, ignore_errors=True)
+    store = CheckpointStore(store_dir)
+    done = store.completed()
+    units = [unit for unit in build_units([target_type], months, districts)
+             if (unit.type, unit.lawd_cd, unit.deal_ymd) not in done]
+    if done:
+        print(f"이어서 수집: 완료 {len(done)}개 단위 건너뜀, 남은 단위 {len(units)}개")
+
+    stats = CollectStats()
+    if use_async or replay_only:
+        # 캐시는 비동기 엔진에서만 사용
+        cache = ResponseCache() if use_cache or replay_only else None
+        with stage("collect"):
+            asyncio.run(collect_data_async(units, store, concurrency, rate, page_size, cache, replay_only, stats))
+    else:
+        # 순차 모드는 requests 를 써서 요청 지표 없이 단계 시간만 기록
+        with stage("collect"):
+            collect_data_sync(target_type, units, store, page_size, stats, rate)
+    if stats.retries:
+        print(f"재시도 {sum(stats.retries.values())}회")
+    # 재시도까지 실패한 단위는 사유와 함께 남김 (다음 실행에서 체크포인트로 다시 시도)
+    report_failures(stats, os.path.join(store_dir, "failed_units.json"))
+
+    # 최종 저장: 세그먼트 병합
+    if store.row_count and output_format == "parquet":
+        with stage("write_parquet"):
+            accumulator = RowAccumulator()
+            accumulator.extend(store.iter_rows())
+            df, rejected = validate_frame(accumulator.to_pandas())
+            write_quarantine(rejected, os.path.join(QUARANTINE_DIR, f"{target_type}_parquet.csv"))
+            write_parquet_partitions(df, PARQUET_DIR)
+    elif store.row_count:
+        with stage("write_csv"):
+            store.merge(file_name)
+        # 적재 전에 걸러낸 행은 quarantine/ 아래 같은 이름의 파일로
+        with stage("validate"):
+            total, _ = validate_csv(file_name, os.path.join(QUARANTINE_DIR, file_name))
+        print(f"\n최종 완료! {file_name} 저장됨. (총 {total}건)")
         # 데이터 샘플 출력 (확인용)
-        print(final_df[['name', 'deposit', 'monthly_rent']].head())
+        print(pd.read_csv(file_name, nrows=5, encoding='utf-8-sig')[['name', 'deposit', 'monthly_rent']])
     else:
         print("\n데이터가 수집되지 않았습니다. API 키나 기간을 확인하세요.")
 
+    # 모든 단위가 끝났으면 체크포인트 정리, 아니면 다음 실행에서 나머지만 수집
+    remaining = len(months) * len(districts) - len(store.completed())
+    if remaining:
+        print(f"미완료 단위 {remaining}개 - 다시 실행하면 이어서 수집합니다.")
+    else:
+        store.remove()
+
+    prom_path, _ = METRICS.write_report(f"batch_{target_type}_{start_year}_{end_year}")
+    print(f"수집 지표: {prom_path}")
+
 if __name__ == "__main__":
     # 1. 오피스텔 수집
     #collect_data("officetel", 2022, 2025)
+
+    # 파서/스키마 변경 후 캐시된 응답으로만 재처리
+    #collect_data("townhouse", 2022, 2025, replay_only=True)
     
+    # 전국 수집: RTMS_PROVINCES=all 로 시도를 고르고 프로세스 4개로 나눠서
+    #collect_data("townhouse", 2022, 2025, workers=4, output_format="parquet")
+
     # 2. 연립다세대 수집
-    collect_data("townhouse", 2022, 2025)
\ No newline at end of file
+    collect_data("townhouse", 2022, 2025, use_async=True)
\ No newline at end of file
@@ -0,0 +1,76 @@
+"""행 버퍼 메모리 벤치마크: dict 목록 + pd.DataFrame vs RowAccumulator
+
+방식마다 별도 프로세스로 실행해서 최대 RSS(ru_maxrss)를 비교한다.
+실행: python -m benchmarks.bench_accumulator [행 수]
+"""
+import resource
+import subprocess
+import sys
+import time
+
+import pandas as pd
+
+from benchmarks.synthetic import make_payload
+from pipeline.accumulator import RowAccumulator
+from pipeline.collector import WorkUnit
+from pipeline.parser import parse_bytes
+
+
+ROWS_PER_PAYLOAD = 5000
+
+
+def iter_rows(n_rows):
+    """파서가 만드는 것과 같은 새 문자열 행을 n_rows 개 생성"""
+    payloads = [make_payload(ROWS_PER_PAYLOAD, seed=seed) for seed in range(4)]
+    produced = 0
+    month = 0
+    while produced < n_rows:
+        month += 1
+        unit = WorkUnit('townhouse', '11680', f"{2000 + month // 12}{month % 12 + 1:02d}", '강남구')
+        _, rows = parse_bytes(payloads[month % len(payloads)], unit)
+        for row in rows[:n_rows - produced]:
+            yield row
+        produced += len(rows)
+
+
+def max_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run(mode, n_rows):
+    started = time.perf_counter()
+    if mode == "dicts":
+        all_data = list(iter_rows(n_rows))
+        buffered = max_rss_mb()
+        df = pd.DataFrame(all_data)
+    else:
+        accumulator = RowAccumulator()
+        accumulator.extend(iter_rows(n_rows))
+        buffered = max_rss_mb()
+        df = accumulator.to_pandas()
+    elapsed = time.perf_counter() - started
+    print(f"{mode} {len(df)} {buffered:.1f} {max_rss_mb():.1f} {elapsed:.2f}")
+
+
+def main(n_rows):
+    baseline = subprocess.run(
+        [sys.executable, "-c", "import resource, pandas, pyarrow, pipeline.accumulator;"
+         "print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024)"],
+        capture_output=True, text=True, check=True,
+    )
+    print(f"{n_rows}행, import 직후 RSS {float(baseline.stdout):.1f}MB")
+    print(f"{'':>12} {'buffer MB':>10} {'peak MB':>9} {'time s':>7}")
+    for mode in ("dicts", "accumulator"):
+        result = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_accumulator", "--run", mode, str(n_rows)],
+            capture_output=True, text=True, check=True,
+        )
+        _, _, buffered, peak, elapsed = result.stdout.split()
+        print(f"{mode:>12} {float(buffered):>10.1f} {float(peak):>9.1f} {float(elapsed):>7.2f}")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--run"]:
+        run(sys.argv[2], int(sys.argv[3]))
+    else:
+        main(int(sys.argv[1]) if len(sys.argv) > 1 else 500_000)
@@ -0,0 +1,100 @@
+"""DAG 파일 파싱 시간 벤치마크 / 회귀 확인
+
+Airflow 스케줄러는 dags/ 파일을 주기마다 다시 import 하므로 최상위 import 가 무거우면
+파싱마다 CPU 를 몇 초씩 쓴다. DAG 파일마다 새 인터프리터에서
+1) airflow / dateutil 을 먼저 import 해 두고 (스케줄러 프로세스에 이미 올라와 있는 모듈)
+2) DAG 파일만 import 하는 시간을 재고
+3) 무거운 모듈(HEAVY_MODULES)이 딸려 들어왔는지 본다.
+
+하나라도 예산(DAG_PARSE_BUDGET_MS)을 넘거나 무거운 모듈이 보이면 종료 코드 1.
+실행: python -m benchmarks.bench_dag_parse [--repeat 5] [--budget-ms 200]
+"""
+import argparse
+import glob
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DAG_DIR = os.path.join(ROOT, "dags")
+
+PARSE_BUDGET_MS = float(os.getenv("DAG_PARSE_BUDGET_MS", "200"))
+
+# Task 실행 때만 필요한 모듈 (DAG 파일 최상위에서 import 되면 안 됨)
+HEAVY_MODULES = ['pandas', 'numpy', 'pyarrow', 'requests', 'aiohttp', 'google.cloud', 'google_crc32c']
+
+# 새 인터프리터에서 DAG 파일 하나를 import 하고 (초, 무거운 모듈 목록) 을 JSON 으로 출력
+# airflow 가 없는 환경(로컬 / CI)에서는 DAG, PythonOperator 최소 대역으로 DAG 파일 자체의 import 만 잰다
+PROBE = """
+import importlib.util, json, sys, time, types
+try:
+    import airflow
+    from airflow.operators.python import PythonOperator
+except ImportError:
+    class _Operator:
+        def __init__(self, *args, **kwargs): pass
+        @classmethod
+        def partial(cls, **kwargs): return cls()
+        def expand(self, **kwargs): return self
+        def __rshift__(self, other): return other
+    class _DAG:
+        def __init__(self, *args, **kwargs): pass
+        def __enter__(self): return self
+        def __exit__(self, *exc): return False
+    for name in ("airflow", "airflow.operators", "airflow.operators.python"):
+        sys.modules[name] = types.ModuleType(name)
+    sys.modules["airflow"].DAG = _DAG
+    sys.modules["airflow.operators.python"].PythonOperator = _Operator
+from dateutil.relativedelta import relativedelta
+
+path, heavy = sys.argv[1], sys.argv[2].split(",")
+before = set(sys.modules)
+started = time.perf_counter()
+spec = importlib.util.spec_from_file_location("dag_under_test", path)
+spec.loader.exec_module(importlib.util.module_from_spec(spec))
+seconds = time.perf_counter() - started
+new = set(sys.modules) - before
+loaded = [module for module in heavy if any(name == module or name.startswith(module + ".") for name in new)]
+print(json.dumps({"seconds": seconds, "heavy": loaded}))
+"""
+
+
+def parse_once(path):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.getenv("PYTHONPATH")])))
+    result = subprocess.run([sys.executable, "-c", PROBE, path, ",".join(HEAVY_MODULES)],
+                            capture_output=True, text=True, env=env, cwd=ROOT)
+    if result.returncode != 0:
+        raise RuntimeError(f"{os.path.basename(path)} import 실패:\n{result.stderr.strip()}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DAG 파일 파싱 시간 / 무거운 import 확인")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=PARSE_BUDGET_MS)
+    args = parser.parse_args()
+
+    failed = []
+    print(f"{'DAG 파일':<28} {'중앙값(ms)':>10} {'최대(ms)':>10}  무거운 모듈")
+    for path in sorted(glob.glob(os.path.join(DAG_DIR, "*.py"))):
+        runs = [parse_once(path) for _ in range(args.repeat)]
+        times = [run["seconds"] * 1000 for run in runs]
+        heavy = sorted({module for run in runs for module in run["heavy"]})
+        median = statistics.median(times)
+        print(f"{os.path.basename(path):<28} {median:>10.1f} {max(times):>10.1f}  {', '.join(heavy) or '-'}")
+        if median > args.budget_ms:
+            failed.append(f"{os.path.basename(path)}: {median:.1f}ms > {args.budget_ms:.0f}ms")
+        if heavy:
+            failed.append(f"{os.path.basename(path)}: 최상위 import 에 {heavy}")
+
+    if failed:
+        print("\n실패:\n  " + "\n  ".join(failed))
+        sys.exit(1)
+    print(f"\n모든 DAG 파일이 {args.budget_ms:.0f}ms 안에 파싱되고 무거운 모듈을 import 하지 않음")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""출력 형식 벤치마크: utf-8-sig CSV vs 타입 있는 Parquet 파티션
+
+파일 크기(업로드 바이트), 쓰기 시간, 타입 변환을 포함한 읽기 시간을 비교한다.
+실행: python -m benchmarks.bench_output
+"""
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.synthetic import make_payload
+from pipeline.collector import WorkUnit
+from pipeline.output import list_parquet_files, read_parquet_partitions, to_typed_frame, write_parquet_partitions
+from pipeline.parser import parse_bytes
+
+
+def make_rows(n_months, rows_per_month):
+    rows = []
+    for month in range(1, n_months + 1):
+        for target_type in ('officetel', 'townhouse'):
+            unit = WorkUnit(target_type, '11680', f"2024{month:02d}", '강남구')
+            _, unit_rows = parse_bytes(make_payload(rows_per_month, target_type, seed=month,
+                                                     lawd_cd=unit.lawd_cd, deal_ymd=unit.deal_ymd), unit)
+            rows.extend(unit_rows)
+    return rows
+
+
+def timed(func):
+    started = time.perf_counter()
+    result = func()
+    return time.perf_counter() - started, result
+
+
+def main():
+    for n_months, rows_per_month in ((3, 5000), (12, 10000)):
+        rows = make_rows(n_months, rows_per_month)
+        df = pd.DataFrame(rows)
+        with tempfile.TemporaryDirectory() as tmp:
+            csv_path = os.path.join(tmp, "rent_data.csv")
+            parquet_dir = os.path.join(tmp, "parquet")
+
+            csv_write, _ = timed(lambda: df.to_csv(csv_path, index=False, encoding='utf-8-sig'))
+            csv_read, _ = timed(lambda: to_typed_frame(pd.read_csv(csv_path, dtype=str, encoding='utf-8-sig')))
+            csv_size = os.path.getsize(csv_path)
+
+            parquet_write, _ = timed(lambda: write_parquet_partitions(df, parquet_dir))
+            parquet_read, _ = timed(lambda: read_parquet_partitions(parquet_dir))
+            parquet_size = sum(os.path.getsize(path) for path in list_parquet_files(parquet_dir))
+
+        print(f"\n{len(df)}행 ({n_months}개월 x 2유형)")
+        print(f"{'':>8} {'size MB':>9} {'write s':>8} {'read s':>8}")
+        print(f"{'csv':>8} {csv_size / 1e6:>9.2f} {csv_write:>8.3f} {csv_read:>8.3f}")
+        print(f"{'parquet':>8} {parquet_size / 1e6:>9.2f} {parquet_write:>8.3f} {parquet_read:>8.3f}")
+        print(f"크기 {csv_size / parquet_size:.1f}배 감소")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""XML 파싱 벤치마크: 기존 ET.fromstring + get_text 방식 vs 스트리밍 파서
+
+스트리밍 파서의 이점은 peak MB 열 (파싱 중 최대 메모리) 이다. 시간은 1000건 안팎에서
+기존 방식보다 느리고 (0.7~0.8x) 수천 건 이상에서 비슷하거나 조금 빠른 정도라서
+speedup 이 1 을 넘는다고 가정하지 말 것 (실행 환경에 따라 흔들림).
+
+실행: python -m benchmarks.bench_parser
+"""
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+
+from benchmarks.synthetic import make_payload
+from pipeline.collector import CHUNK_SIZE, WorkUnit
+from pipeline.config import ENDPOINTS
+from pipeline.parser import ResponseParser
+
+
+def get_text(item, tag):
+    node = item.find(tag)
+    return node.text.strip() if node is not None and node.text else "0"
+
+
+def parse_legacy(content, unit):
+    """기존 batch_collector 의 파싱 방식"""
+    endpoint = ENDPOINTS[unit.type]
+    root = ET.fromstring(content)
+    for item in root.findall('.//item'):
+        yield {
+            'year_month': unit.deal_ymd,
+            'district_code': unit.lawd_cd,
+            'district_name': unit.district_name,
+            'dong': get_text(item, 'umdNm'),
+            'jibun': get_text(item, 'jibun'),
+            'name': get_text(item, endpoint['name_tag']),
+            'floor': get_text(item, 'floor'),
+            'area': get_text(item, endpoint['area_tag']),
+            'deposit': get_text(item, 'deposit').replace(',', ''),
+            'monthly_rent': get_text(item, 'monthlyRent').replace(',', ''),
+            'build_year': get_text(item, 'buildYear'),
+            'deal_day': get_text(item, 'dealDay'),
+            'type': unit.type
+        }
+
+
+def parse_streaming(content, unit):
+    """응답을 CHUNK_SIZE 조각으로 나눠 넣는 스트리밍 파서 (HTTP 본문 스트리밍과 동일)"""
+    parser = ResponseParser(unit)
+    for start in range(0, len(content), CHUNK_SIZE):
+        yield from parser.feed(content[start:start + CHUNK_SIZE])
+    yield from parser.finish()
+
+
+def measure(func, content, unit, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        list(func(content, unit))
+        best = min(best, time.perf_counter() - started)
+
+    # 결과 행 목록을 제외한 파싱 자체의 메모리를 보기 위해 행은 세기만 함
+    tracemalloc.start()
+    count = sum(1 for _ in func(content, unit))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, count
+
+
+def main():
+    unit = WorkUnit('townhouse', '11680', '202401', '강남구')
+    print(f"{'items':>8} {'payload':>10} | {'legacy s':>9} {'peak MB':>8} | {'stream s':>9} {'peak MB':>8} | speedup")
+    for n_items in (1000, 5000, 9999, 30000):
+        content = make_payload(n_items)
+        assert list(parse_legacy(content, unit)) == list(parse_streaming(content, unit))
+        legacy_time, legacy_peak, _ = measure(parse_legacy, content, unit)
+        stream_time, stream_peak, _ = measure(parse_streaming, content, unit)
+        print(f"{n_items:>8} {len(content) / 1e6:>8.1f}MB | {legacy_time:>9.3f} {legacy_peak / 1e6:>8.1f} | "
+              f"{stream_time:>9.3f} {stream_peak / 1e6:>8.1f} | {legacy_time / stream_time:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""파이프라인 전체 벤치마크 (네트워크 없이 로컬 대역만 사용)
+
+mock RTMS 서버 -> 수집 -> 파싱 -> 파일 쓰기 -> GCS 업로드(파일시스템 대역) -> 적재 준비까지
+단계별 시간과 처리량, 수집 중 메모리 최대치를 잰다.
+
+- 수집: 비동기 수집기(pipeline.collector) 처리량, 같은 일부 단위로 기존 순차 수집기와 비교
+- 파싱: 같은 응답 본문을 네트워크 없이 파싱만 한 시간
+- 메모리: tracemalloc 최대치 (수집을 한 번 더 돌려서 측정, 시간 측정과 분리)
+- 쓰기: CSV (utf-8-sig) / Parquet 파티션
+- 업로드: GcsUploader + FilesystemBucket (요청당 지연), 두 번째는 체크섬으로 건너뜀
+- 적재: BigQuery 대신 업로드된 파일을 적재 스키마로 다시 읽고 rent_market_view 컬럼 계산
+
+실행: python -m benchmarks.bench_pipeline [--rows 300] [--months 12] [--latency 0.02]
+"""
+import argparse
+import io
+import os
+import tempfile
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+
+import pandas as pd
+
+from batch_collector import collect_data_sync
+from benchmarks.fake_gcs import FilesystemBucket
+from benchmarks.mock_rtms import PATHS, MockRTMSServer
+from pipeline.checkpoint import CheckpointStore
+from pipeline.collector import build_units, collect
+from pipeline.config import SEOUL_DISTRICTS
+from pipeline.gcs import GcsUploader, directory_jobs
+from pipeline.output import list_parquet_files, read_parquet_partitions, write_parquet_partitions
+from pipeline.parser import parse_bytes
+from pipeline.transform import market_view_frame
+
+
+def timed(func):
+    started = time.perf_counter()
+    result = func()
+    return time.perf_counter() - started, result
+
+
+def quiet(func):
+    """단위마다 찍는 진행 로그는 숨기고 실행"""
+    with redirect_stdout(io.StringIO()):
+        return func()
+
+
+def report(stage, seconds, detail=""):
+    elapsed = f"{seconds:8.3f}s" if seconds is not None else " " * 9
+    print(f"{stage:<22} {elapsed}  {detail}")
+
+
+def run(rows, months_count, latency, concurrency, page_size):
+    months = [f"2024{m:02d}" for m in range(1, months_count + 1)]
+    units = build_units(["officetel", "townhouse"], months, SEOUL_DISTRICTS)
+    print(f"단위 {len(units)}개 x 약 {rows}건, 요청 지연 {latency * 1000:.0f}ms, 동시 {concurrency}, "
+          f"페이지 {page_size}행\n")
+
+    with MockRTMSServer(rows=rows, latency=latency) as server, tempfile.TemporaryDirectory() as tmp:
+        server.patch_endpoints()
+
+        # 1. 수집 (비동기)
+        seconds, collected = timed(lambda: quiet(lambda: collect(
+            units, concurrency=concurrency, rate=10_000, page_size=page_size, strict=True)))
+        report("수집 (비동기)", seconds, f"{len(collected):,}행, 요청 {server.counts['requests']}회, "
+                                          f"{len(collected) / seconds:,.0f}행/s")
+
+        # 1-1. 같은 일부 단위를 기존 순차 수집기로 (요청마다 0.3초 쉬는 것 포함)
+        sample = [unit for unit in units if unit.type == "townhouse" and unit.deal_ymd == months[0]]
+        store = CheckpointStore(os.path.join(tmp, "sync"))
+        seconds_sync, _ = timed(lambda: quiet(lambda: collect_data_sync("townhouse", sample, store, page_size)))
+        seconds_async, _ = timed(lambda: quiet(lambda: collect(
+            sample, concurrency=concurrency, rate=10_000, page_size=page_size)))
+        report("  순차 vs 비동기", seconds_sync,
+               f"단위 {len(sample)}개: 순차 {seconds_sync:.2f}s / 비동기 {seconds_async:.2f}s")
+
+        # 2. 파싱만 (응답 본문을 미리 만들어 두고)
+        payloads = []
+        for unit in units:
+            path = next(path for path, target_type in PATHS.items() if target_type == unit.type)
+            query = {"LAWD_CD": [unit.lawd_cd], "DEAL_YMD": [unit.deal_ymd],
+                     "pageNo": ["1"], "numOfRows": [str(max(rows, 1))]}
+            payloads.append((server.respond(path, query)[1], unit))
+        seconds, parsed = timed(lambda: sum(len(parse_bytes(content, unit)[1]) for content, unit in payloads))
+        total_mb = sum(len(content) for content, _ in payloads) / 1e6
+        report("파싱", seconds, f"{parsed:,}행, {total_mb:.1f}MB, {total_mb / seconds:.1f}MB/s")
+
+        # 3. 메모리 최대치 (수집 한 번 더)
+        tracemalloc.start()
+        quiet(lambda: collect(units, concurrency=concurrency, rate=10_000, page_size=page_size))
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        report("메모리 최대치", None, f"{peak / 1e6:.1f}MB (tracemalloc)")
+
+        # 4. 파일 쓰기
+        df = collected.to_pandas()
+        csv_path = os.path.join(tmp, "rent_data.csv")
+        seconds, _ = timed(lambda: df.to_csv(csv_path, index=False, encoding="utf-8-sig"))
+        report("쓰기 CSV", seconds, f"{os.path.getsize(csv_path) / 1e6:.1f}MB")
+        parquet_dir = os.path.join(tmp, "parquet")
+        seconds, paths = timed(lambda: quiet(lambda: write_parquet_partitions(df, parquet_dir)))
+        parquet_mb = sum(os.path.getsize(path) for path in paths) / 1e6
+        report("쓰기 Parquet", seconds, f"{parquet_mb:.1f}MB, 파일 {len(paths)}개")
+
+        # 5. 업로드 (파일시스템 GCS 대역)
+        bucket = FilesystemBucket(os.path.join(tmp, "bucket"), latency=latency)
+        uploader = GcsUploader(bucket, http=bucket)
+        jobs = directory_jobs(parquet_dir, "raw/parquet", list_parquet_files(parquet_dir))
+        jobs.append((csv_path, "raw/rent_data.csv"))
+        seconds, counts = timed(lambda: quiet(lambda: uploader.upload_many(jobs)))
+        report("업로드", seconds, f"{dict(counts)}")
+        seconds, counts = timed(lambda: quiet(lambda: uploader.upload_many(jobs)))
+        report("  재업로드", seconds, f"{dict(counts)}")
+
+        # 6. 적재 준비: 업로드된 객체를 다시 읽어서 가공 컬럼 계산
+        uploaded_dir = os.path.join(tmp, "bucket", "objects", "raw", "parquet")
+        seconds, loaded = timed(lambda: read_parquet_partitions(uploaded_dir))
+        report("적재 (Parquet 읽기)", seconds, f"{len(loaded):,}행")
+        seconds, _ = timed(lambda: pd.read_csv(os.path.join(tmp, "bucket", "objects", "raw", "rent_data.csv"),
+                                               dtype=str, encoding="utf-8-sig"))
+        report("적재 (CSV 읽기)", seconds)
+        seconds, view = timed(lambda: market_view_frame(loaded))
+        report("가공 컬럼 계산", seconds, f"{len(view):,}행")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="파이프라인 전체 벤치마크 (로컬 대역)")
+    parser.add_argument("--rows", type=int, default=300, help="수집 단위당 거래 수")
+    parser.add_argument("--months", type=int, default=12)
+    parser.add_argument("--latency", type=float, default=0.02, help="요청당 지연(초)")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--page-size", type=int, default=1000)
+    args = parser.parse_args()
+    run(args.rows, args.months, args.latency, args.concurrency, args.page_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""rent_market_view 파생 컬럼 벤치마크: 행 단위 Python vs 벡터화 (pipeline.transform)
+
+행 단위 구현은 MARKET_VIEW_SELECT 의 SQL 을 한 줄씩 그대로 옮긴 기준 구현이라
+두 결과가 같은지(패리티)도 함께 확인한다.
+실행: python -m benchmarks.bench_transform
+"""
+import math
+import time
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from pipeline.output import to_typed_frame
+from pipeline.transform import MARKET_VIEW_COLUMNS, compare_frames, market_view_frame
+
+
+def make_frame(n_rows, seed=0):
+    """수집 CSV 와 같은 문자열 컬럼의 합성 데이터 (null/경계값 포함)"""
+    rng = np.random.default_rng(seed)
+    deposit = rng.choice([0, 500, 9999, 10000, 15000, 20000, 123456], n_rows)
+    deposit = np.where(rng.random(n_rows) < 0.5, rng.integers(0, 200000, n_rows), deposit).astype(str).astype(object)
+    deposit[rng.random(n_rows) < 0.001] = ''
+    monthly_rent = np.where(rng.random(n_rows) < 0.4, 0, rng.integers(1, 300, n_rows)).astype(str).astype(object)
+    monthly_rent[rng.random(n_rows) < 0.001] = ''
+    # 0.5 경계 반올림이 나오도록 3.3058 의 배수도 섞음
+    area = np.where(rng.random(n_rows) < 0.1, 3.3058 * rng.integers(5, 30, n_rows) / 2, rng.uniform(10, 120, n_rows))
+    months = rng.integers(1, 13, n_rows)
+    return pd.DataFrame({
+        'year_month': [f"2024{m:02d}" for m in months],
+        'district_code': '11680',
+        'district_name': rng.choice(['강남구', '서초구', '송파구'], n_rows),
+        'dong': rng.choice(['역삼동', '논현동', '잠실동', '방배동'], n_rows),
+        'jibun': '1-1',
+        'name': rng.choice(['A빌라', 'B오피스텔', 'C하우스'], n_rows),
+        'floor': rng.integers(-1, 30, n_rows).astype(str),
+        'area': np.round(area, 4).astype(str),
+        'deposit': deposit,
+        'monthly_rent': monthly_rent,
+        'build_year': rng.integers(1980, 2025, n_rows).astype(str),
+        'deal_day': '1',
+        'type': 'townhouse',
+    })
+
+
+def sql_round(value, digits=0):
+    if value is None:
+        return None
+    scale = 10 ** digits
+    return math.copysign(math.floor(abs(value) * scale + 0.5), value) / scale
+
+
+def to_int(value):
+    return int(value) if value not in ('', None) else None
+
+
+def transform_row(row):
+    """MARKET_VIEW_SELECT 를 행 하나씩 그대로 옮긴 기준 구현"""
+    area = float(row['area']) if row['area'] else None
+    deposit = to_int(row['deposit'])
+    monthly_rent = to_int(row['monthly_rent'])
+    deal_date = date(int(row['year_month'][:4]), int(row['year_month'][4:6]), 1)
+    pyung = area / 3.3058 if area is not None else None
+
+    if deposit is None:
+        deposit_korean = None
+    elif deposit >= 10000:
+        rest = f"{deposit % 10000}만원" if deposit % 10000 > 0 else ''
+        deposit_korean = f"{deposit // 10000}억 {rest}"
+    else:
+        deposit_korean = f"{deposit}만원"
+
+    if monthly_rent is not None and monthly_rent > 0:
+        rent_per_pyung = sql_round(monthly_rent / pyung) if pyung else None
+    else:
+        rent_per_pyung = 0.0
+
+    return {
+        'district_name': row['district_name'],
+        'dong': row['dong'],
+        'building_name': row['name'],
+        'build_year': to_int(row['build_year']),
+        'floor': to_int(row['floor']),
+        'deal_date': deal_date,
+        'deal_year': deal_date.year,
+        'deal_month': deal_date.month,
+        'area_m2': area,
+        'area_pyung': sql_round(pyung, 1) if pyung is not None else None,
+        'deposit': deposit,
+        'monthly_rent': monthly_rent,
+        'deposit_korean': deposit_korean,
+        'deposit_per_pyung': sql_round(deposit / pyung) if deposit is not None and pyung else None,
+        'rent_per_pyung': rent_per_pyung,
+        'rent_type': 'Jeonse' if monthly_rent == 0 else 'Monthly',
+    }
+
+
+def timed(func):
+    started = time.perf_counter()
+    result = func()
+    return time.perf_counter() - started, result
+
+
+def main():
+    for n_rows in (100_000, 1_000_000):
+        df = make_frame(n_rows)
+        records = df.to_dict('records')
+        row_time, reference = timed(lambda: pd.DataFrame([transform_row(r) for r in records],
+                                                         columns=MARKET_VIEW_COLUMNS))
+        # 문자열 -> 숫자 변환은 수집/Parquet 단계에서 이미 끝나 있는 경우가 많아 따로 잰다
+        parse_time, typed = timed(lambda: to_typed_frame(df))
+        vec_time, vectorized = timed(lambda: market_view_frame(typed))
+        mismatches = compare_frames(vectorized, reference)
+        print(f"{n_rows:>9,}행: 행 단위 {row_time:6.2f}s / 벡터화 {vec_time:5.2f}s "
+              f"({row_time / vec_time:4.1f}배, 문자열 타입 변환 {parse_time:.2f}s 별도), "
+              f"불일치 {mismatches or '없음'}")
+
+
+if __name__ == "__main__":
+    main()
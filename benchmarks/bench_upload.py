@@ -0,0 +1,66 @@
+"""GCS 업로드 벤치마크 (파일시스템 대역 + 요청당 지연)
+
+- 파티션 파일 여러 개: 순차(workers=1) vs 스레드 풀
+- 같은 파일 재업로드: 체크섬이 같으면 건너뜀
+- 큰 파일: 중간에 끊긴 resumable 업로드를 이어서 완료
+실행: python -m benchmarks.bench_upload
+"""
+import os
+import tempfile
+import time
+
+from benchmarks.fake_gcs import FilesystemBucket
+from pipeline.gcs import GcsUploader, directory_jobs
+from pipeline.output import list_parquet_files
+
+
+LATENCY = 0.02
+
+
+def make_files(root, n_files, size):
+    for i in range(n_files):
+        part_dir = os.path.join(root, "type=townhouse", f"year_month=2024{i % 12 + 1:02d}")
+        os.makedirs(part_dir, exist_ok=True)
+        with open(os.path.join(part_dir, f"part-{i:05d}.parquet"), "wb") as f:
+            f.write(os.urandom(size))
+    return directory_jobs(root, "raw/parquet", list_parquet_files(root))
+
+
+def timed(func):
+    started = time.perf_counter()
+    result = func()
+    return time.perf_counter() - started, result
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        jobs = make_files(os.path.join(tmp, "parquet"), 48, 256 * 1024)
+
+        for workers in (1, 8):
+            bucket = FilesystemBucket(os.path.join(tmp, f"bucket-{workers}"), latency=LATENCY)
+            uploader = GcsUploader(bucket, http=bucket, workers=workers)
+            elapsed, counts = timed(lambda: uploader.upload_many(jobs))
+            print(f"workers={workers}: {len(jobs)}개 {elapsed:.2f}s {dict(counts)}")
+
+        # 같은 내용 재업로드 -> 전부 건너뜀
+        elapsed, counts = timed(lambda: uploader.upload_many(jobs))
+        print(f"재업로드: {elapsed:.2f}s {dict(counts)} 업로드 호출 누적 {bucket.calls['upload_from_filename']}회")
+
+        # 큰 파일: 3번째 청크에서 끊긴 뒤 재시도하면 받은 위치부터 이어서 보냄
+        big_path = os.path.join(tmp, "big.parquet")
+        with open(big_path, "wb") as f:
+            f.write(os.urandom(40 * 1024 * 1024))
+        state_path = os.path.join(tmp, "gcs_sessions.json")
+        bucket = FilesystemBucket(os.path.join(tmp, "bucket-big"), fail_after_chunks=2)
+        first = GcsUploader(bucket, http=bucket, state_path=state_path)
+        counts = first.upload_many([(big_path, "raw/big.parquet")], strict=False)
+        print(f"첫 시도: {dict(counts)} 보낸 청크 {bucket.calls['chunk']}개")
+        bucket.fail_after_chunks = None
+        retry = GcsUploader(bucket, http=bucket, state_path=state_path)
+        counts = retry.upload_many([(big_path, "raw/big.parquet")])
+        print(f"재시도: {dict(counts)} 보낸 청크 누적 {bucket.calls['chunk']}개, "
+              f"세션 생성 {bucket.calls['create_session']}회")
+
+
+if __name__ == "__main__":
+    main()
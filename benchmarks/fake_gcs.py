@@ -0,0 +1,148 @@
+"""파일시스템 기반 GCS 대역 (pipeline.gcs.GcsUploader 확인용)
+
+GcsUploader / pipeline.stream 이 쓰는 메서드만 흉내 낸다. 같은 객체가 bucket 과 http 역할을 모두 한다.
+
+    bucket = FilesystemBucket(root)
+    GcsUploader(bucket, http=bucket).upload_many(jobs)
+
+latency 를 주면 요청마다 그만큼 기다려서 네트워크 왕복 시간을 흉내 낸다.
+fail_after_chunks 를 주면 그 수만큼 청크를 받은 뒤 연결이 끊긴 것처럼 예외를 던져서
+재시도(이어 올리기)를 확인할 수 있다.
+"""
+import itertools
+import os
+import shutil
+import time
+from collections import Counter, namedtuple
+
+from pipeline.gcs import file_checksums
+
+
+Response = namedtuple("Response", ["status_code", "headers"])
+
+
+class FakeBlob:
+
+    def __init__(self, bucket, name):
+        self.bucket = bucket
+        self.name = name
+        self.size = None
+        self.md5_hash = None
+        self.crc32c = None
+
+    def upload_from_filename(self, filename, checksum=None):
+        self.bucket.calls["upload_from_filename"] += 1
+        time.sleep(self.bucket.latency)
+        path = self.bucket.object_path(self.name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        shutil.copyfile(filename, path)
+
+    def upload_from_string(self, data, content_type=None, checksum=None):
+        self.bucket.calls["upload_from_string"] += 1
+        time.sleep(self.bucket.latency)
+        path = self.bucket.object_path(self.name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data.encode("utf-8") if isinstance(data, str) else data)
+
+    def compose(self, sources):
+        self.bucket.calls["compose"] += 1
+        time.sleep(self.bucket.latency)
+        if len(sources) > 32:
+            raise ValueError("fake: compose 원본은 32개까지")
+        path = self.bucket.object_path(self.name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".writing"
+        with open(tmp_path, "wb") as out:
+            for source in sources:
+                with open(self.bucket.object_path(source.name), "rb") as f:
+                    shutil.copyfileobj(f, out)
+        os.replace(tmp_path, path)
+
+    def delete(self):
+        self.bucket.calls["delete"] += 1
+        os.remove(self.bucket.object_path(self.name))
+
+    def create_resumable_upload_session(self, size=None):
+        self.bucket.calls["create_session"] += 1
+        session_id = str(next(self.bucket.session_ids))
+        self.bucket.sessions[session_id] = {"name": self.name, "size": size}
+        open(self.bucket.session_path(session_id), "wb").close()
+        return f"fake://{session_id}"
+
+
+class FilesystemBucket:
+
+    def __init__(self, root, name="fake-bucket", latency=0.0, fail_after_chunks=None):
+        self.root = root
+        self.latency = latency
+        self.name = name
+        self.fail_after_chunks = fail_after_chunks
+        self.sessions = {}
+        self.session_ids = itertools.count(1)
+        self.calls = Counter()
+        os.makedirs(os.path.join(root, ".sessions"), exist_ok=True)
+
+    def object_path(self, name):
+        return os.path.join(self.root, "objects", *name.split("/"))
+
+    def session_path(self, session_id):
+        return os.path.join(self.root, ".sessions", session_id)
+
+    def blob(self, name):
+        return FakeBlob(self, name)
+
+    def get_blob(self, name):
+        self.calls["get_blob"] += 1
+        time.sleep(self.latency)
+        path = self.object_path(name)
+        if not os.path.exists(path):
+            return None
+        blob = FakeBlob(self, name)
+        blob.size = os.path.getsize(path)
+        blob.md5_hash, blob.crc32c = file_checksums(path)
+        return blob
+
+    def list_blobs(self, prefix=""):
+        self.calls["list_blobs"] += 1
+        objects = os.path.join(self.root, "objects")
+        names = []
+        for dirpath, _, filenames in os.walk(objects):
+            for filename in filenames:
+                name = os.path.relpath(os.path.join(dirpath, filename), objects).replace(os.sep, "/")
+                if name.startswith(prefix):
+                    names.append(name)
+        return [FakeBlob(self, name) for name in sorted(names)]
+
+    def put(self, url, data=b"", headers=None):
+        """resumable 세션 URL 로 보내는 PUT (Content-Range 프로토콜)"""
+        time.sleep(self.latency)
+        session_id = url[len("fake://"):]
+        session = self.sessions.get(session_id)
+        if session is None:
+            return Response(404, {})
+        part_path = self.session_path(session_id)
+        received = os.path.getsize(part_path)
+        content_range = headers["Content-Range"][len("bytes "):]
+        span, total = content_range.split("/")
+        total = int(total)
+
+        if span != "*":
+            if self.fail_after_chunks is not None and self.calls["chunk"] >= self.fail_after_chunks:
+                raise ConnectionError("fake: 연결 끊김")
+            self.calls["chunk"] += 1
+            start = int(span.split("-")[0])
+            if start != received:
+                return Response(400, {})
+            with open(part_path, "ab") as f:
+                f.write(data)
+            received += len(data)
+
+        if received >= total:
+            path = self.object_path(session["name"])
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(part_path, path)
+            del self.sessions[session_id]
+            return Response(200, {})
+        headers = {"Range": f"bytes=0-{received - 1}"} if received else {}
+        return Response(308, headers)
@@ -0,0 +1,190 @@
+"""로컬 RTMS 전월세 API 대역 (오피스텔 / 연립다세대 두 엔드포인트)
+
+실제 API 와 같은 경로/파라미터(LAWD_CD, DEAL_YMD, pageNo, numOfRows)로 응답 XML 을 돌려준다.
+(구, 계약월) 마다 seed 가 고정이라 몇 번을 받아도 같은 데이터가 나온다.
+item 의 sggCd / dealYear / dealMonth 는 요청한 LAWD_CD / DEAL_YMD 를 그대로 따른다.
+
+- rows: 수집 단위(유형, 구, 계약월)당 거래 수. rows_spread 를 주면 rows*(1-spread) ~ rows 사이
+- latency: 요청마다 기다리는 시간(초)
+- error_rate / error_code: 그 비율만큼 resultCode 오류 응답 (기본 '99')
+- http_error_rate: 그 비율만큼 HTTP 500
+- quota: 이 수만큼 요청한 뒤에는 게이트웨이 한도 초과(returnReasonCode 22) 응답
+- max_in_flight: 동시에 처리 중인 요청이 이보다 많으면 HTTP 429 (초당 한도 대역)
+
+    with MockRTMSServer(rows=300, latency=0.05) as server:
+        server.patch_endpoints()      # pipeline.config.ENDPOINTS 를 이 서버로
+        ...
+
+명령행: python -m benchmarks.mock_rtms --port 8080 --rows 300 --latency 0.05
+그 다음 RTMS_API_BASE=http://127.0.0.1:8080/1613000 로 batch_collector / DAG 를 실행.
+"""
+import argparse
+import random
+import threading
+import time
+from collections import Counter
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from benchmarks.synthetic import make_items, wrap_items
+from pipeline.config import ENDPOINTS
+
+
+PATHS = {
+    "/1613000/RTMSDataSvcOffiRent/getRTMSDataSvcOffiRent": "officetel",
+    "/1613000/RTMSDataSvcRHRent/getRTMSDataSvcRHRent": "townhouse",
+}
+
+QUOTA_EXCEEDED_BODY = (
+    "<OpenAPI_ServiceResponse><cmmMsgHeader><errMsg>SERVICE ERROR</errMsg>"
+    "<returnAuthMsg>LIMITED_NUMBER_OF_SERVICE_REQUESTS_EXCEEDS_ERROR</returnAuthMsg>"
+    "<returnReasonCode>22</returnReasonCode></cmmMsgHeader></OpenAPI_ServiceResponse>"
+).encode("utf-8")
+
+
+class MockRTMSServer:
+
+    def __init__(self, rows=100, rows_spread=0.0, latency=0.0, error_rate=0.0, error_code="99",
+                 http_error_rate=0.0, quota=None, max_in_flight=None, host="127.0.0.1", port=0, seed=0):
+        self.rows = rows
+        self.rows_spread = rows_spread
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_code = error_code
+        self.http_error_rate = http_error_rate
+        self.quota = quota
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+        self.seed = seed
+        self.counts = Counter()
+        self._lock = threading.Lock()
+        self._random = random.Random(seed)
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        # 클라이언트가 오류 응답 뒤 keep-alive 커넥션을 끊는 것은 정상이라 traceback 을 찍지 않음
+        self._httpd.handle_error = lambda request, client_address: None
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/1613000"
+
+    def unit_items(self, target_type, lawd_cd, deal_ymd):
+        return _unit_items(target_type, lawd_cd, deal_ymd, self.rows, self.rows_spread, self.seed)
+
+    def respond(self, path, query):
+        """(HTTP 상태, 본문)"""
+        target_type = PATHS.get(path)
+        if target_type is None:
+            return 404, b"not found"
+        with self._lock:
+            self.counts["requests"] += 1
+            over_quota = self.quota is not None and self.counts["requests"] > self.quota
+            roll = self._random.random()
+        if over_quota:
+            self.counts["quota_exceeded"] += 1
+            return 200, QUOTA_EXCEEDED_BODY
+        if roll < self.http_error_rate:
+            self.counts["http_errors"] += 1
+            return 500, b"internal error"
+        if roll < self.http_error_rate + self.error_rate:
+            self.counts["api_errors"] += 1
+            return 200, wrap_items([], 0, 1, 0, result_code=self.error_code, result_msg="MOCK ERROR")
+
+        items = self.unit_items(target_type, query["LAWD_CD"][0], query["DEAL_YMD"][0])
+        page_no = int(query.get("pageNo", ["1"])[0])
+        num_of_rows = int(query.get("numOfRows", ["10"])[0])
+        start = (page_no - 1) * num_of_rows
+        return 200, wrap_items(items[start:start + num_of_rows], len(items), page_no, num_of_rows)
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                with server._lock:
+                    server.in_flight += 1
+                    throttled = server.max_in_flight is not None and server.in_flight > server.max_in_flight
+                try:
+                    if server.latency:
+                        time.sleep(server.latency)
+                    if throttled:
+                        server.counts["throttled"] += 1
+                        status, body = 429, b"API rate limit exceeded"
+                    else:
+                        status, body = server.respond(url.path, parse_qs(url.query))
+                finally:
+                    with server._lock:
+                        server.in_flight -= 1
+                self.send_response(status)
+                self.send_header("Content-Type", "application/xml;charset=UTF-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def serve_forever(self):
+        self._httpd.serve_forever()
+
+    def start(self):
+        """백그라운드 스레드에서 서버 실행"""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def patch_endpoints(self):
+        """이 프로세스의 ENDPOINTS URL 을 mock 서버로 바꿈 (원래 값 dict 를 돌려줌)"""
+        original = {target_type: endpoint["url"] for target_type, endpoint in ENDPOINTS.items()}
+        for path, target_type in PATHS.items():
+            ENDPOINTS[target_type]["url"] = self.base_url.rsplit("/", 1)[0] + path
+        return original
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+@lru_cache(maxsize=4096)
+def _unit_items(target_type, lawd_cd, deal_ymd, rows, rows_spread, seed):
+    rnd = random.Random(f"{seed}:{target_type}:{lawd_cd}:{deal_ymd}")
+    n_items = rows - int(rows * rows_spread * rnd.random())
+    return make_items(n_items, target_type, seed=rnd.random(), lawd_cd=lawd_cd, deal_ymd=deal_ymd)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="로컬 RTMS 전월세 API 대역")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--rows-spread", type=float, default=0.0)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-code", default="99")
+    parser.add_argument("--http-error-rate", type=float, default=0.0)
+    parser.add_argument("--quota", type=int, default=None)
+    parser.add_argument("--max-in-flight", type=int, default=None)
+    args = parser.parse_args()
+
+    server = MockRTMSServer(rows=args.rows, rows_spread=args.rows_spread, latency=args.latency,
+                            error_rate=args.error_rate, error_code=args.error_code,
+                            http_error_rate=args.http_error_rate, quota=args.quota,
+                            max_in_flight=args.max_in_flight, port=args.port)
+    print(f"mock RTMS 서버 시작: RTMS_API_BASE={server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
@@ -0,0 +1,62 @@
+"""벤치마크용 가짜 RTMS 응답 XML 생성기"""
+import random
+
+from pipeline.config import ENDPOINTS
+
+
+DONGS = ['역삼동', '삼성동', '대치동', '논현동', '청담동', '개포동', '도곡동', '신사동']
+# 실제 응답처럼 0층은 없음 (지하 1층 = -1)
+FLOORS = [-1] + list(range(1, 26))
+
+# 요청 파라미터를 따로 주지 않을 때의 LAWD_CD / DEAL_YMD
+DEFAULT_LAWD_CD = "11680"
+DEFAULT_DEAL_YMD = "202401"
+
+
+def make_item(rnd, target_type, lawd_cd=DEFAULT_LAWD_CD, deal_ymd=DEFAULT_DEAL_YMD):
+    """item 하나. dealYear / dealMonth / sggCd 는 요청한 DEAL_YMD / LAWD_CD 와 같게 채운다."""
+    endpoint = ENDPOINTS[target_type]
+    deposit = rnd.randint(500, 120000)
+    monthly_rent = rnd.choice([0, 0, rnd.randint(10, 300)])
+    return (
+        "<item>"
+        f"<buildYear>{rnd.randint(1985, 2024)}</buildYear>"
+        "<contractTerm></contractTerm><contractType></contractType>"
+        f"<dealDay>{rnd.randint(1, 28)}</dealDay>"
+        f"<dealMonth>{int(deal_ymd[4:])}</dealMonth><dealYear>{deal_ymd[:4]}</dealYear>"
+        f"<deposit>{deposit:,}</deposit>"
+        f"<{endpoint['area_tag']}>{rnd.randint(1500, 12000) / 100}</{endpoint['area_tag']}>"
+        f"<floor>{rnd.choice(FLOORS)}</floor>"
+        f"<jibun>{rnd.randint(1, 999)}-{rnd.randint(1, 40)}</jibun>"
+        f"<{endpoint['name_tag']}>테스트빌라{rnd.randint(1, 500)}</{endpoint['name_tag']}>"
+        f"<monthlyRent>{monthly_rent:,}</monthlyRent>"
+        "<preDeposit></preDeposit><preMonthlyRent></preMonthlyRent>"
+        f"<sggCd>{lawd_cd}</sggCd>"
+        f"<umdNm>{rnd.choice(DONGS)}</umdNm>"
+        "<useRRRight></useRRRight>"
+        "</item>"
+    )
+
+
+def make_items(n_items, target_type="townhouse", seed=0, lawd_cd=DEFAULT_LAWD_CD, deal_ymd=DEFAULT_DEAL_YMD):
+    """item XML 문자열 n_items 개 목록 (같은 seed 면 같은 내용)"""
+    rnd = random.Random(seed)
+    return [make_item(rnd, target_type, lawd_cd, deal_ymd) for _ in range(n_items)]
+
+
+def wrap_items(items, total_count, page_no, num_of_rows, result_code="000", result_msg="OK"):
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        f"<response><header><resultCode>{result_code}</resultCode><resultMsg>{result_msg}</resultMsg></header>"
+        f"<body><items>{''.join(items)}</items><numOfRows>{num_of_rows}</numOfRows>"
+        f"<pageNo>{page_no}</pageNo><totalCount>{total_count}</totalCount></body></response>"
+    ).encode("utf-8")
+
+
+def make_payload(n_items, target_type="townhouse", seed=0, total_count=None, page_no=1, num_of_rows=None,
+                 lawd_cd=DEFAULT_LAWD_CD, deal_ymd=DEFAULT_DEAL_YMD):
+    """item n_items 개짜리 응답 XML (bytes)"""
+    items = make_items(n_items, target_type, seed, lawd_cd, deal_ymd)
+    total_count = n_items if total_count is None else total_count
+    num_of_rows = n_items if num_of_rows is None else num_of_rows
+    return wrap_items(items, total_count, page_no, num_of_rows)
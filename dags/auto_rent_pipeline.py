@@ -2,12 +2,16 @@ from airflow import DAG
 from airflow.operators.python import PythonOperator
 from datetime import datetime, timedelta
 from dateutil.relativedelta import relativedelta
-import requests
-import pandas as pd
-import xml.etree.ElementTree as ET
-import time
+import codecs
+import glob
 import os
-from google.cloud import bigquery, storage
+import shutil
+
+# 스케줄러가 이 파일을 주기마다 다시 파싱하므로 최상위에서는 가벼운 모듈만 import 하고
+# pandas / aiohttp / google-cloud 를 쓰는 pipeline 모듈은 각 Task 함수 안에서 import
+# (python -m benchmarks.bench_dag_parse 로 파싱 시간 / 무거운 모듈 유입 확인)
+from pipeline.config import API_CONCURRENCY, API_RATE_LIMIT, OUTPUT_FORMAT, TARGET_DISTRICTS, TARGET_REGION_NAME
+from pipeline.metrics import instrumented, stage
 
 
 
@@ -19,102 +23,212 @@ BUCKET_NAME = os.getenv("GCS_BUCKET_NAME", "your-gcs-bucket-name")
 # GCP 설정
 DATASET_ID = "real_estate_data"
 TABLE_ID = "raw_rent_transactions"
+ROLLUP_TABLE_ID = "rent_market_rollup"
 
 
 
 KEY_PATH = f"/opt/airflow/keys/{KEY_FILE_NAME}"
 
-# 서울시 구 코드
-SEOUL_DISTRICTS = {
-    '11110': '종로구', '11140': '중구', '11170': '용산구', '11200': '성동구', 
-    '11215': '광진구', '11230': '동대문구', '11260': '중랑구', '11290': '성북구', 
-    '11305': '강북구', '11320': '도봉구', '11350': '노원구', '11380': '은평구', 
-    '11410': '서대문구', '11440': '마포구', '11470': '양천구', '11500': '강서구', 
-    '11530': '구로구', '11545': '금천구', '11560': '영등포구', '11590': '동작구', 
-    '11620': '관악구', '11650': '서초구', '11680': '강남구', '11710': '송파구', 
-    '11740': '강동구'
-}
+# 샤드 파일 저장 위치 (Celery 워커 여러 대면 공유 볼륨으로 지정)
+STAGING_DIR = os.getenv("RENT_STAGING_DIR", "/tmp")
+# 스트리밍 모드: 샤드가 수집한 행을 로컬 파일 없이 조각마다 GCS 로 바로 올리고,
+# reduce 에서 GCS compose 로 합침 (pipeline/stream.py). 격리 파일만 STAGING_DIR 에 남음
+STREAM_TO_GCS = os.getenv("STREAM_TO_GCS", "false").lower() == "true"
+
+# API 호출 샤드가 동시에 도는 개수는 Airflow 풀 슬롯 수로 제한하고,
+# 샤드마다 전체 초당 요청 수를 슬롯 수로 나눠 가져서 합계가 API 한도를 넘지 않게 함
+API_POOL = os.getenv("RTMS_API_POOL", "rtms_api")
+API_POOL_SLOTS = int(os.getenv("RTMS_API_POOL_SLOTS", "4"))
+SHARD_RATE_LIMIT = API_RATE_LIMIT / API_POOL_SLOTS
+
+
+# 수집 샤드: 유형 x 시군구 (RTMS_PROVINCES 로 고른 시도, pipeline/regions.csv)
+SHARDS = [
+    {"target_type": target_type, "lawd_cd": code, "district_name": district_name}
+    for target_type in ["officetel", "townhouse"]
+    for code, district_name in TARGET_DISTRICTS.items()
+]
 
 
 
-def get_text(item, tag):
-    node = item.find(tag)
-    return node.text.strip() if node is not None and node.text else "0"
+def get_target_ym(context):
+    """Airflow 실행 날짜(Logical Date)의 '지난 달' (예: 2025-02-01 -> 202501)"""
+    target_date = context['logical_date'] - relativedelta(months=1)
+    return target_date.strftime("%Y%m")
 
-def fetch_data_from_api(**context):
+def fetch_shard(target_type, lawd_cd, district_name, **context):
     """
-    Airflow 실행 날짜(Logical Date)의 '지난 달' 데이터를 수집합니다.
+    (유형, 구) 샤드 하나의 '지난 달' 데이터를 수집해서 샤드 전용 파일로 저장합니다.
     예: 2월 1일에 실행 -> 1월 데이터를 수집
+    실패하면 예외를 던져서 이 샤드만 재시도되게 합니다.
     """
-    # Airflow가 넘겨주는 실행 기준 날짜
-    logical_date = context['logical_date']
-    # 지난 달 계산 (예: 2025-02-01 -> 202501)
-    target_date = logical_date - relativedelta(months=1)
-    target_ym = target_date.strftime("%Y%m")
-    
-    print(f"수집 대상 월: {target_ym}")
-    
-    # 저장할 임시 경로
-    save_path = f"/tmp/rent_data_{target_ym}.csv"
-    all_data = []
-
-    # 수집 대상: 오피스텔 & 연립다세대
-    targets = [
-        {"type": "officetel", "url": "http://apis.data.go.kr/1613000/RTMSDataSvcOffiRent/getRTMSDataSvcOffiRent", "name_tag": "offiNm", "area_tag": "excluUseAr"},
-        {"type": "townhouse", "url": "http://apis.data.go.kr/1613000/RTMSDataSvcRHRent/getRTMSDataSvcRHRent", "name_tag": "mhouseNm", "area_tag": "excluUseAr"}
-    ]
-
-    for target in targets:
-        print(f"{target['type']} 수집 시작...")
-        for code, district_name in SEOUL_DISTRICTS.items():
-            params = {
-                'serviceKey': SERVICE_KEY,
-                'LAWD_CD': code,
-                'DEAL_YMD': target_ym,
-                'numOfRows': '9999',
-                'pageNo': '1'
-            }
-            try:
-                response = requests.get(target['url'], params=params, timeout=10)
-                if response.status_code == 200:
-                    root = ET.fromstring(response.content)
-                    items = root.findall('.//item')
-                    
-                    for item in items:
-                        row = {
-                            'year_month': target_ym,
-                            'district_code': code,
-                            'district_name': district_name,
-                            'dong': get_text(item, 'umdNm'),
-                            'jibun': get_text(item, 'jibun'),
-                            'name': get_text(item, target['name_tag']),
-                            'floor': get_text(item, 'floor'),
-                            'area': get_text(item, target['area_tag']),
-                            'deposit': get_text(item, 'deposit').replace(',', ''),
-                            'monthly_rent': get_text(item, 'monthlyRent').replace(',', ''),
-                            'build_year': get_text(item, 'buildYear'),
-                            'deal_day': get_text(item, 'dealDay'),
-                            'type': target['type']
-                        }
-                        all_data.append(row)
-                time.sleep(0.1) # 트래픽 조절
-            except Exception as e:
-                print(f"Error ({district_name}): {e}")
-
-    # CSV 저장
-    if all_data:
-        pd.DataFrame(all_data).to_csv(save_path, index=False, encoding='utf-8-sig')
-        print(f"수집 완료: {len(all_data)}건 -> {save_path}")
-        return save_path
+    from pipeline.cache import ResponseCache
+    from pipeline.collector import WorkUnit, collect
+    from pipeline.output import write_parquet_partitions
+    from pipeline.validate import validate_frame, write_quarantine
+
+    target_ym = get_target_ym(context)
+    print(f"수집 대상: {target_ym} {target_type} {district_name}")
+
+    unit = WorkUnit(target_type, lawd_cd, target_ym, district_name)
+
+    # 샤드별 저장 경로 (여러 워커에서 돌면 STAGING_DIR 은 공유 볼륨이어야 함)
+    save_dir = f"{STAGING_DIR}/rent_data_{target_ym}"
+    part_name = f"part-{lawd_cd}"
+    csv_path = f"{save_dir}/shards/{target_type}_{lawd_cd}.csv"
+    quarantine_path = f"{save_dir}/quarantine/{target_type}_{lawd_cd}.csv"
+
+    if STREAM_TO_GCS:
+        with stage("collect_stream"):
+            return stream_shard(unit, quarantine_path)
+
+    with stage("collect"):
+        rows = collect([unit], concurrency=API_CONCURRENCY, rate=SHARD_RATE_LIMIT, service_key=SERVICE_KEY,
+                       cache=ResponseCache(), strict=True)
+
+    with stage("build_frame"):
+        df = rows.to_pandas()
+    # 적재 전에 타입/범위/필수값을 검사해서 걸린 행은 격리 파일로 (적재 작업이 늦게 실패하지 않게)
+    with stage("validate"):
+        df, rejected = validate_frame(df)
+    write_quarantine(rejected, quarantine_path)
+
+    if not len(df):
+        print("수집된 데이터가 없습니다.")
+        # 이전 실행에서 남은 샤드 파일이 있으면 지움
+        stale = [csv_path, f"{save_dir}/type={target_type}/year_month={target_ym}/{part_name}.parquet"]
+        for path in stale:
+            if os.path.exists(path):
+                os.remove(path)
+        return None
+
+    if OUTPUT_FORMAT == "parquet":
+        with stage("write_parquet"):
+            return write_parquet_partitions(df, save_dir, part_name=part_name)[0]
+
+    os.makedirs(os.path.dirname(csv_path), exist_ok=True)
+    with stage("write_csv"):
+        df.to_csv(csv_path, index=False, encoding='utf-8')
+    print(f"수집 완료: {len(df)}건 -> {csv_path}")
+    return csv_path
+
+def stream_shard(unit, quarantine_path):
+    """스트리밍 모드: 페이지를 받는 대로 행을 조각마다 검증해서 GCS part 객체로 올리고 객체 이름 목록을 돌려줌"""
+    from pipeline.cache import ResponseCache
+    from pipeline.collector import collect
+    from pipeline.gcs import storage_client
+    from pipeline.stream import PartWriter, delete_parts
+    from pipeline.validate import write_quarantine
+
+    bucket = storage_client(KEY_PATH).bucket(BUCKET_NAME)
+    if OUTPUT_FORMAT == "parquet":
+        prefix, part_name = f"raw/monthly/{unit.deal_ymd}/parquet", f"part-{unit.lawd_cd}"
+        stale_prefix = f"{prefix}/type={unit.type}/"
     else:
+        prefix, part_name = f"raw/monthly/{unit.deal_ymd}/parts", f"{unit.type}_{unit.lawd_cd}"
+        stale_prefix = f"{prefix}/"
+    # 재실행 때 조각 수가 줄어도 이전 조각이 같이 적재되지 않게 이 샤드 것만 먼저 지움
+    delete_parts(bucket, stale_prefix, part_name)
+
+    # 행은 파서 -> PartWriter 로 바로 넘어가고 STREAM_CHUNK_ROWS 행마다 검증/인코딩/업로드
+    with PartWriter(bucket, prefix, part_name, OUTPUT_FORMAT, validate=True) as writer:
+        collect([unit], concurrency=API_CONCURRENCY, rate=SHARD_RATE_LIMIT, service_key=SERVICE_KEY,
+                cache=ResponseCache(), strict=True, sink=writer)
+    write_quarantine(writer.rejected_frame(), quarantine_path)
+
+    if not writer.names:
         print("수집된 데이터가 없습니다.")
         return None
+    print(f"수집 완료: {writer.rows}건 -> gs://{BUCKET_NAME}/{prefix} (조각 {len(writer.names)}개)")
+    return writer.names
+
+def compose_stream(target_ym, part_names):
+    """스트리밍 모드: 샤드들이 올린 조각으로 적재할 GCS 경로를 만듦
+
+    CSV 는 compose 로 객체 하나를 만들고 raw/monthly/{ym}/parts/ 의 조각은 지움
+    """
+    from pipeline.gcs import storage_client
+    from pipeline.stream import compose_csv
+
+    prefix = f"raw/monthly/{target_ym}"
+    if OUTPUT_FORMAT == "parquet":
+        return f"gs://{BUCKET_NAME}/{prefix}/parquet/*"
+    bucket = storage_client(KEY_PATH).bucket(BUCKET_NAME)
+    return compose_csv(bucket, sorted(part_names), f"{prefix}/rent_data.csv")
+
+def merge_quarantine(target_ym):
+    """샤드별 격리 파일을 rent_quarantine_{ym}.csv 하나로 합침 (없으면 이전 파일 삭제)"""
+    from pipeline.validate import QUARANTINE_COLUMNS
+
+    save_path = f"{STAGING_DIR}/rent_quarantine_{target_ym}.csv"
+    paths = sorted(glob.glob(f"{STAGING_DIR}/rent_data_{target_ym}/quarantine/*.csv"))
+    if not paths:
+        if os.path.exists(save_path):
+            os.remove(save_path)
+        return None
+
+    with open(save_path, "wb") as out:
+        out.write(codecs.BOM_UTF8 + (",".join(QUARANTINE_COLUMNS) + "\n").encode("utf-8"))
+        for path in paths:
+            with open(path, "rb") as shard:
+                shard.readline()
+                shutil.copyfileobj(shard, out)
+    print(f"격리된 행 병합: {save_path} (샤드 {len(paths)}개)")
+    return save_path
+
+def reduce_shards(**context):
+    """샤드 결과를 모아 업로드할 경로 하나로 넘김 (CSV 는 하나로 합치고, Parquet 은 디렉터리)
+
+    스트리밍 모드면 로컬 파일 대신 GCS 경로 (gs://...) 를 넘김
+    """
+    target_ym = get_target_ym(context)
+    shard_paths = [path for path in context['task_instance'].xcom_pull(task_ids='fetch_shard_task') if path]
+    print(f"{target_ym}: 데이터가 있는 샤드 {len(shard_paths)}개")
+    merge_quarantine(target_ym)
+
+    if not shard_paths:
+        print("수집된 데이터가 없습니다.")
+        return None
+
+    if STREAM_TO_GCS:
+        return compose_stream(target_ym, [name for names in shard_paths for name in names])
+
+    save_dir = f"{STAGING_DIR}/rent_data_{target_ym}"
+    if OUTPUT_FORMAT == "parquet":
+        return save_dir
+
+    # CSV: 헤더는 한 번만 쓰고 샤드 본문을 이어 붙임 (기존과 같은 utf-8-sig 파일 하나)
+    save_path = f"{STAGING_DIR}/rent_data_{target_ym}.csv"
+    with open(save_path, "w", newline="", encoding="utf-8-sig") as out:
+        for i, path in enumerate(sorted(shard_paths)):
+            with open(path, newline="", encoding="utf-8") as shard:
+                header = shard.readline()
+                if i == 0:
+                    out.write(header)
+                shutil.copyfileobj(shard, out)
+    print(f"병합 완료: {save_path}")
+    return save_path
 
 def upload_to_gcs(**context):
-    """수집된 CSV를 GCS에 업로드"""
-    # 이전 Task(fetch_data)에서 반환한 파일 경로를 받아옴
-    file_path = context['task_instance'].xcom_pull(task_ids='fetch_data_task')
-    
+    """수집된 CSV (또는 Parquet 파티션 디렉터리)를 GCS에 업로드"""
+    from pipeline.gcs import GcsUploader, delete_stale, directory_jobs, storage_client
+    from pipeline.output import list_parquet_files
+
+    # 이전 Task(reduce_shards)에서 반환한 파일 경로를 받아옴
+    file_path = context['task_instance'].xcom_pull(task_ids='reduce_shards_task')
+
+    # 검증에서 걸러진 행은 적재하지 않고 확인용으로만 올려 둠
+    target_ym = get_target_ym(context)
+    quarantine_path = f"{STAGING_DIR}/rent_quarantine_{target_ym}.csv"
+    if os.path.exists(quarantine_path):
+        bucket = storage_client(KEY_PATH).bucket(BUCKET_NAME)
+        GcsUploader(bucket).upload_many([(quarantine_path, f"raw/quarantine/{target_ym}/rejected.csv")])
+
+    if file_path and file_path.startswith("gs://"):
+        # 스트리밍 모드: 수집 단계에서 이미 올라가 있음
+        print(f"GCS 에 이미 있음: {file_path}")
+        return file_path
+
     if not file_path or not os.path.exists(file_path):
         print("업로드할 파일이 없습니다.")
         return
@@ -123,52 +237,46 @@ def upload_to_gcs(**context):
     ym = file_path.split('_')[-1].split('.')[0]
     destination_blob_name = f"raw/monthly/{ym}/rent_data.csv"
 
-    client = storage.Client.from_service_account_json(KEY_PATH)
-    bucket = client.bucket(BUCKET_NAME)
-    blob = bucket.blob(destination_blob_name)
-    blob.upload_from_filename(file_path)
+    bucket = storage_client(KEY_PATH).bucket(BUCKET_NAME)
+    # resumable 세션 URL 을 남겨 두어 Task 재시도 때 큰 파일을 이어서 올림
+    uploader = GcsUploader(bucket, state_path=os.path.join(STAGING_DIR, f"gcs_sessions_{ym}.json"))
+
+    if os.path.isdir(file_path):
+        # Parquet 파티션 파일을 같은 상대 경로로 병렬 업로드 (이미 같은 내용이면 건너뜀)
+        prefix = f"raw/monthly/{ym}/parquet"
+        jobs = directory_jobs(file_path, prefix, list_parquet_files(file_path))
+        uploader.upload_many(jobs)
+        # 이번 실행에 없는 파일(지난 실행의 샤드 등)은 와일드카드 적재에 섞이지 않도록 삭제
+        delete_stale(bucket, prefix, [blob_name for _, blob_name in jobs])
+        print(f"GCS 업로드 완료: gs://{BUCKET_NAME}/{prefix}/")
+        return f"gs://{BUCKET_NAME}/{prefix}/*"
+
+    uploader.upload_many([(file_path, destination_blob_name)])
     
     print(f"GCS 업로드 완료: gs://{BUCKET_NAME}/{destination_blob_name}")
     return f"gs://{BUCKET_NAME}/{destination_blob_name}"
 
 def load_to_bq(**context):
-    """GCS 파일을 BigQuery에 적재 (Append 모드)"""
+    """GCS 파일을 BigQuery에 적재 (계약월 파티션 교체라서 재실행해도 중복 없음)"""
+    from pipeline.bq import bigquery_client, replace_months
+
     gcs_uri = context['task_instance'].xcom_pull(task_ids='upload_to_gcs_task')
     
     if not gcs_uri:
         print("적재할 GCS 경로가 없습니다.")
         return
 
-    client = bigquery.Client.from_service_account_json(KEY_PATH)
+    client = bigquery_client(KEY_PATH)
     table_ref = f"{PROJECT_ID}.{DATASET_ID}.{TABLE_ID}"
-
-    schema = [
-        bigquery.SchemaField("year_month", "STRING"),
-        bigquery.SchemaField("district_code", "STRING"),
-        bigquery.SchemaField("district_name", "STRING"),
-        bigquery.SchemaField("dong", "STRING"),
-        bigquery.SchemaField("jibun", "STRING"),
-        bigquery.SchemaField("name", "STRING"),
-        bigquery.SchemaField("floor", "INTEGER"),
-        bigquery.SchemaField("area", "FLOAT"),
-        bigquery.SchemaField("deposit", "INTEGER"),
-        bigquery.SchemaField("monthly_rent", "INTEGER"),
-        bigquery.SchemaField("build_year", "INTEGER"),
-        bigquery.SchemaField("deal_day", "STRING"),
-        bigquery.SchemaField("type", "STRING"),
-    ]
-
-    job_config = bigquery.LoadJobConfig(
-        schema=schema,  # 자동 감지(autodetect) 대신 이 스키마를 사용
-        source_format=bigquery.SourceFormat.CSV,
-        skip_leading_rows=1,
-        write_disposition="WRITE_APPEND", 
-    )
+    # Parquet 파티션: 파일에 타입이 있으므로 문자열 변환 실패가 없음
+    source_format = "CSV" if gcs_uri.endswith(".csv") else "PARQUET"
 
     try:
-        load_job = client.load_table_from_uri(gcs_uri, table_ref, job_config=job_config)
-        load_job.result()
-        print(f"BigQuery 적재 완료: {gcs_uri}")
+        months = replace_months(client, gcs_uri, table_ref, source_format,
+                                staging_suffix=f"staging_{get_target_ym(context)}")
+        print(f"BigQuery 적재 완료: {gcs_uri} -> 계약월 {list(months)}")
+        # 가공 단계(transform_data)가 이 계약월만 다시 계산
+        return list(months)
     except Exception as e:
         print(f"적재 실패 상세 에러: {e}")
         raise e
@@ -181,66 +289,31 @@ default_args = {
 }
 
 def transform_data(**context):
+    """이번 실행에서 적재된 계약월의 rent_market_view / rent_market_rollup 파티션만 다시 계산"""
+    from pipeline.bq import bigquery_client, refresh_market_view, refresh_rollup
+
+    months = context['task_instance'].xcom_pull(task_ids='load_to_bq_task')
+    if not months:
+        print("갱신할 계약월이 없습니다.")
+        return
 
     # 1. BigQuery 클라이언트 연결
-    client = bigquery.Client.from_service_account_json(KEY_PATH)
+    client = bigquery_client(KEY_PATH)
 
     # 2. 테이블 경로 설정
     # 원본 테이블
-    source_table = f"{PROJECT_ID}.{DATASET_ID}.raw_rent_transactions"
-    # 새로 만들 가공 테이블
+    source_table = f"{PROJECT_ID}.{DATASET_ID}.{TABLE_ID}"
+    # 가공 테이블 (deal_date 월 파티션, 처음 한 번만 전체 생성)
     target_table = f"{PROJECT_ID}.{DATASET_ID}.rent_market_view"
+    # 대시보드용 집계 테이블 (구/동/계약월/유형/전월세별 건수, 합계, 분위수 스케치)
+    rollup_table = f"{PROJECT_ID}.{DATASET_ID}.{ROLLUP_TABLE_ID}"
 
-    # 3. SQL 쿼리
-    query = f"""
-    CREATE OR REPLACE TABLE `{target_table}` AS
-    SELECT
-        district_name,
-        dong,
-        name AS building_name,
-        build_year,
-        floor,
-        
-        -- 날짜 분해
-        PARSE_DATE('%Y%m', year_month) AS deal_date,
-        EXTRACT(YEAR FROM PARSE_DATE('%Y%m', year_month)) AS deal_year,
-        EXTRACT(MONTH FROM PARSE_DATE('%Y%m', year_month)) AS deal_month,
-
-        -- 면적 계산
-        area AS area_m2,
-        ROUND(area / 3.3058, 1) AS area_pyung, -- 평수
-
-        -- 금액 변환
-        deposit,
-        monthly_rent,
-
-        -- 보기 좋은 문자열
-        CASE 
-            WHEN deposit >= 10000 THEN 
-                CONCAT(CAST(FLOOR(deposit / 10000) AS STRING), '억 ', 
-                       IF(MOD(deposit, 10000) > 0, CONCAT(CAST(MOD(deposit, 10000) AS STRING), '만원'), ''))
-            ELSE CONCAT(CAST(deposit AS STRING), '만원')
-        END AS deposit_korean,
-
-        -- 전세 평단가
-        ROUND(deposit / (area / 3.3058), 0) AS deposit_per_pyung,
-        
-        -- 월세 평단가
-        CASE
-            WHEN monthly_rent > 0 THEN ROUND(monthly_rent / (area / 3.3058), 0)
-            ELSE 0
-        END AS rent_per_pyung,
-
-        IF(monthly_rent = 0, 'Jeonse', 'Monthly') AS rent_type
-
-    FROM `{source_table}`
-    ORDER BY deal_date DESC
-    """
-
+    # 3. 계약월 파티션 교체 (SQL 은 pipeline/bq.py 의 MARKET_VIEW_SELECT)
     try:
-        query_job = client.query(query)  # API 요청
-        query_job.result()  # 결과가 나올 때까지 기다림
-        print(f"테이블 생성됨: {target_table}")
+        refresh_market_view(client, source_table, target_table, months)
+        print(f"테이블 갱신됨: {target_table} ({', '.join(months)})")
+        refresh_rollup(client, source_table, rollup_table, months)
+        print(f"집계 갱신됨: {rollup_table} ({', '.join(months)})")
     except Exception as e:
         print(f"에러 발생: {e}")
         raise e
@@ -248,33 +321,50 @@ def transform_data(**context):
 with DAG(
     dag_id='auto_rent_pipeline',
     default_args=default_args,
-    description='서울시 전월세 실거래가 월간 자동 수집',
+    description=f'{TARGET_REGION_NAME} 전월세 실거래가 월간 자동 수집',
     schedule_interval='@monthly', # 매월 1일 0시에 실행
     start_date=datetime(2026, 1, 1), # 시작일 (과거 데이터 채우기 가능)
     catchup=False, # True로 하면 과거 안 돌린 기간을 한꺼번에 다 돌려버림 주의
     tags=['real_estate', 'etl']
 ) as dag:
 
-    # 1. 수집 Task
-    t1 = PythonOperator(
-        task_id='fetch_data_task',
-        python_callable=fetch_data_from_api,
+    # 각 Task 는 instrumented() 로 감싸서 단계별 시간/메모리, 요청 지표를 XCom(key='metrics') 과
+    # METRICS_DIR 의 .prom/.json 파일로 남김 (pipeline/metrics.py)
+
+    # 1. 수집 Task: (유형 x 구) 샤드마다 하나씩 매핑. API 풀로 동시 실행 수를 제한
+    t1 = PythonOperator.partial(
+        task_id='fetch_shard_task',
+        python_callable=instrumented(fetch_shard),
+        pool=API_POOL,
+    ).expand(op_kwargs=SHARDS)
+
+    # 1-1. 샤드 결과 모으기
+    t1_reduce = PythonOperator(
+        task_id='reduce_shards_task',
+        python_callable=instrumented(reduce_shards),
         provide_context=True
     )
 
     # 2. GCS 업로드 Task
     t2 = PythonOperator(
         task_id='upload_to_gcs_task',
-        python_callable=upload_to_gcs,
+        python_callable=instrumented(upload_to_gcs),
         provide_context=True
     )
 
     # 3. BigQuery 적재 Task
     t3 = PythonOperator(
         task_id='load_to_bq_task',
-        python_callable=load_to_bq,
+        python_callable=instrumented(load_to_bq),
+        provide_context=True
+    )
+
+    # 4. 가공 테이블 갱신 Task (적재된 계약월 파티션만)
+    t4 = PythonOperator(
+        task_id='transform_data_task',
+        python_callable=instrumented(transform_data),
         provide_context=True
     )
 
     # 실행 순서
-    t1 >> t2 >> t3
\ No newline at end of file
+    t1 >> t1_reduce >> t2 >> t3 >> t4
\ No newline at end of file
@@ -0,0 +1,54 @@
+from airflow import DAG
+from airflow.operators.python import PythonOperator
+from datetime import datetime, timedelta
+import os
+
+from pipeline.config import OUTPUT_FORMAT, TARGET_REGION_NAME
+from pipeline.metrics import instrumented
+
+
+
+# 백필 범위 (유형은 쉼표로 구분)
+BACKFILL_TYPES = os.getenv("BACKFILL_TYPES", "officetel,townhouse").split(",")
+BACKFILL_START_YEAR = int(os.getenv("BACKFILL_START_YEAR", "2022"))
+BACKFILL_END_YEAR = int(os.getenv("BACKFILL_END_YEAR", "2025"))
+
+# 체크포인트 / 사용량 장부가 실행 사이에 남아 있어야 하므로 볼륨에 저장
+BACKFILL_STATE_DIR = os.getenv("BACKFILL_DIR", "/opt/airflow/backfill")
+
+
+
+def backfill_today(**context):
+    """오늘 남은 API 한도만큼 백필을 이어서 진행합니다."""
+    # aiohttp / pandas 는 Task 실행 때만 import (DAG 파싱 시간)
+    from pipeline.backfill import run_backfill
+
+    remaining = run_backfill(BACKFILL_TYPES, BACKFILL_START_YEAR, BACKFILL_END_YEAR,
+                             state_dir=BACKFILL_STATE_DIR, output_format=OUTPUT_FORMAT)
+    print(f"남은 수집 단위: {remaining}")
+    return remaining
+
+
+
+default_args = {
+    'owner': 'yejin',
+    'retries': 0, # 한도 초과로 멈춘 날은 재시도해도 소용없음. 다음 날 실행에서 이어감
+}
+
+with DAG(
+    dag_id='rent_backfill',
+    default_args=default_args,
+    description=f'{TARGET_REGION_NAME} 전월세 과거 데이터 일일 한도 백필',
+    schedule_interval='10 15 * * *', # 매일 00:10 (KST) = 15:10 (UTC), 한도 초기화 직후
+    start_date=datetime(2026, 1, 1),
+    catchup=False,
+    max_active_runs=1, # 장부/체크포인트를 동시에 쓰지 않도록 한 번에 하나만
+    tags=['real_estate', 'backfill']
+) as dag:
+
+    t1 = PythonOperator(
+        task_id='backfill_today',
+        python_callable=instrumented(backfill_today),
+        pool='rtms_api',
+        execution_timeout=timedelta(hours=6),
+    )
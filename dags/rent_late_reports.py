@@ -0,0 +1,178 @@
+from airflow import DAG
+from airflow.operators.python import PythonOperator
+from datetime import datetime, timedelta
+from dateutil.relativedelta import relativedelta
+import os
+import shutil
+
+# 무거운 의존성을 쓰는 pipeline 모듈은 Task 함수 안에서 import (DAG 파싱 시간, auto_rent_pipeline 참고)
+from pipeline.config import API_CONCURRENCY, API_RATE_LIMIT, TARGET_DISTRICTS, TARGET_REGION_NAME
+from pipeline.metrics import instrumented
+
+
+
+SERVICE_KEY = os.getenv("API_SERVICE_KEY", "your-api-service-key")
+PROJECT_ID = os.getenv("GCP_PROJECT_ID", "your-gcp-project-id")
+KEY_FILE_NAME = os.getenv("KEY_FILE_NAME", "key.json")
+BUCKET_NAME = os.getenv("GCS_BUCKET_NAME", "your-gcs-bucket-name")
+
+# GCP 설정
+DATASET_ID = "real_estate_data"
+TABLE_ID = "raw_rent_transactions"
+ROLLUP_TABLE_ID = "rent_market_rollup"
+
+KEY_PATH = f"/opt/airflow/keys/{KEY_FILE_NAME}"
+
+STAGING_DIR = os.getenv("RENT_STAGING_DIR", "/tmp")
+# 직전 수집 스냅샷 (실행 사이에 남아 있어야 하므로 볼륨에 저장)
+SNAPSHOT_DIR = os.getenv("RENT_SNAPSHOT_DIR", "/opt/airflow/snapshots")
+
+# 지난 달부터 거슬러 올라가며 다시 받을 개월 수 (신고 기한 30일 + 여유)
+RECOLLECT_MONTHS = int(os.getenv("RECOLLECT_MONTHS", "3"))
+
+API_POOL = os.getenv("RTMS_API_POOL", "rtms_api")
+API_POOL_SLOTS = int(os.getenv("RTMS_API_POOL_SLOTS", "4"))
+SHARD_RATE_LIMIT = API_RATE_LIMIT / API_POOL_SLOTS
+
+
+SHARDS = [
+    {"target_type": target_type, "lawd_cd": code, "district_name": district_name}
+    for target_type in ["officetel", "townhouse"]
+    for code, district_name in TARGET_DISTRICTS.items()
+]
+
+
+
+def get_window(context):
+    """실행 날짜 기준 지난 달부터 RECOLLECT_MONTHS 개월 (예: 2025-02-10, 3 -> 202501, 202412, 202411)"""
+    return [(context['logical_date'] - relativedelta(months=i)).strftime("%Y%m")
+            for i in range(1, RECOLLECT_MONTHS + 1)]
+
+def get_run_dir(context):
+    return f"{STAGING_DIR}/late_reports_{context['ds_nodash']}"
+
+def fetch_delta_shard(target_type, lawd_cd, district_name, **context):
+    """(유형, 구) 샤드의 최근 몇 달을 다시 받아서 직전 스냅샷과 달라진 행만 파일로 저장합니다."""
+    from pipeline.collector import build_units, collect
+    from pipeline.delta import SnapshotStore, shard_delta
+    from pipeline.validate import validate_frame, write_quarantine
+
+    months = get_window(context)
+    run_dir = get_run_dir(context)
+    print(f"재수집 대상: {months} {target_type} {district_name}")
+
+    # 늦게 들어온 신고를 받아야 하므로 응답 캐시는 쓰지 않음
+    units = build_units([target_type], months, {lawd_cd: district_name})
+    rows = collect(units, concurrency=API_CONCURRENCY, rate=SHARD_RATE_LIMIT, service_key=SERVICE_KEY,
+                   strict=True)
+
+    # 검증에 걸린 행은 delta 에 넣지 않고 격리 파일로 (실행 디렉터리와 달리 반영 후에도 남김)
+    df, rejected = validate_frame(rows.to_pandas())
+    write_quarantine(rejected, f"{STAGING_DIR}/late_reports_quarantine_{context['ds_nodash']}/{target_type}_{lawd_cd}.csv")
+
+    delta = shard_delta(df, target_type, lawd_cd, months,
+                        store=SnapshotStore(SNAPSHOT_DIR), pending=SnapshotStore(f"{run_dir}/snapshots"))
+    delta_path = f"{run_dir}/shards/{target_type}_{lawd_cd}.csv"
+    if not len(delta):
+        if os.path.exists(delta_path):
+            os.remove(delta_path)
+        return None
+
+    os.makedirs(os.path.dirname(delta_path), exist_ok=True)
+    delta.to_csv(delta_path, index=False, encoding='utf-8')
+    return delta_path
+
+def reduce_delta(**context):
+    """샤드 delta 를 파일 하나로 합침 (변경분이 없으면 None)"""
+    from pipeline.delta import DELTA_COLUMNS
+
+    shard_paths = [path for path in context['task_instance'].xcom_pull(task_ids='fetch_delta_task') if path]
+    if not shard_paths:
+        print("지연 신고/정정된 거래가 없습니다.")
+        return None
+
+    save_path = f"{get_run_dir(context)}/delta.csv"
+    with open(save_path, "w", newline="", encoding="utf-8-sig") as out:
+        out.write(",".join(DELTA_COLUMNS) + "\n")
+        for path in sorted(shard_paths):
+            with open(path, newline="", encoding="utf-8") as shard:
+                shard.readline()
+                shutil.copyfileobj(shard, out)
+    print(f"delta 병합 완료: {save_path}")
+    return save_path
+
+def upload_delta(**context):
+    """delta 파일만 GCS 에 업로드"""
+    from pipeline.gcs import GcsUploader, storage_client
+
+    delta_path = context['task_instance'].xcom_pull(task_ids='reduce_delta_task')
+    if not delta_path:
+        return None
+
+    destination_blob_name = f"raw/delta/{context['ds_nodash']}/delta.csv"
+    bucket = storage_client(KEY_PATH).bucket(BUCKET_NAME)
+    GcsUploader(bucket).upload_many([(delta_path, destination_blob_name)])
+    return f"gs://{BUCKET_NAME}/{destination_blob_name}"
+
+def merge_delta(**context):
+    """delta 를 원본 테이블에 MERGE 하고 바뀐 계약월의 가공 / 집계 테이블 파티션만 갱신"""
+    from pipeline.bq import apply_delta, bigquery_client, refresh_market_view, refresh_rollup
+    from pipeline.delta import SnapshotStore
+
+    gcs_uri = context['task_instance'].xcom_pull(task_ids='upload_delta_task')
+    if gcs_uri:
+        client = bigquery_client(KEY_PATH)
+        source_table = f"{PROJECT_ID}.{DATASET_ID}.{TABLE_ID}"
+        months = apply_delta(client, gcs_uri, source_table, staging_suffix=f"delta_{context['ds_nodash']}")
+        if months:
+            refresh_market_view(client, source_table, f"{PROJECT_ID}.{DATASET_ID}.rent_market_view", months)
+            refresh_rollup(client, source_table, f"{PROJECT_ID}.{DATASET_ID}.{ROLLUP_TABLE_ID}", months)
+
+    # 반영이 끝난 뒤에만 새 스냅샷으로 교체 (실패하면 다음 실행에서 같은 delta 가 다시 나옴)
+    run_dir = get_run_dir(context)
+    moved = SnapshotStore(SNAPSHOT_DIR).promote(SnapshotStore(f"{run_dir}/snapshots"))
+    print(f"스냅샷 갱신: {moved}개")
+    shutil.rmtree(run_dir, ignore_errors=True)
+
+
+
+default_args = {
+    'owner': 'yejin',
+    'retries': 1,
+    'retry_delay': timedelta(minutes=5),
+}
+
+with DAG(
+    dag_id='rent_late_reports',
+    default_args=default_args,
+    description=f'{TARGET_REGION_NAME} 전월세 최근 몇 달 지연 신고분 재수집 (변경분만 반영)',
+    schedule_interval='0 18 * * *', # 매일 03:00 (KST)
+    start_date=datetime(2026, 1, 1),
+    catchup=False,
+    max_active_runs=1, # 스냅샷을 동시에 고치지 않도록 한 번에 하나만
+    tags=['real_estate', 'etl']
+) as dag:
+
+    t1 = PythonOperator.partial(
+        task_id='fetch_delta_task',
+        python_callable=instrumented(fetch_delta_shard),
+        pool=API_POOL,
+    ).expand(op_kwargs=SHARDS)
+
+    t2 = PythonOperator(
+        task_id='reduce_delta_task',
+        python_callable=instrumented(reduce_delta),
+    )
+
+    t3 = PythonOperator(
+        task_id='upload_delta_task',
+        python_callable=instrumented(upload_delta),
+    )
+
+    t4 = PythonOperator(
+        task_id='merge_delta_task',
+        python_callable=instrumented(merge_delta),
+    )
+
+    # 실행 순서
+    t1 >> t2 >> t3 >> t4
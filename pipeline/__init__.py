@@ -0,0 +1 @@
+"""batch_collector.py 와 dags/auto_rent_pipeline.py 가 함께 쓰는 수집/적재 모듈"""
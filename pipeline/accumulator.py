@@ -0,0 +1,103 @@
+"""행 dict 목록 대신 쓰는 컬럼 단위 누적 버퍼
+
+행 하나를 13개 키 dict 로 계속 들고 있지 않고, 들어오는 즉시 컬럼별로 나눠 담는다.
+- 숫자 컬럼: array('q') / array('d') + null 여부
+- 문자열 컬럼: 값 사전(한 번만 보관) + int32 코드 배열
+pandas / pyarrow 로 넘길 때도 dict 목록을 거치지 않고 버퍼에서 바로 만든다.
+"""
+from array import array
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from pipeline.config import COLUMNS
+from pipeline.output import DICTIONARY_COLUMNS, FLOAT_COLUMNS, INTEGER_COLUMNS, PARQUET_SCHEMA
+
+
+class StringColumn:
+
+    def __init__(self):
+        self.values = []
+        self.index = {}
+        self.codes = array('i')
+
+    def append(self, value):
+        code = self.index.get(value)
+        if code is None:
+            code = self.index[value] = len(self.values)
+            self.values.append(value)
+        self.codes.append(code)
+
+    def to_arrow(self, dictionary):
+        codes = pa.array(np.frombuffer(self.codes, dtype=np.int32), type=pa.int32())
+        values = pa.array(self.values, type=pa.string())
+        if dictionary:
+            return pa.DictionaryArray.from_arrays(codes, values)
+        return values.take(codes)
+
+
+class NumberColumn:
+
+    def __init__(self, typecode, convert):
+        self.data = array(typecode)
+        self.valid = bytearray()
+        self.convert = convert
+
+    def append(self, value):
+        try:
+            self.data.append(self.convert(value))
+            self.valid.append(1)
+        except (TypeError, ValueError):
+            # 숫자가 아닌 값은 null (Parquet 출력의 to_typed_frame 과 동일)
+            self.data.append(0)
+            self.valid.append(0)
+
+    def to_arrow(self, arrow_type):
+        dtype = np.int64 if arrow_type == pa.int64() else np.float64
+        data = np.frombuffer(self.data, dtype=dtype)
+        mask = np.frombuffer(self.valid, dtype=np.uint8) == 0
+        return pa.array(data, type=arrow_type, mask=mask if mask.any() else None)
+
+
+class RowAccumulator:
+    """수집 행을 컬럼 단위로 모은다. append/extend 는 parser 가 만든 행 dict 를 받는다."""
+
+    def __init__(self):
+        self.columns = {}
+        for column in COLUMNS:
+            if column in INTEGER_COLUMNS:
+                self.columns[column] = NumberColumn('q', int)
+            elif column in FLOAT_COLUMNS:
+                self.columns[column] = NumberColumn('d', float)
+            else:
+                self.columns[column] = StringColumn()
+        self._appenders = [(column, self.columns[column].append) for column in COLUMNS]
+        self._length = 0
+
+    def __len__(self):
+        return self._length
+
+    def append(self, row):
+        for column, append in self._appenders:
+            append(row[column])
+        self._length += 1
+
+    def extend(self, rows):
+        for row in rows:
+            self.append(row)
+
+    def to_arrow(self):
+        """PARQUET_SCHEMA 타입의 pyarrow Table (district_name/dong/name 은 dictionary)"""
+        arrays = []
+        for field in PARQUET_SCHEMA:
+            column = self.columns[field.name]
+            if isinstance(column, StringColumn):
+                arrays.append(column.to_arrow(field.name in DICTIONARY_COLUMNS))
+            else:
+                arrays.append(column.to_arrow(field.type))
+        return pa.Table.from_arrays(arrays, schema=PARQUET_SCHEMA)
+
+    def to_pandas(self):
+        """정수 컬럼은 nullable Int64, dictionary 컬럼은 category 로 변환"""
+        return self.to_arrow().to_pandas(types_mapper={pa.int64(): pd.Int64Dtype()}.get)
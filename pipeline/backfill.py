@@ -0,0 +1,196 @@
+"""일일 요청 한도를 고려한 여러 날짜 백필
+
+data.go.kr 개발계정 키는 API(엔드포인트)마다 하루 요청 수 한도가 있다.
+(유형 x 구 x 월) 범위를 수집 단위로 나누고 최근 월부터 순서를 정한 뒤,
+매일 실행될 때마다 그날 남은 한도만큼만 요청한다.
+
+- 완료 단위: 유형별 CheckpointStore manifest (실패한 단위는 다음 실행에서 다시 시도)
+- 사용량: quota_ledger.json 에 (날짜, 엔드포인트) 별 실제 API 호출 수를 누적
+- 한도 초과 코드(22)를 받거나 장부상 남은 한도가 0 이 되면 그날은 새 단위를 더 보내지 않음
+  (단위 하나가 여러 페이지 / 재시도로 요청을 더 쓰므로 남은 한도보다 적은 단위만 한 번에 보냄)
+- 모든 단위가 끝나면 결과 파일을 한 번만 만들고 finalized.json 에 기록 (이후 실행은 바로 종료)
+
+    python -m pipeline.backfill townhouse 2022 2025
+"""
+import asyncio
+import json
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+from pipeline.accumulator import RowAccumulator
+from pipeline.cache import ResponseCache
+from pipeline.checkpoint import CheckpointStore
+from pipeline.collector import CollectStats, build_units, iter_collect, months_between, report_failures
+from pipeline.config import API_CONCURRENCY, API_RATE_LIMIT, SERVICE_KEY, TARGET_DISTRICTS
+from pipeline.output import write_parquet_partitions
+from pipeline.validate import validate_csv, validate_frame, write_quarantine
+
+
+BACKFILL_DIR = os.getenv("BACKFILL_DIR", "backfill")
+DAILY_QUOTA = int(os.getenv("API_DAILY_QUOTA", "1000"))
+# 페이지가 여러 장인 단위 때문에 한도를 살짝 넘지 않도록 남겨 두는 비율
+QUOTA_RESERVE = 0.02
+# 요청 수를 아끼기 위해 백필은 한 번에 최대한 많은 행을 받는다
+BACKFILL_PAGE_SIZE = 9999
+# 남은 한도로 한 번에 보낼 단위 수를 정할 때 단위 하나에 잡는 요청 수 (추가 페이지 / 재시도 여유)
+UNIT_REQUEST_ESTIMATE = 2
+# 이 단위 수만큼 끝날 때마다 사용량을 기록하고 남은 한도를 확인
+BUDGET_CHUNK_UNITS = API_CONCURRENCY
+
+# 한도는 한국 시간 자정에 초기화
+KST = timezone(timedelta(hours=9))
+
+
+def today_kst():
+    return datetime.now(KST).strftime("%Y-%m-%d")
+
+
+def plan_units(target_types, months, districts):
+    """최근 월부터 수집하도록 정렬한 수집 단위 목록"""
+    return build_units(target_types, sorted(months, reverse=True), districts)
+
+
+class QuotaLedger:
+    """날짜/엔드포인트별 API 호출 수를 파일에 누적하는 장부"""
+
+    def __init__(self, path, daily_quota=DAILY_QUOTA):
+        self.path = path
+        self.daily_quota = daily_quota
+        self.usage = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.usage = json.load(f)
+
+    def spent(self, endpoint, day=None):
+        return self.usage.get(day or today_kst(), {}).get(endpoint, 0)
+
+    def remaining(self, endpoint, day=None):
+        budget = int(self.daily_quota * (1 - QUOTA_RESERVE))
+        return max(0, budget - self.spent(endpoint, day))
+
+    def record(self, endpoint, count, day=None):
+        if not count:
+            return
+        daily = self.usage.setdefault(day or today_kst(), {})
+        daily[endpoint] = daily.get(endpoint, 0) + count
+        self.save()
+
+    def mark_exhausted(self, endpoint, day=None):
+        """API 가 한도 초과를 알려 왔으면 장부 숫자와 상관없이 그날은 소진"""
+        daily = self.usage.setdefault(day or today_kst(), {})
+        daily[endpoint] = max(daily.get(endpoint, 0), self.daily_quota)
+        self.save()
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.usage, f, ensure_ascii=False, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+
+async def run_budget(units, store, ledger, target_type, stats, cache, service_key):
+    """units 를 BUDGET_CHUNK_UNITS 개씩 수집하면서 세그먼트와 사용량을 기록한다.
+
+    장부상 남은 한도가 0 이 되거나 한도 초과 응답을 받으면 나머지 단위는 보내지 않는다.
+    """
+    recorded = 0
+    batches = iter_collect(units, concurrency=API_CONCURRENCY, rate=API_RATE_LIMIT,
+                           chunk_size=BUDGET_CHUNK_UNITS, service_key=service_key, cache=cache,
+                           page_size=BACKFILL_PAGE_SIZE, stats=stats)
+    try:
+        async for completed, rows in batches:
+            store.write_segment(completed, rows)
+            ledger.record(target_type, stats.requests[target_type] - recorded)
+            recorded = stats.requests[target_type]
+            if ledger.remaining(target_type) <= 0 or target_type in stats.quota_exceeded:
+                break
+    finally:
+        await batches.aclose()
+
+
+def finalize(store, target_type, state_dir, output_format):
+    """모든 단위가 끝난 유형의 결과 파일을 한 번만 생성 (finalized.json 이 있으면 건너뜀)"""
+    state_path = os.path.join(store.directory, "finalized.json")
+    state = {"output_format": output_format, "segments": len(store.entries), "rows": store.row_count}
+    if os.path.exists(state_path):
+        with open(state_path, encoding="utf-8") as f:
+            done = json.load(f)
+        if {key: done.get(key) for key in state} == state:
+            print(f"[{target_type}] 백필 결과 파일이 이미 만들어져 있음 ({done['finished_at']})")
+            return False
+
+    quarantine_path = os.path.join(state_dir, "quarantine", f"{target_type}_data.csv")
+    if output_format == "parquet":
+        accumulator = RowAccumulator()
+        accumulator.extend(store.iter_rows())
+        df, rejected = validate_frame(accumulator.to_pandas())
+        write_quarantine(rejected, quarantine_path)
+        write_parquet_partitions(df, os.path.join(state_dir, "parquet"))
+    else:
+        file_name = os.path.join(state_dir, f"{target_type}_data.csv")
+        store.merge(file_name)
+        total, _ = validate_csv(file_name, quarantine_path)
+        print(f"[{target_type}] 백필 완료! {file_name} 저장됨. (총 {total}건)")
+
+    state["finished_at"] = datetime.now(KST).isoformat(timespec="seconds")
+    tmp_path = state_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, state_path)
+    return True
+
+
+def run_backfill(target_types, start_year, end_year, state_dir=BACKFILL_DIR, daily_quota=DAILY_QUOTA,
+                 districts=TARGET_DISTRICTS, service_key=SERVICE_KEY, output_format="csv"):
+    """오늘 남은 한도만큼 백필을 진행하고 유형별 남은 단위 수를 돌려준다.
+
+    매일 한 번씩 (Airflow 의 rent_backfill DAG 등으로) 호출하면 이어서 진행된다.
+    """
+    ledger = QuotaLedger(os.path.join(state_dir, "quota_ledger.json"), daily_quota)
+    cache = ResponseCache()
+    months = months_between(start_year, end_year)
+    remaining_units = {}
+
+    for target_type in target_types:
+        store = CheckpointStore(os.path.join(state_dir, f"{target_type}_{start_year}_{end_year}"))
+        planned = plan_units([target_type], months, districts)
+        pending = [unit for unit in planned if (unit.type, unit.lawd_cd, unit.deal_ymd) not in store.completed()]
+        print(f"[{target_type}] 남은 단위 {len(pending)}/{len(planned)}개, "
+              f"오늘 남은 한도 {ledger.remaining(target_type)}회")
+
+        while pending and ledger.remaining(target_type) > 0:
+            # 단위 하나가 페이지 / 재시도로 요청을 더 쓸 수 있으므로 남은 한도보다 적게 보냄
+            # (run_budget 이 묶음마다 장부를 보고 한도가 바닥나면 멈춤)
+            batch = pending[:max(1, ledger.remaining(target_type) // UNIT_REQUEST_ESTIMATE)]
+            stats = CollectStats()
+            asyncio.run(run_budget(batch, store, ledger, target_type, stats, cache, service_key))
+            report_failures(stats, os.path.join(store.directory, "failed_units.json"))
+
+            if target_type in stats.quota_exceeded:
+                print(f"[{target_type}] API 일일 한도 초과 응답 - 오늘은 여기까지")
+                ledger.mark_exhausted(target_type)
+            done = store.completed()
+            still_pending = [unit for unit in pending if (unit.type, unit.lawd_cd, unit.deal_ymd) not in done]
+            if len(still_pending) == len(pending):
+                # 한도 외 오류로 진전이 없으면 다음 실행에서 다시 시도
+                print(f"[{target_type}] 진행된 단위 없음 - 다음 실행에서 다시 시도")
+                pending = still_pending
+                break
+            pending = still_pending
+
+        remaining_units[target_type] = len(pending)
+        if pending:
+            # 단위마다 UNIT_REQUEST_ESTIMATE 회로 잡아서 남은 요청 수 / 하루 쓸 수 있는 요청 수
+            days = -(-len(pending) * UNIT_REQUEST_ESTIMATE // max(1, int(daily_quota * (1 - QUOTA_RESERVE))))
+            print(f"[{target_type}] 남은 단위 {len(pending)}개 (약 {days}일 더 필요)")
+        elif store.entries:
+            finalize(store, target_type, state_dir, output_format)
+
+    return remaining_units
+
+
+if __name__ == "__main__":
+    # 예: python -m pipeline.backfill townhouse 2022 2025
+    run_backfill(sys.argv[1].split(","), int(sys.argv[2]), int(sys.argv[3]))
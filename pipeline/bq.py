@@ -0,0 +1,445 @@
+"""BigQuery 원본 테이블 적재 / 가공 테이블 갱신 (월 파티션 단위 교체)
+
+raw_rent_transactions 는 deal_month(DATE, 계약월 1일) 월 파티션 + district_code/type 클러스터링.
+적재는 항상 아래 순서라서 재시도/재실행해도 중복되지 않는다.
+
+1. GCS 파일을 임시 staging 테이블에 WRITE_TRUNCATE 로 적재
+2. staging 에 들어 있는 계약월마다 `table$YYYYMM` 파티션을 쿼리 결과로 WRITE_TRUNCATE
+   (같은 달의 다른 유형 행은 그대로 두고, 이번에 적재한 유형만 교체)
+3. staging 삭제 (실패해도 하루 뒤 만료)
+
+파티션 하나의 교체는 작업 하나라서 원자적이고, 하위 쿼리는 deal_month 조건으로
+해당 월 파티션만 읽는다. rent_market_view 도 같은 방식으로 적재된 계약월만 다시 계산한다.
+
+로컬 확인: BIGQUERY_EMULATOR_HOST=http://localhost:9050 (bigquery-emulator) 이면
+bigquery_client() 가 인증 없이 에뮬레이터에 붙는다.
+"""
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+
+from google.api_core.client_options import ClientOptions
+from google.api_core.exceptions import NotFound
+from google.auth.credentials import AnonymousCredentials
+from google.cloud import bigquery
+
+from pipeline.config import NATURAL_KEY, ROLLUP_KEY, ROLLUP_QUANTILES
+from pipeline.metrics import METRICS
+
+
+# 수집 파일(CSV 헤더 / Parquet 컬럼)과 순서/타입이 같은 적재 스키마
+LOAD_SCHEMA = [
+    bigquery.SchemaField("year_month", "STRING"),      # 계약년월 (예: 202401)
+    bigquery.SchemaField("district_code", "STRING"),   # 구코드
+    bigquery.SchemaField("district_name", "STRING"),   # 구이름
+    bigquery.SchemaField("dong", "STRING"),            # 법정동
+    bigquery.SchemaField("jibun", "STRING"),           # 지번
+    bigquery.SchemaField("name", "STRING"),            # 건물명 (단지명/연립명)
+    bigquery.SchemaField("floor", "INTEGER"),          # 층
+    bigquery.SchemaField("area", "FLOAT"),             # 전용면적
+    bigquery.SchemaField("deposit", "INTEGER"),        # 보증금 (만원)
+    bigquery.SchemaField("monthly_rent", "INTEGER"),   # 월세 (만원)
+    bigquery.SchemaField("build_year", "INTEGER"),     # 건축년도
+    bigquery.SchemaField("deal_day", "STRING"),        # 계약일
+    bigquery.SchemaField("type", "STRING"),            # 구분 (officetel / townhouse)
+]
+
+PARTITION_FIELD = "deal_month"
+CLUSTER_FIELDS = ["district_code", "type"]
+
+# 원본 테이블 = 적재 스키마 + 파티션 컬럼
+RAW_SCHEMA = LOAD_SCHEMA + [bigquery.SchemaField(PARTITION_FIELD, "DATE")]  # 계약월 1일
+
+STAGING_EXPIRATION = timedelta(days=1)
+
+LOAD_COLUMNS = ", ".join(field.name for field in LOAD_SCHEMA)
+
+# delta 반영에서 같은 거래로 보는 키 (계약월 + 유형 + 자연 키)
+DELTA_KEY = ["year_month", "type"] + NATURAL_KEY
+SQL_TYPES = {"STRING": "STRING", "INTEGER": "INT64", "FLOAT": "FLOAT64"}
+
+
+@lru_cache(maxsize=None)
+def bigquery_client(key_path):
+    """서비스 계정 키로 만든 클라이언트 (BIGQUERY_EMULATOR_HOST 가 있으면 에뮬레이터용 익명 클라이언트)
+
+    storage_client 와 같이 프로세스 안에서 key_path 별로 재사용.
+    """
+    emulator_host = os.getenv("BIGQUERY_EMULATOR_HOST")
+    if emulator_host:
+        return bigquery.Client(
+            project=os.getenv("GCP_PROJECT_ID", "local"),
+            credentials=AnonymousCredentials(),
+            client_options=ClientOptions(api_endpoint=emulator_host),
+        )
+    return bigquery.Client.from_service_account_json(key_path)
+
+
+def run_job(job, kind):
+    """작업이 끝날 때까지 기다리며 소요 시간 / 처리 바이트를 기록하고 작업을 돌려준다."""
+    started = time.perf_counter()
+    try:
+        job.result()
+    except Exception:
+        METRICS.inc("bq_jobs_total", kind=kind, status="error")
+        raise
+    METRICS.inc("bq_jobs_total", kind=kind, status="ok")
+    METRICS.observe("bq_job_seconds", time.perf_counter() - started, kind=kind)
+    processed = getattr(job, "total_bytes_processed", None)
+    if isinstance(processed, int):
+        METRICS.inc("bq_bytes_processed_total", processed, kind=kind)
+    return job
+
+
+def raw_table_definition(table_ref):
+    table = bigquery.Table(table_ref, schema=RAW_SCHEMA)
+    table.time_partitioning = bigquery.TimePartitioning(
+        type_=bigquery.TimePartitioningType.MONTH, field=PARTITION_FIELD
+    )
+    table.clustering_fields = CLUSTER_FIELDS
+    return table
+
+
+def migrate_raw_table(client, table_ref):
+    """예전 비파티션 원본 테이블을 파티션 테이블로 한 번 옮긴다.
+
+    파티션 사양이 다른 테이블은 CREATE OR REPLACE 로 바꿀 수 없어서
+    임시 테이블로 복사 -> 원본 삭제 -> 다시 복사 순서로 진행한다.
+    """
+    tmp_ref = f"{table_ref}__migrating"
+    print(f"비파티션 테이블 변환 시작: {table_ref}")
+    client.query(f"""
+        CREATE OR REPLACE TABLE `{tmp_ref}`
+        PARTITION BY {PARTITION_FIELD}
+        CLUSTER BY {", ".join(CLUSTER_FIELDS)}
+        AS SELECT {LOAD_COLUMNS}, PARSE_DATE('%Y%m', year_month) AS {PARTITION_FIELD}
+        FROM `{table_ref}`
+    """).result()
+    client.delete_table(table_ref)
+    client.copy_table(tmp_ref, table_ref).result()
+    client.delete_table(tmp_ref)
+    print(f"파티션 테이블로 변환 완료: {table_ref}")
+
+
+def ensure_raw_table(client, table_ref):
+    """월 파티션/클러스터링 원본 테이블이 없으면 만들고, 예전 형식이면 변환"""
+    try:
+        table = client.get_table(table_ref)
+    except NotFound:
+        client.create_table(raw_table_definition(table_ref))
+        print(f"원본 테이블 생성: {table_ref} (월 파티션 {PARTITION_FIELD}, 클러스터 {CLUSTER_FIELDS})")
+        return
+    if table.time_partitioning is None or table.time_partitioning.field != PARTITION_FIELD:
+        migrate_raw_table(client, table_ref)
+
+
+def load_staging(client, uris, staging_ref, source_format):
+    """GCS 파일을 staging 테이블에 통째로 적재 (재시도해도 같은 결과)"""
+    if source_format == "PARQUET":
+        job_config = bigquery.LoadJobConfig(
+            schema=LOAD_SCHEMA,
+            source_format=bigquery.SourceFormat.PARQUET,
+            write_disposition="WRITE_TRUNCATE",
+        )
+    else:
+        job_config = bigquery.LoadJobConfig(
+            schema=LOAD_SCHEMA,  # 자동 감지(autodetect) 대신 이 스키마를 사용
+            source_format=bigquery.SourceFormat.CSV,
+            skip_leading_rows=1,  # CSV 헤더(첫 줄) 건너뛰기
+            write_disposition="WRITE_TRUNCATE",
+        )
+    run_job(client.load_table_from_uri(uris, staging_ref, job_config=job_config), "load")
+    # 정리 단계에서 죽어도 staging 이 쌓이지 않게 만료 시간 지정
+    staging = client.get_table(staging_ref)
+    staging.expires = datetime.now(timezone.utc) + STAGING_EXPIRATION
+    client.update_table(staging, ["expires"])
+
+
+def replace_partition(client, table_ref, staging_ref, year_month, types):
+    """table$YYYYMM 파티션을 (staging 의 그 달 행 + 기존 행 중 다른 유형) 으로 원자적 교체"""
+    deal_month = datetime.strptime(year_month, "%Y%m").date()
+    query = f"""
+    SELECT {LOAD_COLUMNS}, PARSE_DATE('%Y%m', year_month) AS {PARTITION_FIELD}
+    FROM `{staging_ref}`
+    WHERE year_month = @year_month
+
+    UNION ALL
+
+    SELECT {LOAD_COLUMNS}, {PARTITION_FIELD}
+    FROM `{table_ref}`
+    WHERE {PARTITION_FIELD} = @deal_month AND type NOT IN UNNEST(@types)
+    """
+    job_config = bigquery.QueryJobConfig(
+        destination=f"{table_ref}${year_month}",
+        write_disposition="WRITE_TRUNCATE",
+        query_parameters=[
+            bigquery.ScalarQueryParameter("year_month", "STRING", year_month),
+            bigquery.ScalarQueryParameter("deal_month", "DATE", deal_month),
+            bigquery.ArrayQueryParameter("types", "STRING", types),
+        ],
+    )
+    run_job(client.query(query, job_config=job_config), "replace_partition")
+
+
+def replace_months(client, uris, table_ref, source_format="CSV", staging_suffix="staging"):
+    """GCS 파일에 들어 있는 계약월 파티션만 교체하고 {계약월: [유형]} 을 돌려준다."""
+    ensure_raw_table(client, table_ref)
+    staging_ref = f"{table_ref}__{staging_suffix}"
+    try:
+        load_staging(client, uris, staging_ref, source_format)
+        found = client.query(
+            f"SELECT year_month, ARRAY_AGG(DISTINCT type ORDER BY type) AS types "
+            f"FROM `{staging_ref}` GROUP BY year_month ORDER BY year_month"
+        ).result()
+        months = {row["year_month"]: list(row["types"]) for row in found}
+        for year_month, types in months.items():
+            replace_partition(client, table_ref, staging_ref, year_month, types)
+            print(f"파티션 교체 완료: {table_ref}${year_month} ({', '.join(types)})")
+    finally:
+        client.delete_table(staging_ref, not_found_ok=True)
+    return months
+
+
+# rent_market_view: 원본을 보기 좋게 가공한 테이블. deal_date(계약월 1일) 월 파티션이라
+# 이번에 적재한 계약월 파티션만 다시 계산한다.
+MARKET_VIEW_PARTITION_FIELD = "deal_date"
+MARKET_VIEW_CLUSTER_FIELDS = ["district_name", "dong"]
+
+MARKET_VIEW_SELECT = """
+    SELECT
+        district_name,
+        dong,
+        name AS building_name,
+        build_year,
+        floor,
+        
+        -- 날짜 분해
+        PARSE_DATE('%Y%m', year_month) AS deal_date,
+        EXTRACT(YEAR FROM PARSE_DATE('%Y%m', year_month)) AS deal_year,
+        EXTRACT(MONTH FROM PARSE_DATE('%Y%m', year_month)) AS deal_month,
+
+        -- 면적 계산
+        area AS area_m2,
+        ROUND(area / 3.3058, 1) AS area_pyung, -- 평수
+
+        -- 금액 변환
+        deposit,
+        monthly_rent,
+
+        -- 보기 좋은 문자열
+        CASE 
+            WHEN deposit >= 10000 THEN 
+                CONCAT(CAST(FLOOR(deposit / 10000) AS STRING), '억 ', 
+                       IF(MOD(deposit, 10000) > 0, CONCAT(CAST(MOD(deposit, 10000) AS STRING), '만원'), ''))
+            ELSE CONCAT(CAST(deposit AS STRING), '만원')
+        END AS deposit_korean,
+
+        -- 전세 평단가
+        ROUND(deposit / (area / 3.3058), 0) AS deposit_per_pyung,
+        
+        -- 월세 평단가
+        CASE
+            WHEN monthly_rent > 0 THEN ROUND(monthly_rent / (area / 3.3058), 0)
+            ELSE 0
+        END AS rent_per_pyung,
+
+        IF(monthly_rent = 0, 'Jeonse', 'Monthly') AS rent_type
+
+    FROM `{source_table}`
+"""
+
+
+def ensure_market_view(client, source_ref, view_ref):
+    """파티션된 rent_market_view 가 없으면 전체 이력으로 한 번 만든다.
+
+    예전처럼 파티션 없이 만들어진 테이블은 원본에서 다시 만들 수 있으므로 지우고 새로 만든다.
+    """
+    try:
+        table = client.get_table(view_ref)
+        if table.time_partitioning is not None and table.time_partitioning.field == MARKET_VIEW_PARTITION_FIELD:
+            return False
+        client.delete_table(view_ref)
+    except NotFound:
+        pass
+    client.query(f"""
+    CREATE TABLE `{view_ref}`
+    PARTITION BY DATE_TRUNC({MARKET_VIEW_PARTITION_FIELD}, MONTH)
+    CLUSTER BY {", ".join(MARKET_VIEW_CLUSTER_FIELDS)}
+    AS {MARKET_VIEW_SELECT.format(source_table=source_ref)}
+    """).result()
+    print(f"가공 테이블 전체 생성: {view_ref}")
+    return True
+
+
+def refresh_partitions(client, select, target_ref, months, kind):
+    """select (WHERE 자리에 {where} 가 있는 쿼리) 로 target_ref 의 months 파티션만 하나씩 교체"""
+    for year_month in sorted(months):
+        job_config = bigquery.QueryJobConfig(
+            destination=f"{target_ref}${year_month}",
+            write_disposition="WRITE_TRUNCATE",
+            query_parameters=[
+                bigquery.ScalarQueryParameter("deal_month", "DATE", datetime.strptime(year_month, "%Y%m").date()),
+            ],
+        )
+        # 원본도 deal_month 파티션이라 해당 월 파티션만 읽음
+        query = select.format(where=f"WHERE {PARTITION_FIELD} = @deal_month")
+        run_job(client.query(query, job_config=job_config), kind)
+        print(f"파티션 갱신: {target_ref}${year_month}")
+
+
+def refresh_market_view(client, source_ref, view_ref, months):
+    """months (YYYYMM 목록) 의 가공 테이블 파티션만 원본 해당 월 파티션에서 다시 계산"""
+    if ensure_market_view(client, source_ref, view_ref):
+        return
+    select = MARKET_VIEW_SELECT.format(source_table=source_ref) + "    {where}\n"
+    refresh_partitions(client, select, view_ref, months, "market_view")
+
+
+# rent_market_rollup: 대시보드용 집계 테이블. 차트가 전체 거래 행 대신 (구, 동, 계약월, 유형, 전월세)
+# 한 행씩만 읽도록 건수/합계와 평당 보증금 분위수 스케치(KLL)를 미리 만들어 둔다.
+# 평균은 합계 / 건수로, 여러 동/월을 묶은 분위수는 KLL_QUANTILES.MERGE_POINT_FLOAT64(sketch, 0.5) 로 구한다.
+# rent_market_view 와 같이 deal_date 월 파티션이고 적재/정정된 계약월 파티션만 다시 계산한다.
+ROLLUP_PARTITION_FIELD = "deal_date"
+ROLLUP_CLUSTER_FIELDS = ["district_code", "dong"]
+# KLL 스케치 정밀도 (클수록 정확하고 스케치가 커짐, 1000 이면 순위 오차 약 0.1~1%)
+ROLLUP_SKETCH_PRECISION = 1000
+
+ROLLUP_SELECT = """
+    SELECT
+        *,
+        {quantiles}
+    FROM (
+        SELECT
+            {key},
+            COUNT(*) AS transaction_count,
+            SUM(deposit) AS deposit_sum,
+            SUM(monthly_rent) AS monthly_rent_sum,
+            SUM(area_m2) AS area_m2_sum,
+            COUNT(deposit_per_pyung) AS deposit_per_pyung_count,
+            SUM(deposit_per_pyung) AS deposit_per_pyung_sum,
+            SUM(rent_per_pyung) AS rent_per_pyung_sum,
+            KLL_QUANTILES.INIT_FLOAT64(deposit_per_pyung, {precision}) AS deposit_per_pyung_sketch
+        FROM (
+            SELECT
+                district_code,
+                district_name,
+                dong,
+                type,
+                PARSE_DATE('%Y%m', year_month) AS deal_date,
+                IF(monthly_rent = 0, 'Jeonse', 'Monthly') AS rent_type,
+                deposit,
+                monthly_rent,
+                area AS area_m2,
+                -- rent_market_view 와 같은 식
+                ROUND(deposit / (area / 3.3058), 0) AS deposit_per_pyung,
+                CASE
+                    WHEN monthly_rent > 0 THEN ROUND(monthly_rent / (area / 3.3058), 0)
+                    ELSE 0
+                END AS rent_per_pyung
+            FROM `{source_table}`
+            {{where}}
+        )
+        GROUP BY {key}
+    )
+"""
+
+
+def rollup_select(source_ref):
+    quantiles = ",\n        ".join(
+        f"KLL_QUANTILES.EXTRACT_POINT_FLOAT64(deposit_per_pyung_sketch, {value}) AS deposit_per_pyung_{name}"
+        for name, value in ROLLUP_QUANTILES.items())
+    return ROLLUP_SELECT.format(quantiles=quantiles, key=", ".join(ROLLUP_KEY),
+                                precision=ROLLUP_SKETCH_PRECISION, source_table=source_ref)
+
+
+def refresh_rollup(client, source_ref, rollup_ref, months):
+    """집계 테이블이 없으면 전체 이력으로 한 번 만들고, 있으면 months 파티션만 다시 계산"""
+    try:
+        client.get_table(rollup_ref)
+    except NotFound:
+        client.query(f"""
+        CREATE TABLE `{rollup_ref}`
+        PARTITION BY DATE_TRUNC({ROLLUP_PARTITION_FIELD}, MONTH)
+        CLUSTER BY {", ".join(ROLLUP_CLUSTER_FIELDS)}
+        AS {rollup_select(source_ref).format(where="")}
+        """).result()
+        print(f"집계 테이블 전체 생성: {rollup_ref}")
+        return
+    refresh_partitions(client, rollup_select(source_ref), rollup_ref, months, "rollup")
+
+
+def apply_delta(client, uris, table_ref, staging_suffix="delta_staging"):
+    """op / copies 컬럼이 있는 delta CSV (pipeline/delta.py) 를 MERGE 한 번으로 반영하고 바뀐 계약월 목록을 돌려준다.
+
+    계약월/유형이 같고 자연 키(NATURAL_KEY)가 모두 같으면 같은 거래로 본다. 같은 키의 행은 서로
+    구별할 수 없으므로 delta 에 나온 키마다 기존 행을 지우고 copies 개만 다시 넣는다
+    (기존 행을 먼저 쓰고 모자라면 op='add' 행으로 채움). 그래서 remove 한 건이면 중복 중 한 건만
+    줄어들고, 이미 반영한 delta 를 다시 반영해도 결과가 같다.
+    """
+    ensure_raw_table(client, table_ref)
+    staging_ref = f"{table_ref}__{staging_suffix}"
+    job_config = bigquery.LoadJobConfig(
+        schema=LOAD_SCHEMA + [bigquery.SchemaField("op", "STRING"), bigquery.SchemaField("copies", "INTEGER")],
+        source_format=bigquery.SourceFormat.CSV,
+        skip_leading_rows=1,
+        write_disposition="WRITE_TRUNCATE",
+    )
+    try:
+        run_job(client.load_table_from_uri(uris, staging_ref, job_config=job_config), "load")
+        found = client.query(f"SELECT DISTINCT year_month FROM `{staging_ref}` ORDER BY year_month").result()
+        months = [row["year_month"] for row in found]
+        if not months:
+            return months
+
+        key = ", ".join(DELTA_KEY)
+        match = "\n            AND ".join(f"T.{column} IS NOT DISTINCT FROM S.{column}" for column in NATURAL_KEY)
+        # 키마다 한 행만 나오도록 키가 아닌 컬럼은 NULL
+        delete_columns = ", ".join(
+            field.name if field.name in DELTA_KEY else f"CAST(NULL AS {SQL_TYPES[field.field_type]}) AS {field.name}"
+            for field in LOAD_SCHEMA
+        )
+        insert_values = ", ".join(f"S.{field.name}" for field in LOAD_SCHEMA)
+        query = f"""
+        MERGE `{table_ref}` T
+        USING (
+            WITH keyed AS (
+                -- 기존 행(source 0) -> add(1) -> remove(2) 순으로 키마다 번호를 매기고 목표 개수를 붙임
+                SELECT *,
+                    MAX(copies) OVER (PARTITION BY {key}) AS target_copies,
+                    ROW_NUMBER() OVER (PARTITION BY {key} ORDER BY source) AS copy
+                FROM (
+                    SELECT {LOAD_COLUMNS}, 0 AS source, CAST(NULL AS INT64) AS copies
+                    FROM `{table_ref}`
+                    WHERE {PARTITION_FIELD} IN UNNEST(@deal_months)
+                    UNION ALL
+                    SELECT {LOAD_COLUMNS}, IF(op = 'add', 1, 2) AS source, copies
+                    FROM `{staging_ref}`
+                )
+            )
+            SELECT DISTINCT 'delete' AS action, {delete_columns}
+            FROM keyed WHERE target_copies IS NOT NULL
+            UNION ALL
+            SELECT 'insert' AS action, {LOAD_COLUMNS}
+            FROM keyed WHERE target_copies IS NOT NULL AND source < 2 AND copy <= target_copies
+        ) S
+        ON S.action = 'delete'
+            AND T.{PARTITION_FIELD} IN UNNEST(@deal_months)
+            AND T.{PARTITION_FIELD} = PARSE_DATE('%Y%m', S.year_month)
+            AND T.type = S.type
+            AND {match}
+        WHEN MATCHED THEN DELETE
+        WHEN NOT MATCHED BY TARGET AND S.action = 'insert' THEN
+            INSERT ({LOAD_COLUMNS}, {PARTITION_FIELD})
+            VALUES ({insert_values}, PARSE_DATE('%Y%m', S.year_month))
+        """
+        # 상수 목록 조건으로 해당 계약월 파티션만 읽음
+        deal_months = [datetime.strptime(year_month, "%Y%m").date() for year_month in months]
+        job = client.query(query, job_config=bigquery.QueryJobConfig(query_parameters=[
+            bigquery.ArrayQueryParameter("deal_months", "DATE", deal_months),
+        ]))
+        run_job(job, "merge_delta")
+        print(f"delta 반영 완료: {table_ref} 계약월 {months} (변경 {job.num_dml_affected_rows}행)")
+    finally:
+        client.delete_table(staging_ref, not_found_ok=True)
+    return months
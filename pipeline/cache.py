@@ -0,0 +1,127 @@
+"""RTMS 응답 디스크 캐시
+
+요청 키 (엔드포인트, LAWD_CD, DEAL_YMD, pageNo, numOfRows) -> 응답 본문 sha256 으로 색인하고,
+본문은 해시 이름의 파일로 한 번만 저장한다 (거래 없음 응답처럼 같은 본문은 공유).
+
+- 만료: 계약월이 오래될수록 바뀌지 않으므로 IMMUTABLE_AFTER_MONTHS 이전 달은
+  만료 없음, 최근 달은 RECENT_TTL, 이번 달은 CURRENT_TTL 이 지나면 다시 받는다.
+- 용량: 본문 총합이 max_bytes 를 넘으면 가장 오래 안 쓴 키부터 지운다 (LRU).
+"""
+import hashlib
+import os
+import sqlite3
+import time
+from datetime import datetime
+
+from pipeline.config import RESPONSE_CACHE_DIR, RESPONSE_CACHE_MAX_BYTES
+
+
+KEY_WHERE = "endpoint = ? AND lawd_cd = ? AND deal_ymd = ? AND page_no = ? AND num_of_rows = ?"
+
+IMMUTABLE_AFTER_MONTHS = 3
+RECENT_TTL = 24 * 60 * 60
+CURRENT_TTL = 6 * 60 * 60
+
+
+def ttl_for(deal_ymd, now=None):
+    """계약월 기준 캐시 유효 시간(초). None 이면 만료 없음."""
+    now = now or datetime.now()
+    months_ago = (now.year * 12 + now.month) - (int(deal_ymd[:4]) * 12 + int(deal_ymd[4:6]))
+    if months_ago >= IMMUTABLE_AFTER_MONTHS:
+        return None
+    if months_ago >= 1:
+        return RECENT_TTL
+    return CURRENT_TTL
+
+
+class ResponseCache:
+
+    def __init__(self, directory=RESPONSE_CACHE_DIR, max_bytes=RESPONSE_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.blob_dir = os.path.join(directory, "blobs")
+        os.makedirs(self.blob_dir, exist_ok=True)
+        # 프로세스 풀 수집에서는 여러 프로세스가 같은 색인을 쓰므로 잠금을 넉넉히 기다림
+        self.db = sqlite3.connect(os.path.join(directory, "index.sqlite3"), timeout=30)
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                endpoint TEXT, lawd_cd TEXT, deal_ymd TEXT, page_no INTEGER, num_of_rows INTEGER,
+                digest TEXT, size INTEGER, fetched_at REAL, accessed_at REAL,
+                PRIMARY KEY (endpoint, lawd_cd, deal_ymd, page_no, num_of_rows)
+            )
+        """)
+        self.db.commit()
+
+    def _blob_path(self, digest):
+        return os.path.join(self.blob_dir, digest[:2], digest)
+
+    def get(self, endpoint, lawd_cd, deal_ymd, page_no, num_of_rows, allow_expired=False):
+        """캐시된 본문 (bytes). 없거나 만료됐으면 None."""
+        key = (endpoint, lawd_cd, deal_ymd, page_no, num_of_rows)
+        found = self.db.execute(f"SELECT digest, fetched_at FROM entries WHERE {KEY_WHERE}", key).fetchone()
+        if found is None:
+            return None
+        digest, fetched_at = found
+        ttl = ttl_for(deal_ymd)
+        if not allow_expired and ttl is not None and time.time() - fetched_at > ttl:
+            return None
+        try:
+            with open(self._blob_path(digest), "rb") as f:
+                content = f.read()
+        except FileNotFoundError:
+            self.db.execute(f"DELETE FROM entries WHERE {KEY_WHERE}", key)
+            self.db.commit()
+            return None
+        self.db.execute(f"UPDATE entries SET accessed_at = ? WHERE {KEY_WHERE}", (time.time(), *key))
+        self.db.commit()
+        return content
+
+    def put(self, endpoint, lawd_cd, deal_ymd, page_no, num_of_rows, content):
+        digest = hashlib.sha256(content).hexdigest()
+        path = self._blob_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # 같은 본문(거래 없음 응답 등)을 여러 수집 프로세스가 동시에 쓸 수 있어서 임시 파일은 프로세스별
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+        now = time.time()
+        self.db.execute(
+            "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (endpoint, lawd_cd, deal_ymd, page_no, num_of_rows, digest, len(content), now, now)
+        )
+        self.db.commit()
+        self.evict()
+
+    def total_bytes(self):
+        # 같은 본문은 한 번만 저장되므로 digest 기준으로 합산
+        found = self.db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM (SELECT DISTINCT digest, size FROM entries)"
+        ).fetchone()
+        return found[0]
+
+    def evict(self):
+        """max_bytes 이하가 될 때까지 가장 오래 안 쓴 키부터 삭제"""
+        total = self.total_bytes()
+        if total <= self.max_bytes:
+            return
+        lru = self.db.execute(
+            "SELECT endpoint, lawd_cd, deal_ymd, page_no, num_of_rows, digest, size "
+            "FROM entries ORDER BY accessed_at"
+        ).fetchall()
+        for *key, digest, size in lru:
+            if total <= self.max_bytes:
+                break
+            self.db.execute(f"DELETE FROM entries WHERE {KEY_WHERE}", key)
+            shared = self.db.execute("SELECT 1 FROM entries WHERE digest = ? LIMIT 1", (digest,)).fetchone()
+            if shared is None:
+                try:
+                    os.remove(self._blob_path(digest))
+                except FileNotFoundError:
+                    pass
+                total -= size
+        self.db.commit()
+
+    def close(self):
+        self.db.close()
@@ -0,0 +1,96 @@
+"""장기 백필용 append-only 체크포인트
+
+중간 저장 때마다 전체 CSV 를 다시 쓰지 않고, 직전 저장 이후 새로 모인 행만
+세그먼트 파일 하나로 쓴다. 세그먼트를 다 쓴 다음 manifest 에 완료된 수집 단위
+(type, LAWD_CD, DEAL_YMD) 를 한 줄 추가하므로, 중간에 죽어도 manifest 에 있는
+단위만 완료로 본다.
+
+    checkpoints/townhouse_2022_2025/
+        manifest.jsonl
+        segment-000001.csv
+        segment-000002.csv
+"""
+import codecs
+import csv
+import json
+import os
+import shutil
+
+from pipeline.config import COLUMNS
+
+
+class CheckpointStore:
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.manifest_path = os.path.join(directory, "manifest.jsonl")
+        os.makedirs(directory, exist_ok=True)
+        self.entries = self._load_manifest()
+
+    def _load_manifest(self):
+        entries = []
+        if not os.path.exists(self.manifest_path):
+            return entries
+        with open(self.manifest_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # 기록 도중 죽어서 잘린 마지막 줄은 무시
+                    break
+        return entries
+
+    def completed(self):
+        """완료된 (type, LAWD_CD, DEAL_YMD) 집합"""
+        return {tuple(key) for entry in self.entries for key in entry["units"]}
+
+    @property
+    def row_count(self):
+        return sum(entry["rows"] for entry in self.entries)
+
+    def write_segment(self, units, rows):
+        """지난 저장 이후 완료된 units 와 그 행들을 새 세그먼트로 기록"""
+        if not units:
+            return
+        segment = f"segment-{len(self.entries) + 1:06d}.csv"
+        path = os.path.join(self.directory, segment)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=COLUMNS, lineterminator="\n")
+            writer.writerows(rows)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+        entry = {
+            "segment": segment,
+            "rows": len(rows),
+            "units": [[unit.type, unit.lawd_cd, unit.deal_ymd] for unit in units],
+        }
+        with open(self.manifest_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.entries.append(entry)
+        print(f"중간 저장 완료 (+{len(rows)}건, 누적 {self.row_count}건)")
+
+    def merge(self, file_name):
+        """manifest 에 기록된 세그먼트를 순서대로 이어 붙여 최종 CSV 생성"""
+        tmp_path = file_name + ".tmp"
+        with open(tmp_path, "wb") as out:
+            # 기존 CSV 와 같은 utf-8-sig 헤더 + 세그먼트 바이트를 그대로 복사
+            out.write(codecs.BOM_UTF8 + (",".join(COLUMNS) + "\n").encode("utf-8"))
+            for entry in self.entries:
+                with open(os.path.join(self.directory, entry["segment"]), "rb") as seg:
+                    shutil.copyfileobj(seg, out)
+        os.replace(tmp_path, file_name)
+        return self.row_count
+
+    def iter_rows(self):
+        """세그먼트의 행을 순서대로 하나씩 읽기 (Parquet 출력용)"""
+        for entry in self.entries:
+            with open(os.path.join(self.directory, entry["segment"]), newline="", encoding="utf-8") as f:
+                yield from csv.DictReader(f, fieldnames=COLUMNS)
+
+    def remove(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
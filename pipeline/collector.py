@@ -0,0 +1,438 @@
+"""RTMS 전월세 API 비동기 수집 엔진 (batch_collector / DAG 공용)"""
+import asyncio
+import json
+import os
+import random
+import time
+from collections import Counter, namedtuple
+from contextlib import asynccontextmanager
+
+import aiohttp
+
+from pipeline.accumulator import RowAccumulator
+from pipeline.config import (API_CONCURRENCY, API_MAX_RETRIES, API_PAGE_SIZE, API_RATE_LIMIT, API_RETRY_BASE,
+                             API_RETRY_MAX, ENDPOINTS, SERVICE_KEY)
+from pipeline.metrics import METRICS, record_response
+from pipeline.parser import ResponseParser, parse_bytes
+
+
+# 수집 단위: 유형 x 구코드 x 계약년월 한 건의 API 호출
+WorkUnit = namedtuple('WorkUnit', ['type', 'lawd_cd', 'deal_ymd', 'district_name'])
+
+# 일일 요청 한도 초과 (LIMITED_NUMBER_OF_SERVICE_REQUESTS_EXCEEDS_ERROR)
+QUOTA_EXCEEDED_CODES = ('22',)
+
+# 잠시 뒤 다시 요청하면 되는 결과 코드
+# (01 APPLICATION_ERROR, 02 DB_ERROR, 04 HTTP_ERROR, 05 SERVICETIME_OUT, 99 UNKNOWN_ERROR)
+RETRYABLE_CODES = ('01', '02', '04', '05', '99')
+# API 가 버거워한다는 신호: 동시 요청 수와 초당 요청 수를 줄인다
+THROTTLE_CODES = ('05',)
+THROTTLE_STATUSES = (429, 500, 502, 503, 504)
+
+# 응답 본문을 파서에 넘기는 단위 (bytes)
+CHUNK_SIZE = 64 * 1024
+
+
+def months_between(start_year, end_year):
+    """start_year 1월 ~ end_year 12월까지의 YYYYMM 목록"""
+    return [f"{year}{str(month).zfill(2)}" for year in range(start_year, end_year + 1) for month in range(1, 13)]
+
+
+def build_units(target_types, months, districts):
+    """유형 -> 월 -> 구 순서로 수집 단위를 만든다 (기존 반복문 순서와 동일)"""
+    return [
+        WorkUnit(target_type, code, ymd, district_name)
+        for target_type in target_types
+        for ymd in months
+        for code, district_name in districts.items()
+    ]
+
+
+class TokenBucket:
+    """초당 rate개씩 토큰이 차는 토큰 버킷 (두 엔드포인트가 하나를 공유)
+
+    비동기 수집은 acquire(), 순차 모드(batch_collector.collect_data_sync)는 acquire_sync() 로 기다린다.
+    """
+
+    def __init__(self, rate=API_RATE_LIMIT, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _take(self):
+        """토큰이 있으면 하나 쓰고 0, 없으면 다음 토큰까지 기다릴 시간(초)"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                wait = self._take()
+                if not wait:
+                    return
+                await asyncio.sleep(wait)
+
+    def acquire_sync(self):
+        while True:
+            wait = self._take()
+            if not wait:
+                return
+            time.sleep(wait)
+
+
+class AdaptiveLimiter:
+    """AIMD 방식 동시 요청 수 / 초당 요청 수 제어
+
+    요청이 성공할 때마다 동시 요청 수를 1/limit 씩(한 바퀴 돌면 약 1) 늘리고 초당 요청 수도
+    조금씩 올린다. 한도/타임아웃/5xx 신호를 받으면 둘 다 절반으로 줄인다. 동시에 몰려온
+    실패로 여러 번 줄지 않도록 한 번 줄인 뒤 cooldown 초 동안은 다시 줄이지 않는다.
+    최대값은 설정값(API_CONCURRENCY, API_RATE_LIMIT) 이라 그 이상으로는 올라가지 않는다.
+    """
+
+    def __init__(self, max_concurrency=API_CONCURRENCY, max_rate=API_RATE_LIMIT, min_rate=0.5, cooldown=1.0):
+        self.max_concurrency = max_concurrency
+        self.max_rate = max_rate
+        self.min_rate = min(min_rate, max_rate)
+        self.rate_step = max_rate / 100
+        self.cooldown = cooldown
+        self.limit = float(max_concurrency)
+        self.bucket = TokenBucket(max_rate)
+        self.in_flight = 0
+        self.decreased_at = float("-inf")
+        self._condition = asyncio.Condition()
+
+    @property
+    def rate(self):
+        return self.bucket.rate
+
+    @asynccontextmanager
+    async def slot(self):
+        """동시 요청 슬롯 하나 + 토큰 하나를 얻을 때까지 기다림"""
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+        try:
+            await self.bucket.acquire()
+            yield
+        finally:
+            async with self._condition:
+                self.in_flight -= 1
+                self._condition.notify_all()
+
+    def on_success(self):
+        self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+        self.bucket.rate = min(self.max_rate, self.bucket.rate + self.rate_step)
+
+    def on_throttle(self, reason):
+        now = time.monotonic()
+        if now - self.decreased_at < self.cooldown:
+            return
+        self.decreased_at = now
+        self.limit = max(1.0, self.limit / 2)
+        self.bucket.rate = max(self.min_rate, self.bucket.rate / 2)
+        METRICS.inc("rtms_throttled_total", reason=reason)
+        print(f"요청 속도 낮춤 ({reason}): 동시 {int(self.limit)}개, 초당 {self.bucket.rate:.1f}회")
+
+
+def retry_delay(attempt, base=API_RETRY_BASE, cap=API_RETRY_MAX):
+    """지수 백오프 + full jitter: 0 ~ min(cap, base * 2^attempt) 초"""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def is_retryable(reason):
+    if reason in ("timeout", "connection", "error"):
+        return True
+    if reason.startswith("http_"):
+        return int(reason[5:]) in THROTTLE_STATUSES
+    if reason.startswith("api_"):
+        return reason[4:] in RETRYABLE_CODES
+    return False
+
+
+def is_throttle(reason):
+    if reason in ("timeout", "connection"):
+        return True
+    if reason.startswith("http_"):
+        return int(reason[5:]) in THROTTLE_STATUSES
+    return reason.startswith("api_") and reason[4:] in THROTTLE_CODES
+
+
+def page_count(total_count, page_size):
+    """totalCount 기준 필요한 페이지 수 (totalCount 가 없으면 1페이지)"""
+    if not total_count:
+        return 1
+    return -(-total_count // page_size)
+
+
+def report_api_error(parser, unit, page_no=1):
+    print(f"API 오류 ({unit.deal_ymd} {unit.district_name} p{page_no}): "
+          f"{parser.result_code} - {parser.result_msg or ''}")
+
+
+def report_rows(rows, unit, count=None):
+    count = len(rows) if count is None else count
+    if count:
+        print(f"{unit.deal_ymd} {unit.district_name}: {count}건 수집")
+    else:
+        print(f"pass - {unit.deal_ymd} {unit.district_name}: 거래 없음")
+
+
+class CollectStats:
+    """수집 한 번 동안의 엔드포인트(유형)별 실제 API 호출 / 재시도 수, 한도 초과 여부,
+    재시도를 다 쓰고도 실패한 단위와 마지막 실패 사유"""
+
+    def __init__(self):
+        self.requests = Counter()
+        self.retries = Counter()
+        self.quota_exceeded = set()
+        self.failed = {}
+
+
+def report_failures(stats, path=None):
+    """실패한 단위를 출력하고, path 가 있으면 JSON 으로 남긴다 (없으면 기존 파일 삭제)"""
+    failures = [{"type": unit.type, "lawd_cd": unit.lawd_cd, "deal_ymd": unit.deal_ymd,
+                 "district_name": unit.district_name, "reason": reason}
+                for unit, reason in sorted(stats.failed.items())]
+    for failure in failures:
+        print(f"수집 실패: {failure['type']} {failure['deal_ymd']} {failure['district_name']} - {failure['reason']}")
+    if path is None:
+        return failures
+    if failures:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(failures, f, ensure_ascii=False, indent=2)
+        print(f"실패 단위 {len(failures)}개 기록: {path}")
+    elif os.path.exists(path):
+        os.remove(path)
+    return failures
+
+
+class FetchContext:
+    """iter_collect 한 번 동안 모든 요청이 공유하는 세션/제한기/옵션
+
+    on_page 를 주면 페이지를 파싱할 때마다 그 페이지의 행을 넘긴다 (fetch_unit 참고).
+    """
+
+    def __init__(self, session, limiter, service_key=SERVICE_KEY, cache=None, replay_only=False,
+                 page_size=API_PAGE_SIZE, stats=None, max_retries=API_MAX_RETRIES, on_page=None):
+        self.session = session
+        self.limiter = limiter
+        self.service_key = service_key
+        self.cache = cache
+        self.replay_only = replay_only
+        self.page_size = page_size
+        self.stats = stats if stats is not None else CollectStats()
+        self.max_retries = max_retries
+        self.on_page = on_page
+
+
+async def request_page(ctx, unit, page_no):
+    """API 요청 한 번. ((parser, rows), None) 또는 (None, 실패 사유)
+
+    사유는 지표의 status 와 같은 형식: http_503 / api_99 / timeout / connection / error / quota_exceeded
+    """
+    params = {
+        'serviceKey': ctx.service_key,
+        'LAWD_CD': unit.lawd_cd,
+        'DEAL_YMD': unit.deal_ymd,
+        'numOfRows': str(ctx.page_size),
+        'pageNo': str(page_no)
+    }
+    # requests 처럼 값이 없는 파라미터는 보내지 않음
+    params = {key: value for key, value in params.items() if value is not None}
+
+    async with ctx.limiter.slot():
+        if unit.type in ctx.stats.quota_exceeded:
+            return None, "quota_exceeded"
+        ctx.stats.requests[unit.type] += 1
+        # 요청 시간(대기열 제외)과 그중 파싱에 쓴 시간을 따로 잰다
+        started = time.perf_counter()
+        parse_seconds = 0.0
+        response_bytes = 0
+        try:
+            async with ctx.session.get(ENDPOINTS[unit.type]['url'], params=params) as response:
+                if response.status != 200:
+                    print(f"HTTP 오류: {response.status} ({unit.deal_ymd} {unit.district_name} p{page_no})")
+                    reason = f"http_{response.status}"
+                    record_response(unit.type, unit.lawd_cd, time.perf_counter() - started, reason)
+                    return None, reason
+                # 본문을 받는 대로 파서에 넣어서 응답 전체를 메모리에 올리지 않음
+                parser = ResponseParser(unit)
+                rows = []
+                chunks = []
+                async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                    response_bytes += len(chunk)
+                    parse_started = time.perf_counter()
+                    rows.extend(parser.feed(chunk))
+                    parse_seconds += time.perf_counter() - parse_started
+                    if ctx.cache is not None:
+                        chunks.append(chunk)
+                parse_started = time.perf_counter()
+                rows.extend(parser.finish())
+                parse_seconds += time.perf_counter() - parse_started
+        except Exception as e:
+            if isinstance(e, asyncio.TimeoutError):
+                reason = "timeout"
+            elif isinstance(e, aiohttp.ClientConnectionError):
+                reason = "connection"
+            else:
+                reason = "error"
+            print(f"에러 발생 ({unit.deal_ymd} {unit.district_name} p{page_no}): {reason} {e}")
+            record_response(unit.type, unit.lawd_cd, time.perf_counter() - started, reason)
+            return None, reason
+
+    status = "ok" if parser.ok else f"api_{parser.result_code}"
+    record_response(unit.type, unit.lawd_cd, time.perf_counter() - started, status,
+                    response_bytes, len(rows), parse_seconds)
+    if not parser.ok:
+        report_api_error(parser, unit, page_no)
+        if parser.result_code in QUOTA_EXCEEDED_CODES:
+            ctx.stats.quota_exceeded.add(unit.type)
+        return None, status
+    if ctx.cache is not None:
+        ctx.cache.put(unit.type, unit.lawd_cd, unit.deal_ymd, page_no, ctx.page_size, b"".join(chunks))
+    return (parser, rows), None
+
+
+async def fetch_page(ctx, unit, page_no):
+    """페이지 하나를 받아서 (parser, rows) 를 돌려준다. 재시도까지 실패하면 None.
+
+    캐시가 있으면 유효한 캐시 본문을 먼저 쓰고, replay_only 면 네트워크를 쓰지 않는다.
+    일시적 오류는 지수 백오프 + jitter 로 max_retries 번까지 다시 요청한다. 기다리는 동안은
+    동시 요청 슬롯을 잡지 않아서 다른 요청이 계속 진행된다. 타임아웃/5xx/한도 신호는
+    AdaptiveLimiter 에 알려 속도를 줄이고, 성공하면 다시 올린다.
+    일일 한도 초과 코드를 받은 엔드포인트는 그 뒤로 요청하지 않는다.
+    """
+    cache, page_size = ctx.cache, ctx.page_size
+    if cache is not None:
+        content = cache.get(unit.type, unit.lawd_cd, unit.deal_ymd, page_no, page_size,
+                            allow_expired=ctx.replay_only)
+        if content is not None:
+            record_response(unit.type, unit.lawd_cd, 0.0, "cache")
+            return parse_bytes(content, unit)
+    if ctx.replay_only:
+        print(f"캐시 없음 ({unit.type} {unit.deal_ymd} {unit.district_name} p{page_no})")
+        ctx.stats.failed[unit] = f"p{page_no} cache_miss"
+        return None
+
+    for attempt in range(ctx.max_retries + 1):
+        result, reason = await request_page(ctx, unit, page_no)
+        if result is not None:
+            ctx.limiter.on_success()
+            return result
+        if is_throttle(reason):
+            ctx.limiter.on_throttle(reason)
+        if not is_retryable(reason) or attempt == ctx.max_retries:
+            break
+        ctx.stats.retries[unit.type] += 1
+        METRICS.inc("rtms_retries_total", endpoint=unit.type, reason=reason)
+        await asyncio.sleep(retry_delay(attempt))
+
+    ctx.stats.failed[unit] = f"p{page_no} {reason}"
+    return None
+
+
+async def fetch_unit(ctx, unit):
+    """수집 단위 하나의 모든 페이지를 받아 행 목록을 돌려준다.
+
+    1페이지의 totalCount 로 남은 페이지 수를 정하고 나머지는 동시에 요청한다.
+    행은 페이지 순서대로 합친다. 거래가 없으면 빈 목록, 한 페이지라도 실패하면
+    None 을 돌려줘서 체크포인트가 실패한 단위를 완료로 기록하지 않게 한다.
+
+    ctx.on_page 가 있으면 행을 모으지 않고 페이지를 받는 대로 (도착 순서) 넘긴 뒤 빈 목록을
+    돌려준다. 이때 실패한 단위의 앞 페이지 행은 이미 넘어가 있으므로, 받는 쪽은 strict 수집 +
+    재시도 때 지우기(pipeline.stream.delete_parts) 로 처리해야 한다.
+    """
+    count = 0
+
+    async def fetch(page_no):
+        nonlocal count
+        page = await fetch_page(ctx, unit, page_no)
+        if page is not None:
+            count += len(page[1])
+            if ctx.on_page is not None:
+                ctx.on_page(page[1])
+                page = page[0], []
+        return page
+
+    first = await fetch(1)
+    if first is None:
+        return None
+    parser, rows = first
+
+    pages = page_count(parser.total_count, ctx.page_size)
+    if pages > 1:
+        rest = await asyncio.gather(*(fetch(page_no) for page_no in range(2, pages + 1)))
+        if any(page is None for page in rest):
+            print(f"일부 페이지 실패 ({unit.deal_ymd} {unit.district_name}) - 단위 전체를 미완료로 둠")
+            return None
+        for _, page_rows in rest:
+            rows.extend(page_rows)
+
+    report_rows(rows, unit, count)
+    return rows
+
+
+async def iter_collect(units, concurrency=API_CONCURRENCY, rate=API_RATE_LIMIT,
+                       chunk_size=100, service_key=SERVICE_KEY, cache=None, replay_only=False,
+                       page_size=API_PAGE_SIZE, stats=None, max_retries=API_MAX_RETRIES, on_page=None):
+    """units 를 chunk_size 개씩 동시에 수집하며 (완료된 units, rows) 를 순서대로 내보낸다.
+
+    하나의 세션(keep-alive 커넥션 풀)과 AdaptiveLimiter 를 전체 수집 동안 공유한다.
+    concurrency / rate 는 상한이고 실제 값은 응답에 따라 AIMD 로 조절된다.
+    stats (CollectStats) 를 넘기면 실제 API 호출 / 재시도 수, 한도 초과 여부, 실패 단위가 기록된다.
+    on_page 를 넘기면 행은 페이지마다 그쪽으로 가고 내보내는 rows 는 비어 있다.
+    """
+    limiter = AdaptiveLimiter(concurrency, rate)
+    connector = aiohttp.TCPConnector(limit=concurrency, keepalive_timeout=30)
+    timeout = aiohttp.ClientTimeout(total=10)
+
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        ctx = FetchContext(session, limiter, service_key, cache, replay_only, page_size, stats, max_retries,
+                           on_page)
+        for start in range(0, len(units), chunk_size):
+            chunk = units[start:start + chunk_size]
+            results = await asyncio.gather(*(fetch_unit(ctx, unit) for unit in chunk))
+            completed = [unit for unit, rows in zip(chunk, results) if rows is not None]
+            yield completed, [row for rows in results if rows for row in rows]
+        METRICS.set("rtms_concurrency_limit", limiter.limit)
+        METRICS.set("rtms_rate_limit", limiter.rate)
+
+
+async def collect_async(units, strict=False, sink=None, **kwargs):
+    """수집한 행을 dict 목록이 아닌 컬럼 버퍼(RowAccumulator)에 모아서 돌려준다.
+
+    sink 를 주면 (extend(rows) 가 있는 객체, 예: pipeline.stream.PartWriter) 페이지를 파싱할
+    때마다 그 행을 바로 넘기고 sink 를 돌려준다. 실패한 단위의 일부 페이지도 넘어갈 수 있으므로
+    sink 는 strict=True 와 함께 쓴다.
+    재시도까지 실패한 단위는 사유와 함께 출력하고, strict 면 하나라도 있을 때
+    RuntimeError 를 던진다 (Airflow 재시도용).
+    """
+    stats = kwargs.setdefault("stats", CollectStats())
+    if sink is not None:
+        kwargs["on_page"] = sink.extend
+    accumulator = RowAccumulator() if sink is None else sink
+    completed = set()
+    async for done, rows in iter_collect(units, **kwargs):
+        completed.update(done)
+        accumulator.extend(rows)
+    failed = [unit for unit in units if unit not in completed]
+    if failed:
+        report_failures(stats)
+    if strict and failed:
+        names = ", ".join(f"{unit.type} {unit.deal_ymd} {unit.district_name} ({stats.failed.get(unit, '?')})"
+                          for unit in failed)
+        raise RuntimeError(f"수집 실패 단위 {len(failed)}개: {names}")
+    return accumulator
+
+
+def collect(units, **kwargs):
+    """동기 코드(PythonOperator, 스크립트)에서 쓰는 진입점"""
+    return asyncio.run(collect_async(units, **kwargs))
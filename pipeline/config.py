@@ -0,0 +1,59 @@
+import os
+
+from pipeline.regions import describe_selection, select_districts
+
+
+SERVICE_KEY = os.getenv("API_SERVICE_KEY")
+
+# 비동기 수집 기본값 (동시 요청 수 / 초당 요청 수)
+API_CONCURRENCY = int(os.getenv("API_CONCURRENCY", "8"))
+API_RATE_LIMIT = float(os.getenv("API_RATE_LIMIT", "10"))
+# 페이지당 행 수 (totalCount 가 더 크면 나머지 페이지를 동시에 요청)
+API_PAGE_SIZE = int(os.getenv("API_PAGE_SIZE", "1000"))
+# 일시적 오류(타임아웃, 5xx, 게이트웨이 오류 코드) 재시도 횟수 / 지수 백오프 기본, 최대 대기(초)
+API_MAX_RETRIES = int(os.getenv("API_MAX_RETRIES", "4"))
+API_RETRY_BASE = float(os.getenv("API_RETRY_BASE", "0.5"))
+API_RETRY_MAX = float(os.getenv("API_RETRY_MAX", "30"))
+
+# 응답 디스크 캐시 위치 / 최대 용량
+RESPONSE_CACHE_DIR = os.getenv("RTMS_CACHE_DIR", "cache/rtms")
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RTMS_CACHE_MAX_MB", "2048")) * 1024 * 1024
+
+# 수집 대상 시군구 (pipeline/regions.csv). RTMS_PROVINCES 에 시도 코드/이름을 쉼표로 (예: 11,41 / all)
+SEOUL_DISTRICTS = select_districts(["11"])
+TARGET_PROVINCES = os.getenv("RTMS_PROVINCES", "11").split(",")
+TARGET_DISTRICTS = select_districts(TARGET_PROVINCES)
+TARGET_REGION_NAME = describe_selection(TARGET_PROVINCES)
+
+# RTMS API 주소 (로컬 mock 서버로 바꿀 때: RTMS_API_BASE=http://127.0.0.1:8080/1613000)
+RTMS_API_BASE = os.getenv("RTMS_API_BASE", "http://apis.data.go.kr/1613000")
+
+# 수집 대상 엔드포인트: 유형별 URL과 건물명/면적 태그
+ENDPOINTS = {
+    "officetel": {
+        "url": f"{RTMS_API_BASE}/RTMSDataSvcOffiRent/getRTMSDataSvcOffiRent",
+        "name_tag": "offiNm",       # 단지명
+        "area_tag": "excluUseAr",   # 전용면적
+    },
+    "townhouse": {
+        "url": f"{RTMS_API_BASE}/RTMSDataSvcRHRent/getRTMSDataSvcRHRent",
+        "name_tag": "mhouseNm",     # 연립다세대명
+        "area_tag": "excluUseAr",   # 전용면적
+    },
+}
+
+# 출력 형식: "csv" (기존) 또는 "parquet" (type/year_month 파티션)
+OUTPUT_FORMAT = os.getenv("OUTPUT_FORMAT", "csv")
+
+# CSV 컬럼 순서 (BigQuery 스키마와 동일)
+COLUMNS = [
+    'year_month', 'district_code', 'district_name', 'dong', 'jibun', 'name', 'floor',
+    'area', 'deposit', 'monthly_rent', 'build_year', 'deal_day', 'type',
+]
+
+# 같은 거래로 보는 자연 키 (지연 신고 재수집 delta 비교 / BigQuery MERGE 조건)
+NATURAL_KEY = ['district_code', 'dong', 'jibun', 'name', 'floor', 'area', 'deal_day', 'deposit', 'monthly_rent']
+
+# 대시보드 집계(rent_market_rollup) 그룹 키 / 평당 보증금 분위수 (BigQuery 와 로컬 계산이 같이 사용)
+ROLLUP_KEY = ['district_code', 'district_name', 'dong', 'deal_date', 'type', 'rent_type']
+ROLLUP_QUANTILES = {'p25': 0.25, 'p50': 0.5, 'p75': 0.75}
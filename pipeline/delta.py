@@ -0,0 +1,120 @@
+"""지연 신고분 재수집용 변경분(delta) 계산
+
+전월세 계약은 최대 30일 늦게 신고되므로 최근 N개월을 다시 받아야 하지만,
+매번 달 전체를 다시 적재하지 않도록 직전 스냅샷과 비교해서 바뀐 행만 넘긴다.
+
+- 행 지문: 자연 키(NATURAL_KEY) 값을 해시한 uint64 (pandas hash_pandas_object)
+- 스냅샷: 수집 단위(유형, 계약월, 구)별로 직전에 받은 행 전체를 Parquet 으로 보관
+    snapshots/townhouse/202401/11680.parquet
+- delta: 지문마다 직전/이번 행 수를 비교해서 늘어난 만큼 op='add', 줄어든 만큼 op='remove'
+  (금액 정정은 remove + add 한 쌍으로, 같은 계약이 한 건 더 신고되면 add 한 건으로 나타남)
+- copies: 그 지문의 이번 행 수. BigQuery 반영(pipeline.bq.apply_delta)은 키마다 행 수를
+  copies 로 맞추므로 같은 delta 를 다시 반영해도 결과가 같다.
+"""
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from pipeline.config import COLUMNS, NATURAL_KEY
+from pipeline.output import PARQUET_SCHEMA, to_typed_frame
+
+
+DELTA_COLUMNS = COLUMNS + ['op', 'copies']
+
+
+def fingerprint(df):
+    """행마다 자연 키 해시 (타입 변환 뒤 문자열로 맞춰서 CSV/Parquet 어느 쪽에서 읽어도 같은 값)"""
+    keys = to_typed_frame(df)[NATURAL_KEY].astype(str)
+    return pd.util.hash_pandas_object(keys, index=False).to_numpy()
+
+
+def surplus(hashes, other_counts):
+    """같은 지문 안에서 상대쪽 개수를 넘는 행 (앞에서부터 상대쪽 개수만큼은 짝이 있다고 봄)"""
+    hashes = pd.Series(hashes)
+    rank = hashes.groupby(hashes).cumcount().to_numpy()
+    return rank >= hashes.map(other_counts).fillna(0).to_numpy()
+
+
+def diff_frames(previous, current):
+    """(추가할 행, 지울 행) DataFrame. 둘 다 그 지문의 이번 행 수를 copies 컬럼에 붙인다.
+
+    지문마다 개수를 비교하므로 같은 값의 행이 두 건에서 세 건이 되면 한 건만 추가로 나온다.
+    """
+    if previous is None:
+        previous = current.iloc[0:0]
+    current_hashes = fingerprint(current)
+    previous_hashes = fingerprint(previous)
+    current_counts = pd.Series(current_hashes).value_counts()
+    previous_counts = pd.Series(previous_hashes).value_counts()
+
+    added_mask = surplus(current_hashes, previous_counts)
+    removed_mask = surplus(previous_hashes, current_counts)
+    added = current[added_mask].assign(
+        copies=pd.Series(current_hashes[added_mask]).map(current_counts).to_numpy())
+    removed = previous[removed_mask].assign(
+        copies=pd.Series(previous_hashes[removed_mask]).map(current_counts).fillna(0).astype(int).to_numpy())
+    return added, removed
+
+
+class SnapshotStore:
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def path(self, target_type, year_month, lawd_cd):
+        return os.path.join(self.directory, target_type, year_month, f"{lawd_cd}.parquet")
+
+    def load(self, target_type, year_month, lawd_cd):
+        """직전 스냅샷 DataFrame (처음이면 None)"""
+        path = self.path(target_type, year_month, lawd_cd)
+        if not os.path.exists(path):
+            return None
+        return to_typed_frame(pq.read_table(path).to_pandas())
+
+    def save(self, target_type, year_month, lawd_cd, df):
+        path = self.path(target_type, year_month, lawd_cd)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        table = pa.Table.from_pandas(to_typed_frame(df), schema=PARQUET_SCHEMA, preserve_index=False)
+        tmp_path = path + ".tmp"
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, path)
+
+    def promote(self, pending):
+        """pending 스토어에 써 둔 스냅샷을 이 스토어로 옮김 (BigQuery 반영이 끝난 뒤 호출)"""
+        moved = 0
+        for dirpath, _, filenames in os.walk(pending.directory):
+            for name in filenames:
+                if not name.endswith(".parquet"):
+                    continue
+                source = os.path.join(dirpath, name)
+                target = os.path.join(self.directory, os.path.relpath(source, pending.directory))
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                os.replace(source, target)
+                moved += 1
+        return moved
+
+
+def shard_delta(rows, target_type, lawd_cd, months, store, pending):
+    """한 (유형, 구) 샤드의 재수집 결과를 계약월별로 스냅샷과 비교해서 delta DataFrame 을 만든다.
+
+    새 스냅샷은 pending 에만 쓰고, 적재가 끝난 뒤 store.promote(pending) 으로 반영한다.
+    """
+    df = to_typed_frame(rows)
+    parts = []
+    for year_month in months:
+        current = df[df['year_month'] == year_month]
+        previous = store.load(target_type, year_month, lawd_cd)
+        if not len(current) and previous is not None and len(previous):
+            # 있던 달이 통째로 비어서 오면 API 쪽 문제일 가능성이 커서 삭제로 보지 않음
+            print(f"{year_month} {target_type} {lawd_cd}: 이전 {len(previous)}건 -> 0건, 이번에는 건너뜀")
+            continue
+        added, removed = diff_frames(previous, current)
+        print(f"{year_month} {target_type} {lawd_cd}: 추가/변경 {len(added)}건, 삭제 {len(removed)}건")
+        pending.save(target_type, year_month, lawd_cd, current)
+        parts.append(added.assign(op='add'))
+        parts.append(removed.assign(op='remove'))
+    if not parts:
+        return pd.DataFrame(columns=DELTA_COLUMNS)
+    return pd.concat(parts, ignore_index=True)[DELTA_COLUMNS]
@@ -0,0 +1,227 @@
+"""GCS 병렬 업로드
+
+- 버킷에 이미 같은 바이트가 있으면 건너뜀 (MD5 비교, 복합 객체처럼 MD5 가 없으면 CRC32C)
+- 여러 파티션 파일을 스레드 풀로 동시에 업로드
+- RESUMABLE_THRESHOLD 이상인 파일은 resumable 세션으로 CHUNK_SIZE 씩 보내고, 세션 URL 을
+  state 파일에 남겨서 Airflow 재시도 때 이미 올라간 위치부터 이어서 보냄
+
+로컬 확인:
+- fake-gcs-server: STORAGE_EMULATOR_HOST=http://localhost:4443 이면 storage_client() 가
+  인증 없이 에뮬레이터에 붙는다.
+- 네트워크 없이: benchmarks.fake_gcs.FilesystemBucket 을 bucket 과 http 로 넘긴다.
+"""
+import base64
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
+
+import google_crc32c
+import requests
+from google.auth.credentials import AnonymousCredentials
+from google.cloud import storage
+
+from pipeline.metrics import METRICS
+
+
+UPLOAD_WORKERS = int(os.getenv("GCS_UPLOAD_WORKERS", "8"))
+# resumable 청크는 256KB 배수여야 함
+CHUNK_SIZE = 8 * 1024 * 1024
+RESUMABLE_THRESHOLD = 16 * 1024 * 1024
+READ_SIZE = 1024 * 1024
+
+
+@lru_cache(maxsize=None)
+def storage_client(key_path):
+    """서비스 계정 키로 만든 클라이언트 (STORAGE_EMULATOR_HOST 가 있으면 에뮬레이터용 익명 클라이언트)
+
+    키 파일 읽기 / 인증 세션 준비를 Task 마다 반복하지 않도록 프로세스 안에서 key_path 별로 재사용.
+    """
+    if os.getenv("STORAGE_EMULATOR_HOST"):
+        return storage.Client(project=os.getenv("GCP_PROJECT_ID", "local"), credentials=AnonymousCredentials())
+    return storage.Client.from_service_account_json(key_path)
+
+
+def file_checksums(path):
+    """GCS 메타데이터와 같은 형식 (base64) 의 (md5, crc32c)"""
+    md5 = hashlib.md5()
+    crc32c = google_crc32c.Checksum()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(READ_SIZE), b""):
+            md5.update(chunk)
+            crc32c.update(chunk)
+    return base64.b64encode(md5.digest()).decode(), base64.b64encode(crc32c.digest()).decode()
+
+
+def same_content(blob, size, md5, crc32c):
+    if blob is None or blob.size != size:
+        return False
+    if blob.md5_hash:
+        return blob.md5_hash == md5
+    return blob.crc32c == crc32c
+
+
+def committed_offset(response):
+    """308 응답의 Range: bytes=0-N 헤더로 서버가 받은 바이트 수"""
+    received = response.headers.get("Range")
+    if not received:
+        return 0
+    return int(received.rsplit("-", 1)[1]) + 1
+
+
+class GcsUploader:
+    """(로컬 경로, 객체 이름) 목록을 병렬로 올린다.
+
+    bucket 은 google.cloud.storage.Bucket (또는 같은 메서드를 가진 가짜),
+    http 는 resumable 세션 URL 로 PUT 을 보낼 requests 호환 객체.
+    """
+
+    def __init__(self, bucket, http=None, workers=UPLOAD_WORKERS, chunk_size=CHUNK_SIZE,
+                 resumable_threshold=RESUMABLE_THRESHOLD, state_path=None):
+        self.bucket = bucket
+        self.http = http or requests.Session()
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.resumable_threshold = resumable_threshold
+        self.state_path = state_path
+        self._lock = threading.Lock()
+        self._sessions = {}
+        if state_path and os.path.exists(state_path):
+            with open(state_path, encoding="utf-8") as f:
+                self._sessions = json.load(f)
+
+    def _save_sessions(self):
+        if not self.state_path:
+            return
+        os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._sessions, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.state_path)
+
+    def _set_session(self, blob_name, session):
+        with self._lock:
+            if session is None:
+                self._sessions.pop(blob_name, None)
+            else:
+                self._sessions[blob_name] = session
+            self._save_sessions()
+
+    def _resume_offset(self, session, size):
+        """저장된 세션이 아직 살아 있으면 이어서 보낼 위치, 아니면 None"""
+        response = self.http.put(session["url"], headers={"Content-Range": f"bytes */{size}"})
+        if response.status_code == 308:
+            return committed_offset(response)
+        if response.status_code in (200, 201):
+            return size
+        # 404/410: 세션 만료 (일주일) -> 새로 시작
+        return None
+
+    def _upload_resumable(self, blob_name, path, size, md5):
+        session = self._sessions.get(blob_name)
+        offset = None
+        if session and session["md5"] == md5 and session["size"] == size:
+            offset = self._resume_offset(session, size)
+            if offset:
+                print(f"이어서 업로드: {blob_name} ({offset}/{size} bytes 부터)")
+        if offset is None:
+            url = self.bucket.blob(blob_name).create_resumable_upload_session(size=size)
+            session = {"url": url, "md5": md5, "size": size}
+            self._set_session(blob_name, session)
+            offset = 0
+
+        with open(path, "rb") as f:
+            while offset < size:
+                f.seek(offset)
+                data = f.read(self.chunk_size)
+                end = offset + len(data) - 1
+                response = self.http.put(session["url"], data=data,
+                                         headers={"Content-Range": f"bytes {offset}-{end}/{size}"})
+                if response.status_code in (200, 201):
+                    offset = size
+                elif response.status_code == 308:
+                    offset = committed_offset(response)
+                else:
+                    raise RuntimeError(f"resumable 업로드 실패 {blob_name}: HTTP {response.status_code}")
+        self._set_session(blob_name, None)
+
+    def upload(self, path, blob_name):
+        """파일 하나 업로드. 'uploaded' 또는 'skipped' 를 돌려준다."""
+        started = time.perf_counter()
+        size = os.path.getsize(path)
+        md5, crc32c = file_checksums(path)
+        if same_content(self.bucket.get_blob(blob_name), size, md5, crc32c):
+            METRICS.inc("gcs_files_total", result="skipped")
+            return "skipped"
+
+        if size >= self.resumable_threshold:
+            self._upload_resumable(blob_name, path, size, md5)
+        else:
+            self.bucket.blob(blob_name).upload_from_filename(path, checksum="md5")
+
+        # 올라간 객체의 체크섬으로 전송 결과 확인
+        if not same_content(self.bucket.get_blob(blob_name), size, md5, crc32c):
+            raise RuntimeError(f"업로드 후 체크섬 불일치: {blob_name}")
+        METRICS.inc("gcs_files_total", result="uploaded")
+        METRICS.inc("gcs_uploaded_bytes_total", size)
+        METRICS.observe("gcs_upload_seconds", time.perf_counter() - started)
+        return "uploaded"
+
+    def upload_many(self, jobs, strict=True):
+        """jobs: (로컬 경로, 객체 이름) 목록. 결과 개수 Counter 를 돌려준다.
+
+        strict 면 실패한 파일이 있을 때 전부 시도한 뒤 RuntimeError (Airflow 재시도용).
+        """
+        counts = Counter()
+        failed = []
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {executor.submit(self.upload, path, blob_name): (path, blob_name) for path, blob_name in jobs}
+            for future in as_completed(futures):
+                path, blob_name = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"업로드 실패 ({path}): {e}")
+                    failed.append(path)
+                    counts["failed"] += 1
+                    METRICS.inc("gcs_files_total", result="failed")
+                    continue
+                counts[result] += 1
+                if result == "uploaded":
+                    print(f"업로드 성공: {path} -> gs://{self.bucket.name}/{blob_name}")
+
+        print(f"GCS 업로드: 업로드 {counts['uploaded']}개, 동일해서 건너뜀 {counts['skipped']}개, "
+              f"실패 {counts['failed']}개")
+        if failed and strict:
+            raise RuntimeError(f"GCS 업로드 실패 {len(failed)}개: {failed[:5]}")
+        return counts
+
+
+def directory_jobs(source_dir, destination_prefix, paths):
+    """source_dir 아래 파일들을 같은 상대 경로로 올리는 (경로, 객체 이름) 목록"""
+    jobs = []
+    for path in paths:
+        relative = os.path.relpath(path, source_dir).replace(os.sep, "/")
+        jobs.append((path, f"{destination_prefix}/{relative}"))
+    return jobs
+
+
+def delete_stale(bucket, prefix, keep):
+    """prefix/ 아래에서 keep (객체 이름 집합) 에 없는 객체를 지우고 지운 개수를 돌려준다.
+
+    디렉터리 단위로 올린 결과(예: Parquet 파티션)에서 이번 실행에 없는 이전 파일이
+    와일드카드 적재에 섞이지 않도록 업로드 뒤에 호출한다.
+    """
+    keep = set(keep)
+    deleted = 0
+    for blob in bucket.list_blobs(prefix=prefix.rstrip("/") + "/"):
+        if blob.name not in keep:
+            blob.delete()
+            deleted += 1
+    if deleted:
+        print(f"이전 실행의 객체 삭제: gs://{bucket.name}/{prefix}/ ({deleted}개)")
+    return deleted
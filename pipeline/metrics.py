@@ -0,0 +1,242 @@
+"""수집/적재 단계 계측
+
+print 로그만으로는 느린 실행이 API 지연 때문인지 XML 파싱, DataFrame 생성, 파일 쓰기,
+GCS/BigQuery 호출 때문인지 알 수 없어서 숫자로 남긴다.
+
+- 요청: 엔드포인트/구별 지연 히스토그램, 파싱 시간, 응답 바이트/item 수, 결과 코드(HTTP/API 오류),
+  재시도 수, 속도 조절(AIMD) 횟수와 마지막 동시 요청 수/초당 요청 수
+- 단계: stage("collect") 블록의 소요 시간, 프로세스 최대 RSS
+- 내보내기: Prometheus textfile (node_exporter textfile collector 용) / JSON, Airflow XCom
+- 프로파일링 (선택): PIPELINE_PROFILE=collect,write_csv (또는 all)
+  PIPELINE_PROFILE_MODE=cprofile(기본) | tracemalloc, 결과는 PIPELINE_PROFILE_DIR 에 저장
+
+프로세스마다 전역 METRICS 하나에 모으고, Airflow Task 는 instrumented() 로 감싸서
+Task 시작 때 비우고 끝날 때 XCom(key='metrics') 과 파일로 내보낸다.
+"""
+import cProfile
+import functools
+import json
+import os
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+
+# 초 단위 버킷 (RTMS 응답은 보통 0.1~2초)
+LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+METRICS_DIR = os.getenv("METRICS_DIR", "metrics")
+PROFILE_STAGES = {name for name in os.getenv("PIPELINE_PROFILE", "").split(",") if name}
+PROFILE_MODE = os.getenv("PIPELINE_PROFILE_MODE", "cprofile")
+PROFILE_DIR = os.getenv("PIPELINE_PROFILE_DIR", "profiles")
+
+# Linux 의 ru_maxrss 는 KB, macOS 는 바이트
+RSS_UNIT = 1 if sys.platform == "darwin" else 1024
+
+
+def peak_rss_bytes():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * RSS_UNIT
+
+
+class Histogram:
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+
+def label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in pairs) + "}"
+
+
+class MetricsRegistry:
+    """카운터 / 게이지 / 히스토그램 모음 (업로드 스레드에서도 쓰므로 잠금 사용)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counters = {}
+            self.gauges = {}
+            self.histograms = {}
+
+    def inc(self, name, value=1, **labels):
+        key = (name, label_key(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        with self._lock:
+            self.gauges[(name, label_key(labels))] = value
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS, **labels):
+        key = (name, label_key(labels))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def snapshot(self):
+        """JSON / XCom 으로 넘길 수 있는 dict"""
+        with self._lock:
+            return {
+                "counters": [{"name": name, "labels": dict(labels), "value": value}
+                             for (name, labels), value in sorted(self.counters.items())],
+                "gauges": [{"name": name, "labels": dict(labels), "value": value}
+                           for (name, labels), value in sorted(self.gauges.items())],
+                "histograms": [{"name": name, "labels": dict(labels), "buckets": list(h.buckets),
+                                "counts": list(h.counts), "sum": h.sum, "count": h.count}
+                               for (name, labels), h in sorted(self.histograms.items())],
+            }
+
+    def to_prometheus(self, extra_labels=None):
+        """Prometheus text exposition 형식"""
+        extra = label_key(extra_labels or {})
+        lines = []
+        with self._lock:
+            for kind, series in (("counter", self.counters), ("gauge", self.gauges)):
+                declared = set()
+                for (name, labels), value in sorted(series.items()):
+                    if name not in declared:
+                        lines.append(f"# TYPE {name} {kind}")
+                        declared.add(name)
+                    lines.append(f"{name}{format_labels(labels, extra)} {value}")
+            declared = set()
+            for (name, labels), h in sorted(self.histograms.items()):
+                if name not in declared:
+                    lines.append(f"# TYPE {name} histogram")
+                    declared.add(name)
+                for bound, count in zip(h.buckets, h.counts):
+                    lines.append(f"{name}_bucket{format_labels(labels, extra + (('le', bound),))} {count}")
+                lines.append(f"{name}_bucket{format_labels(labels, extra + (('le', '+Inf'),))} {h.count}")
+                lines.append(f"{name}_sum{format_labels(labels, extra)} {h.sum}")
+                lines.append(f"{name}_count{format_labels(labels, extra)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+    def write_report(self, name, directory=METRICS_DIR, extra_labels=None):
+        """{directory}/{name}.prom 과 {name}.json 을 쓰고 경로를 돌려준다.
+
+        textfile collector 가 쓰다 만 파일을 읽지 않도록 임시 파일을 쓴 뒤 이름을 바꾼다.
+        """
+        os.makedirs(directory, exist_ok=True)
+        prom_path = os.path.join(directory, f"{name}.prom")
+        json_path = os.path.join(directory, f"{name}.json")
+        for path, content in ((prom_path, self.to_prometheus(extra_labels)),
+                              (json_path, json.dumps(self.snapshot(), ensure_ascii=False, indent=2))):
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+        return prom_path, json_path
+
+
+METRICS = MetricsRegistry()
+
+
+def record_response(endpoint, district, seconds, status, response_bytes=0, items=0, parse_seconds=0.0):
+    """RTMS 요청 하나의 결과 (status: ok / http_500 / api_22 / error / cache)"""
+    METRICS.inc("rtms_requests_total", endpoint=endpoint, status=status)
+    if status == "cache":
+        return
+    METRICS.observe("rtms_request_seconds", seconds, endpoint=endpoint, district=district)
+    if status == "ok":
+        METRICS.inc("rtms_response_bytes_total", response_bytes, endpoint=endpoint)
+        METRICS.inc("rtms_response_items_total", items, endpoint=endpoint)
+        METRICS.observe("rtms_parse_seconds", parse_seconds, endpoint=endpoint)
+
+
+@contextmanager
+def profiled(name):
+    """PIPELINE_PROFILE 에 들어 있는 단계만 cProfile / tracemalloc 결과를 파일로 남김"""
+    if name not in PROFILE_STAGES and "all" not in PROFILE_STAGES:
+        yield
+        return
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    if PROFILE_MODE == "tracemalloc":
+        tracemalloc.start()
+        try:
+            yield
+        finally:
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            METRICS.set("stage_traced_peak_bytes", peak, stage=name)
+            path = os.path.join(PROFILE_DIR, f"{name}.tracemalloc.txt")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(f"peak {peak} bytes\n")
+                for stat in snapshot.statistics("lineno")[:30]:
+                    f.write(f"{stat}\n")
+            print(f"[profile] {name}: {path}")
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        path = os.path.join(PROFILE_DIR, f"{name}.prof")
+        profiler.dump_stats(path)
+        print(f"[profile] {name}: {path} (python -m pstats {path})")
+
+
+@contextmanager
+def stage(name):
+    """단계 소요 시간과 최대 RSS 기록 (+ 선택적 프로파일링)"""
+    rss_before = peak_rss_bytes()
+    started = time.perf_counter()
+    status = "error"
+    try:
+        with profiled(name):
+            yield
+        status = "ok"
+    finally:
+        METRICS.set("stage_seconds", time.perf_counter() - started, stage=name)
+        METRICS.set("stage_peak_rss_bytes", peak_rss_bytes(), stage=name)
+        # 최대 RSS 는 프로세스 누적 최고치라서 이 단계에서 늘어난 만큼도 따로 남김
+        METRICS.set("stage_peak_rss_growth_bytes", peak_rss_bytes() - rss_before, stage=name)
+        METRICS.inc("stage_runs_total", stage=name, status=status)
+
+
+def instrumented(func):
+    """Airflow PythonOperator callable 용: Task 단위로 계측하고 XCom / 파일로 내보냄"""
+
+    @functools.wraps(func)
+    def wrapper(*args, **context):
+        METRICS.reset()
+        ti = context.get("task_instance")
+        task_id = getattr(ti, "task_id", func.__name__)
+        map_index = getattr(ti, "map_index", -1)
+        try:
+            with stage(task_id):
+                return func(*args, **context)
+        finally:
+            labels = {"dag_id": getattr(ti, "dag_id", ""), "task_id": task_id}
+            name = task_id if map_index is None or map_index < 0 else f"{task_id}_{map_index}"
+            directory = os.path.join(METRICS_DIR, labels["dag_id"] or "local", context.get("ds_nodash", ""))
+            METRICS.write_report(name, directory, extra_labels=labels)
+            if ti is not None:
+                ti.xcom_push(key="metrics", value=METRICS.snapshot())
+
+    return wrapper
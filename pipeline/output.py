@@ -0,0 +1,103 @@
+"""수집 결과를 타입이 있는 Parquet 파티션으로 저장
+
+    parquet/type=townhouse/year_month=202401/part-00000.parquet
+
+파티션 디렉터리 이름은 Hive 형식이지만 파일 안에도 type/year_month 컬럼을 그대로
+두기 때문에 BigQuery 는 hive 파티션 옵션 없이 SourceFormat.PARQUET 로 바로 적재한다.
+"""
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from pipeline.config import COLUMNS
+
+
+# BigQuery 스키마(load_to_bq)와 같은 타입. 반복이 많은 문자열은 dictionary 인코딩
+PARQUET_SCHEMA = pa.schema([
+    ('year_month', pa.string()),
+    ('district_code', pa.string()),
+    ('district_name', pa.dictionary(pa.int32(), pa.string())),
+    ('dong', pa.dictionary(pa.int32(), pa.string())),
+    ('jibun', pa.string()),
+    ('name', pa.dictionary(pa.int32(), pa.string())),
+    ('floor', pa.int64()),
+    ('area', pa.float64()),
+    ('deposit', pa.int64()),
+    ('monthly_rent', pa.int64()),
+    ('build_year', pa.int64()),
+    ('deal_day', pa.string()),
+    ('type', pa.string()),
+])
+
+DICTIONARY_COLUMNS = ['district_name', 'dong', 'name']
+INTEGER_COLUMNS = ['floor', 'deposit', 'monthly_rent', 'build_year']
+FLOAT_COLUMNS = ['area']
+
+PARTITION_COLUMNS = ['type', 'year_month']
+
+
+def to_typed_frame(data):
+    """문자열 행(dict 목록 또는 DataFrame)을 BigQuery 스키마 타입으로 변환
+
+    숫자로 바꿀 수 없는 값은 적재 실패 대신 null 로 두고 개수를 출력한다.
+    """
+    df = data if isinstance(data, pd.DataFrame) else pd.DataFrame(data, columns=COLUMNS)
+    df = df[COLUMNS].copy()
+    for column in INTEGER_COLUMNS + FLOAT_COLUMNS:
+        raw = df[column]
+        parsed = pd.to_numeric(raw, errors='coerce')
+        failed = int((parsed.isna() & raw.notna()).sum())
+        if failed:
+            print(f"타입 변환 실패 {column}: {failed}건 (null 로 저장)")
+        df[column] = parsed.astype('Int64') if column in INTEGER_COLUMNS else parsed.astype('float64')
+    return df
+
+
+def write_parquet_partitions(data, root_dir, part_name="part-00000"):
+    """type/year_month 별 Parquet 파일을 쓰고 파일 경로 목록을 돌려준다.
+
+    같은 파티션은 같은 파일 이름으로 덮어쓰므로 재실행해도 중복되지 않는다.
+    여러 작업이 같은 파티션에 나눠 쓸 때는 part_name 을 작업마다 다르게 준다.
+    """
+    paths = []
+    rows = 0
+    for partition_dir, table in partition_tables(data):
+        part_dir = os.path.join(root_dir, *partition_dir.split("/"))
+        os.makedirs(part_dir, exist_ok=True)
+        path = os.path.join(part_dir, f"{part_name}.parquet")
+        write_table(table, path)
+        paths.append(path)
+        rows += table.num_rows
+    print(f"Parquet 저장 완료: {rows}건, 파티션 {len(paths)}개 -> {root_dir}")
+    return paths
+
+
+def partition_tables(data):
+    """('type=.../year_month=...', pyarrow Table) 를 파티션 순서대로 내보낸다."""
+    df = to_typed_frame(data)
+    for (target_type, year_month), part in df.groupby(PARTITION_COLUMNS, sort=True):
+        # 문자열 -> dictionary 변환은 파일마다 따로 해서 그 파티션 값만 사전에 들어가게 함
+        table = pa.Table.from_pandas(part, schema=PARQUET_SCHEMA, preserve_index=False)
+        yield f"type={target_type}/year_month={year_month}", table
+
+
+def write_table(table, where):
+    """where: 파일 경로 또는 쓰기 가능한 파일 객체 (pyarrow BufferOutputStream 등)"""
+    pq.write_table(table, where, use_dictionary=DICTIONARY_COLUMNS, compression='snappy')
+
+
+def list_parquet_files(root_dir):
+    paths = []
+    for dirpath, _, filenames in os.walk(root_dir):
+        paths.extend(os.path.join(dirpath, name) for name in filenames if name.endswith('.parquet'))
+    return sorted(paths)
+
+
+def read_parquet_partitions(root_dir, columns=None):
+    """파티션 디렉터리 전체를 하나의 DataFrame 으로 읽기
+
+    type/year_month 는 파일 안에도 있으므로 디렉터리 이름 기반 hive 추론은 끈다.
+    """
+    return pq.read_table(root_dir, columns=columns, partitioning=None).to_pandas()
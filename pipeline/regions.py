@@ -0,0 +1,54 @@
+"""전국 시군구 LAWD 코드 목록 (pipeline/regions.csv)
+
+RTMS API 의 LAWD_CD 는 법정동 코드 앞 5자리(시군구)다. 행정구역이 바뀌면
+코드를 고치지 말고 CSV 만 고친다 (RTMS_REGIONS_PATH 로 다른 파일 지정 가능).
+
+    lawd_cd,province_code,province,district_name
+    11110,11,서울특별시,종로구
+    41111,41,경기도,수원시 장안구
+
+시도는 이름(서울특별시) 또는 코드 앞 2자리(11)로 고른다.
+"""
+import csv
+import os
+from collections import namedtuple
+from functools import lru_cache
+
+
+REGIONS_PATH = os.getenv("RTMS_REGIONS_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "regions.csv"))
+
+Region = namedtuple('Region', ['lawd_cd', 'province_code', 'province', 'district_name'])
+
+
+@lru_cache(maxsize=None)
+def load_regions(path=REGIONS_PATH):
+    with open(path, newline="", encoding="utf-8") as f:
+        return tuple(Region(**row) for row in csv.DictReader(f))
+
+
+def provinces(path=REGIONS_PATH):
+    """(시도 코드, 시도 이름) 목록 (파일 순서)"""
+    return list(dict.fromkeys((region.province_code, region.province) for region in load_regions(path)))
+
+
+def select_districts(selected=None, path=REGIONS_PATH):
+    """고른 시도의 {LAWD_CD: 시군구 이름}. selected 가 비어 있거나 'all' 이면 전국"""
+    regions = load_regions(path)
+    selected = [name.strip() for name in (selected or []) if name.strip()]
+    if not selected or "all" in selected:
+        return {region.lawd_cd: region.district_name for region in regions}
+
+    known = {code for code, _ in provinces(path)} | {name for _, name in provinces(path)}
+    unknown = [name for name in selected if name not in known]
+    if unknown:
+        raise ValueError(f"알 수 없는 시도: {unknown} (코드 또는 이름: {provinces(path)})")
+    return {region.lawd_cd: region.district_name for region in regions
+            if region.province_code in selected or region.province in selected}
+
+
+def describe_selection(selected=None, path=REGIONS_PATH):
+    """DAG 설명 등에 쓰는 고른 시도 이름 ('서울특별시', '서울특별시, 경기도', 전국이면 '전국')"""
+    selected = [name.strip() for name in (selected or []) if name.strip()]
+    if not selected or "all" in selected:
+        return "전국"
+    return ", ".join(name for code, name in provinces(path) if code in selected or name in selected)
@@ -0,0 +1,106 @@
+"""대시보드 집계(rent_market_rollup)의 로컬 계산
+
+pipeline/bq.py 의 ROLLUP_SELECT 와 같은 키 / 건수 / 합계를 Parquet 파티션 파일에서 바로 만든다.
+계약월마다 파일 하나라서 새로 수집한 계약월만 다시 쓴다.
+
+    rollup/deal_month=202401/rollup.parquet
+
+BigQuery 와 다른 부분
+- 분위수: KLL 스케치(BYTES)는 BigQuery 밖에서 만들 수 없으므로 스케치 컬럼 없이
+  p25/p50/p75 를 그 그룹 값에서 바로 구한다 (근사가 아닌 실제 값, 보간 없이 가장 가까운 값)
+- area 가 0 인 행의 평당 값은 null (BigQuery 는 0 나누기 오류, 검증 단계에서 이미 걸러짐)
+
+실행: python -m pipeline.rollup parquet rollup [202401 202402 ...]  (계약월을 안 주면 전체)
+"""
+import glob
+import os
+import sys
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+from pipeline.config import ROLLUP_KEY, ROLLUP_QUANTILES
+from pipeline.transform import market_view_frame
+
+
+ROLLUP_FILE = "rollup.parquet"
+
+
+def rollup_frame(data):
+    """수집 행 (문자열 / 타입 있는 DataFrame) -> ROLLUP_KEY 별 집계 DataFrame"""
+    view = market_view_frame(data)
+    df = pd.DataFrame({
+        'district_code': data['district_code'].astype(str).to_numpy(),
+        'district_name': view['district_name'].astype(str).to_numpy(),
+        'dong': view['dong'].astype(str).to_numpy(),
+        'deal_date': view['deal_date'].to_numpy(),
+        'type': data['type'].astype(str).to_numpy(),
+        'rent_type': view['rent_type'].to_numpy(),
+        'deposit': view['deposit'].astype('float64').to_numpy(),
+        'monthly_rent': view['monthly_rent'].astype('float64').to_numpy(),
+        'area_m2': view['area_m2'].to_numpy(dtype='float64'),
+        'deposit_per_pyung': view['deposit_per_pyung'].to_numpy(),
+        'rent_per_pyung': view['rent_per_pyung'].to_numpy(),
+    })
+    groups = df.groupby(ROLLUP_KEY, sort=True, dropna=False)
+    out = groups.agg(
+        transaction_count=('deposit', 'size'),
+        deposit_sum=('deposit', 'sum'),
+        monthly_rent_sum=('monthly_rent', 'sum'),
+        area_m2_sum=('area_m2', 'sum'),
+        deposit_per_pyung_count=('deposit_per_pyung', 'count'),
+        deposit_per_pyung_sum=('deposit_per_pyung', 'sum'),
+        rent_per_pyung_sum=('rent_per_pyung', 'sum'),
+    )
+    for name, value in ROLLUP_QUANTILES.items():
+        out[f'deposit_per_pyung_{name}'] = groups['deposit_per_pyung'].quantile(value, interpolation='nearest')
+    out = out.reset_index()
+    for column in ['deposit_sum', 'monthly_rent_sum']:
+        out[column] = out[column].round().astype('Int64')
+    return out
+
+
+def partition_months(parquet_root):
+    """파티션 디렉터리에 있는 계약월 (YYYYMM) 목록"""
+    found = glob.glob(os.path.join(parquet_root, "type=*", "year_month=*"))
+    return sorted({path.rsplit("year_month=", 1)[1] for path in found})
+
+
+def read_month(parquet_root, year_month):
+    """모든 유형의 한 계약월 파티션 파일만 읽기"""
+    paths = sorted(glob.glob(os.path.join(parquet_root, "type=*", f"year_month={year_month}", "*.parquet")))
+    if not paths:
+        return None
+    return pq.read_table(paths, partitioning=None).to_pandas()
+
+
+def build_rollups(parquet_root, output_dir, months=None):
+    """months (없으면 전체) 계약월의 집계 파일만 다시 쓰고 {계약월: 집계 행 수} 를 돌려준다.
+
+    원본 파티션이 없어진 계약월은 집계 파일도 지운다.
+    """
+    months = sorted(months or partition_months(parquet_root))
+    written = {}
+    for year_month in months:
+        path = os.path.join(output_dir, f"deal_month={year_month}", ROLLUP_FILE)
+        data = read_month(parquet_root, year_month)
+        if data is None or not len(data):
+            if os.path.exists(path):
+                os.remove(path)
+            continue
+        rollup = rollup_frame(data)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".tmp"
+        rollup.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+        written[year_month] = len(rollup)
+        print(f"집계 갱신: {path} ({len(data)}건 -> {len(rollup)}행)")
+    return written
+
+
+def read_rollups(output_dir):
+    return pq.read_table(output_dir, partitioning=None).to_pandas()
+
+
+if __name__ == "__main__":
+    build_rollups(sys.argv[1], sys.argv[2], sys.argv[3:] or None)
@@ -0,0 +1,197 @@
+"""로컬 staging 파일 없이 수집 결과를 GCS 로 바로 보내기 (스트리밍 모드)
+
+기존 흐름은 샤드 파일 -> STAGING_DIR/rent_data_{ym}.csv 병합 -> 업로드라서 달 전체가
+로컬 디스크를 두 번 거치고, 업로드는 마지막 샤드가 끝난 뒤에야 시작한다. 스트리밍 모드는
+
+- PartWriter 를 collect(..., sink=writer) 에 넘겨서 페이지를 파싱할 때마다 그 행을 받는다.
+  STREAM_CHUNK_ROWS 행이 모이면 그 조각만 검증하고 CSV(헤더 없음) 또는 Parquet 바이트로
+  인코딩해서 part 객체로 올린다. 업로드는 백그라운드 스레드에서 돌아서 남은 페이지 수집과 겹친다.
+- 들고 있는 것은 모으는 중인 조각 하나 + 아직 올라가지 않은 조각 STREAM_MAX_PENDING 개 +
+  받는 중인 페이지들이라서, 단위(유형 x 구 x 계약월) 하나가 커도 단위 전체가 메모리에 올라오지 않는다.
+- 단위가 중간에 실패하면 앞 페이지의 조각은 이미 올라가 있을 수 있다. 그래서 collect 는 strict=True
+  로 실패를 Task 실패로 올리고, 재시도하는 Task 가 delete_parts 로 이전 조각을 먼저 지운다.
+- CSV 는 헤더 객체 + part 객체를 GCS compose (서버 쪽 이어 붙이기) 로 파일 하나로 만든다.
+  compose 한 번에 32개까지라서 넘으면 중간 객체로 단계적으로 합친다.
+- Parquet 은 파티션 경로 그대로 올리므로 합치지 않고 와일드카드로 적재한다.
+
+    with PartWriter(bucket, "raw/monthly/202401/parts", "townhouse_11110", validate=True) as writer:
+        collect(units, sink=writer, strict=True)
+    write_quarantine(writer.rejected_frame(), "quarantine/townhouse_11110.csv")
+    compose_csv(bucket, writer.names, "raw/monthly/202401/rent_data.csv")
+"""
+import codecs
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pyarrow as pa
+
+from pipeline.accumulator import RowAccumulator
+from pipeline.config import COLUMNS
+from pipeline.metrics import METRICS
+from pipeline.output import partition_tables, write_table
+from pipeline.validate import QUARANTINE_COLUMNS, validate_frame
+
+
+STREAM_CHUNK_ROWS = int(os.getenv("STREAM_CHUNK_ROWS", "50000"))
+STREAM_MAX_PENDING = int(os.getenv("STREAM_MAX_PENDING", "2"))
+
+# GCS compose 한 번에 합칠 수 있는 원본 객체 수
+COMPOSE_LIMIT = 32
+
+CONTENT_TYPES = {"csv": "text/csv", "parquet": "application/octet-stream"}
+
+
+class PartWriter:
+    """수집 행 (또는 DataFrame) 을 조각 단위로 인코딩해서 '{prefix}/{part_name}-NNNNN.csv' 객체로 올린다.
+
+    Parquet 은 '{prefix}/type=.../year_month=.../{part_name}-NNNNN.parquet'.
+    extend(rows) 로 파서 행을 받으면 chunk_rows 행마다 조각을 만들고, validate 면 조각마다
+    validate_frame 을 거쳐서 걸린 행은 rejected 에 모은다 (rejected_frame()).
+    올린 객체 이름은 names 에 순서대로 쌓이고, close() 가 남은 행을 올리고 모든 업로드를 기다린다.
+    """
+
+    def __init__(self, bucket, prefix, part_name, output_format="csv", chunk_rows=STREAM_CHUNK_ROWS,
+                 max_pending=STREAM_MAX_PENDING, validate=False):
+        self.bucket = bucket
+        self.prefix = prefix
+        self.part_name = part_name
+        self.output_format = output_format
+        self.chunk_rows = chunk_rows
+        self.max_pending = max_pending
+        self.validate = validate
+        self.names = []
+        self.rows = 0
+        self.rejected = []
+        self._buffer = RowAccumulator()
+        self._executor = ThreadPoolExecutor(max_workers=max_pending)
+        self._pending = deque()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            # 수집이 실패하면 남은 행은 올리지 않음 (재시도 때 delete_parts 로 이번 조각도 지워짐)
+            self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def _upload(self, name, data):
+        started = time.perf_counter()
+        self.bucket.blob(name).upload_from_string(data, content_type=CONTENT_TYPES[self.output_format],
+                                                  checksum="md5")
+        METRICS.inc("gcs_files_total", result="uploaded")
+        METRICS.inc("gcs_uploaded_bytes_total", len(data))
+        METRICS.observe("gcs_upload_seconds", time.perf_counter() - started)
+
+    def _submit(self, name, data):
+        # 대기 중인 업로드가 꽉 차면 가장 오래된 것이 끝날 때까지 인코딩을 멈춤 (메모리 상한)
+        while len(self._pending) >= self.max_pending:
+            self._pending.popleft().result()
+        self._pending.append(self._executor.submit(self._upload, name, data))
+        self.names.append(name)
+
+    def _next_name(self, directory, extension):
+        return f"{directory}/{self.part_name}-{len(self.names):05d}.{extension}"
+
+    def extend(self, rows):
+        """파서 행 (dict) 을 받아 chunk_rows 행이 모일 때마다 조각으로 올림"""
+        for row in rows:
+            self._buffer.append(row)
+            if len(self._buffer) >= self.chunk_rows:
+                self._flush()
+
+    def _flush(self):
+        if not len(self._buffer):
+            return
+        df, self._buffer = self._buffer.to_pandas(), RowAccumulator()
+        if self.validate:
+            df, rejected = validate_frame(df)
+            if len(rejected):
+                self.rejected.append(rejected)
+        self.write_frame(df)
+
+    def rejected_frame(self):
+        if not self.rejected:
+            return pd.DataFrame(columns=QUARANTINE_COLUMNS)
+        return pd.concat(self.rejected, ignore_index=True)
+
+    def write_frame(self, df):
+        self.rows += len(df)
+        for start in range(0, len(df), self.chunk_rows):
+            chunk = df.iloc[start:start + self.chunk_rows]
+            if self.output_format == "parquet":
+                for partition_dir, table in partition_tables(chunk):
+                    sink = pa.BufferOutputStream()
+                    write_table(table, sink)
+                    self._submit(self._next_name(f"{self.prefix}/{partition_dir}", "parquet"),
+                                 sink.getvalue().to_pybytes())
+            else:
+                data = chunk[COLUMNS].to_csv(index=False, header=False).encode("utf-8")
+                self._submit(self._next_name(self.prefix, "csv"), data)
+
+    def close(self):
+        """남은 행을 올리고 모든 업로드를 기다린 뒤 올린 객체 이름 목록을 돌려준다 (실패가 있으면 예외)"""
+        try:
+            self._flush()
+            while self._pending:
+                self._pending.popleft().result()
+        finally:
+            self._executor.shutdown(wait=True)
+        return self.names
+
+
+def delete_parts(bucket, prefix, part_name):
+    """prefix 아래에서 part_name 으로 시작하는 객체(이전 실행의 조각)를 지운다."""
+    deleted = 0
+    for blob in bucket.list_blobs(prefix=prefix):
+        base = blob.name.rsplit("/", 1)[-1]
+        if base.startswith(part_name) and base[len(part_name):][:1] in ("-", "."):
+            blob.delete()
+            deleted += 1
+    if deleted:
+        print(f"이전 조각 삭제: gs://{bucket.name}/{prefix} {part_name} ({deleted}개)")
+    return deleted
+
+
+def compose(bucket, names, destination, content_type="text/csv"):
+    """names 객체들을 순서대로 이어 붙인 destination 객체를 만든다 (32개 넘으면 단계적으로)"""
+    sources = [bucket.blob(name) for name in names]
+    intermediates = []
+    level = 0
+    while len(sources) > COMPOSE_LIMIT:
+        merged = []
+        for i in range(0, len(sources), COMPOSE_LIMIT):
+            blob = bucket.blob(f"{destination}.compose/{level}-{i // COMPOSE_LIMIT:05d}")
+            blob.content_type = content_type
+            blob.compose(sources[i:i + COMPOSE_LIMIT])
+            merged.append(blob)
+        intermediates.extend(merged)
+        sources = merged
+        level += 1
+
+    final = bucket.blob(destination)
+    final.content_type = content_type
+    final.compose(sources)
+    for blob in intermediates:
+        blob.delete()
+    METRICS.inc("gcs_compose_total")
+    return final
+
+
+def compose_csv(bucket, names, destination):
+    """헤더 한 줄(utf-8-sig, 로컬 병합 파일과 같은 형식) + part 객체들로 CSV 객체 하나를 만든다.
+
+    compose 가 끝나면 원본 part 객체는 지운다 (합친 객체만 남음).
+    """
+    header_name = f"{destination}.header"
+    header = codecs.BOM_UTF8 + (",".join(COLUMNS) + "\n").encode("utf-8")
+    bucket.blob(header_name).upload_from_string(header, content_type="text/csv")
+    compose(bucket, [header_name] + list(names), destination)
+    for name in [header_name] + list(names):
+        bucket.blob(name).delete()
+    print(f"GCS compose 완료: gs://{bucket.name}/{destination} (조각 {len(names)}개)")
+    return f"gs://{bucket.name}/{destination}"
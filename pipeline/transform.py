@@ -0,0 +1,145 @@
+"""rent_market_view 파생 컬럼의 로컬(벡터화) 계산
+
+pipeline/bq.py 의 MARKET_VIEW_SELECT 와 같은 결과를 pandas/NumPy 배열 연산으로 만든다.
+웨어하우스 왕복 없이 수집 파일로 바로 확인하거나 수집 단계에서 미리 계산할 때 사용.
+
+BigQuery 와 맞춘 부분
+- ROUND: 0.5 는 0 에서 먼 쪽으로 (NumPy 기본은 짝수 쪽)
+- deposit_korean: FLOOR(deposit / 10000) || '억 ' || (나머지 > 0 이면 나머지 || '만원')
+  (나머지가 0 이면 '억 ' 뒤 공백이 그대로 남는 것까지 동일), 1억 미만은 deposit || '만원'
+- rent_type: monthly_rent 가 null 이면 IF 조건이 거짓이라 'Monthly'
+- area 가 0 이면 BigQuery 는 0 나누기 오류로 쿼리 전체가 실패하지만 여기서는 null
+"""
+import sys
+
+import numpy as np
+import pandas as pd
+
+from pipeline.output import to_typed_frame
+
+
+PYUNG = 3.3058
+
+MARKET_VIEW_COLUMNS = [
+    'district_name', 'dong', 'building_name', 'build_year', 'floor',
+    'deal_date', 'deal_year', 'deal_month',
+    'area_m2', 'area_pyung', 'deposit', 'monthly_rent',
+    'deposit_korean', 'deposit_per_pyung', 'rent_per_pyung', 'rent_type',
+]
+
+NUMERIC_COLUMNS = [
+    'build_year', 'floor', 'deal_year', 'deal_month', 'area_m2', 'area_pyung',
+    'deposit', 'monthly_rent', 'deposit_per_pyung', 'rent_per_pyung',
+]
+
+
+def sql_round(values, digits=0):
+    """BigQuery ROUND (half away from zero)"""
+    scale = 10.0 ** digits
+    return np.sign(values) * np.floor(np.abs(values) * scale + 0.5) / scale
+
+
+def format_korean_won(deposit):
+    """보증금(만원) -> '1억 5000만원' 형식 문자열 Series
+
+    같은 금액이 많으므로 고유값만 배열 연산으로 만들고 코드로 펼친다.
+    """
+    codes, uniques = pd.factorize(deposit, use_na_sentinel=True)
+    values = np.asarray(uniques, dtype=np.int64)
+    eok, man = np.divmod(values, 10000)
+    big = np.char.add(np.char.add(eok.astype(str), '억 '),
+                      np.where(man > 0, np.char.add(man.astype(str), '만원'), ''))
+    small = np.char.add(values.astype(str), '만원')
+    formatted = np.where(values >= 10000, big, small).astype(object)
+    # 코드 -1 (null) 은 마지막에 붙인 None 을 가리킴
+    result = np.append(formatted, None)[codes]
+    return pd.Series(result, index=deposit.index, dtype=object)
+
+
+def market_view_frame(data):
+    """수집 행(dict 목록 / 문자열 DataFrame / 타입 있는 DataFrame) -> rent_market_view 와 같은 컬럼"""
+    df = to_typed_frame(data)
+    area = df['area'].to_numpy(dtype=np.float64, na_value=np.nan)
+    deposit = df['deposit'].to_numpy(dtype=np.float64, na_value=np.nan)
+    monthly_rent = df['monthly_rent'].to_numpy(dtype=np.float64, na_value=np.nan)
+
+    pyung = area / PYUNG
+    with np.errstate(divide='ignore', invalid='ignore'):
+        deposit_per_pyung = np.where(pyung != 0, sql_round(deposit / pyung), np.nan)
+        rent_per_pyung = np.where(monthly_rent > 0, sql_round(monthly_rent / pyung), 0.0)
+    rent_per_pyung[(monthly_rent > 0) & (pyung == 0)] = np.nan
+
+    # 계약월 종류는 몇 개 안 되므로 고유값만 날짜로 바꾸고 펼침
+    month_codes, year_months = pd.factorize(df['year_month'], use_na_sentinel=True)
+    month_starts = pd.to_datetime(pd.Series(year_months, dtype=object), format='%Y%m', errors='coerce')
+    deal_date = np.append(month_starts.dt.date.to_numpy(dtype=object), None)[month_codes]
+    deal_year = pd.array(np.append(month_starts.dt.year.to_numpy(), np.nan)[month_codes], dtype='Int64')
+    deal_month = pd.array(np.append(month_starts.dt.month.to_numpy(), np.nan)[month_codes], dtype='Int64')
+
+    out = pd.DataFrame({
+        'district_name': df['district_name'],
+        'dong': df['dong'],
+        'building_name': df['name'],
+        'build_year': df['build_year'],
+        'floor': df['floor'],
+        'deal_date': deal_date,
+        'deal_year': deal_year,
+        'deal_month': deal_month,
+        'area_m2': df['area'],
+        'area_pyung': sql_round(pyung, 1),
+        'deposit': df['deposit'],
+        'monthly_rent': df['monthly_rent'],
+        'deposit_korean': format_korean_won(df['deposit']),
+        'deposit_per_pyung': deposit_per_pyung,
+        'rent_per_pyung': rent_per_pyung,
+        'rent_type': np.where(monthly_rent == 0, 'Jeonse', 'Monthly'),
+    })
+    return out[MARKET_VIEW_COLUMNS]
+
+
+def compare_frames(local, remote, tolerance=1e-9):
+    """컬럼별 불일치 행 수 (행 순서는 상관없이 같은 키 기준으로 정렬해서 비교)"""
+    keys = ['district_name', 'dong', 'building_name', 'floor', 'area_m2', 'deposit', 'monthly_rent']
+    local = local[MARKET_VIEW_COLUMNS].sort_values(keys, kind='stable').reset_index(drop=True)
+    remote = remote[MARKET_VIEW_COLUMNS].sort_values(keys, kind='stable').reset_index(drop=True)
+    if len(local) != len(remote):
+        return {'row_count': abs(len(local) - len(remote))}
+    mismatches = {}
+    for column in MARKET_VIEW_COLUMNS:
+        a, b = local[column], remote[column]
+        both_null = a.isna().to_numpy() & b.isna().to_numpy()
+        if column in NUMERIC_COLUMNS:
+            same = np.isclose(pd.to_numeric(a).to_numpy(dtype=np.float64, na_value=np.nan),
+                              pd.to_numeric(b).to_numpy(dtype=np.float64, na_value=np.nan),
+                              rtol=0, atol=tolerance)
+        else:
+            same = (a.astype(str) == b.astype(str)).to_numpy()
+        count = int((~(same | both_null)).sum())
+        if count:
+            mismatches[column] = count
+    return mismatches
+
+
+def check_parity(client, source_ref, year_month):
+    """원본 테이블의 한 계약월을 BigQuery SQL 과 로컬 계산으로 각각 만들어 비교"""
+    # 로컬 계산만 쓰는 곳(rollup, 벤치마크)에서 BigQuery SDK 를 불러오지 않도록 여기서 import
+    from google.cloud import bigquery
+
+    from pipeline.bq import LOAD_COLUMNS, MARKET_VIEW_SELECT, PARTITION_FIELD
+
+    job_config = bigquery.QueryJobConfig(query_parameters=[
+        bigquery.ScalarQueryParameter("year_month", "STRING", year_month),
+    ])
+    where = f"    WHERE {PARTITION_FIELD} = PARSE_DATE('%Y%m', @year_month)\n"
+    raw = client.query(f"SELECT {LOAD_COLUMNS} FROM `{source_ref}`\n" + where, job_config=job_config).to_dataframe()
+    remote = client.query(MARKET_VIEW_SELECT.format(source_table=source_ref) + where,
+                          job_config=job_config).to_dataframe()
+    mismatches = compare_frames(market_view_frame(raw), remote)
+    print(f"패리티 확인 {year_month}: {len(raw)}행, 불일치 {mismatches or '없음'}")
+    return mismatches
+
+
+if __name__ == "__main__":
+    # 예: python -m pipeline.transform townhouse_data.csv market_view.csv
+    source = pd.read_csv(sys.argv[1], dtype=str, keep_default_na=False, encoding='utf-8-sig')
+    market_view_frame(source).to_csv(sys.argv[2], index=False, encoding='utf-8-sig')
@@ -0,0 +1,142 @@
+"""적재 전 검증 / 격리(quarantine)
+
+파서는 없는 태그를 "0" 으로 채우고, 숫자가 아닌 값은 타입 변환 때 null 이 된다.
+그런 행이 그대로 BigQuery 로 가면 적재 작업 전체가 실패하거나 (비싼 작업 재시도)
+가공 단계의 deposit / (area / 3.3058) 에서 0 으로 나누게 되므로, 적재 파일을 만들기 전에
+컬럼 단위(벡터 연산)로 한 번에 검사해서 통과한 행만 넘기고 나머지는 사유와 함께 따로 남긴다.
+
+    clean, rejected = validate_frame(df)       # rejected 에 reject_reason 컬럼 (사유;사유)
+    write_quarantine(rejected, "quarantine/townhouse_11110.csv")
+
+CSV 파일은 validate_csv() 로 조각씩 읽어서 같은 자리에 통과한 행만 다시 쓴다.
+"""
+import os
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from pipeline.config import COLUMNS, ENDPOINTS
+from pipeline.metrics import METRICS
+
+
+REJECT_COLUMN = "reject_reason"
+QUARANTINE_COLUMNS = COLUMNS + [REJECT_COLUMN]
+
+NUMERIC_COLUMNS = ['floor', 'area', 'deposit', 'monthly_rent', 'build_year', 'deal_day']
+
+# 층: 지하층은 음수, 0 은 태그가 없거나 비어 있을 때 파서가 넣는 값이라 누락으로 본다
+FLOOR_RANGE = (-10, 150)
+# 전용면적(㎡): 0 이하면 평당 가격 계산에서 0 으로 나누게 됨
+AREA_MAX = 1000
+# 건축년도: 0 은 미상으로 허용
+BUILD_YEAR_MIN = 1900
+
+
+def text(df, column):
+    return df[column].astype("string").fillna("").str.strip()
+
+
+def reject_masks(df):
+    """(사유, 걸린 행 bool Series) 목록. 숫자 컬럼은 한 번만 변환해서 같이 쓴다."""
+    numbers = {column: pd.to_numeric(df[column], errors="coerce") for column in NUMERIC_COLUMNS}
+    floor, area = numbers['floor'], numbers['area']
+    deposit, monthly_rent = numbers['deposit'], numbers['monthly_rent']
+    build_year, deal_day = numbers['build_year'], numbers['deal_day']
+    dong = text(df, 'dong')
+
+    return [
+        ("year_month_invalid", ~text(df, 'year_month').str.fullmatch(r"\d{4}(0[1-9]|1[0-2])")),
+        ("district_code_invalid", ~text(df, 'district_code').str.fullmatch(r"\d{5}")),
+        ("type_invalid", ~text(df, 'type').isin(list(ENDPOINTS))),
+        ("dong_missing", dong.isin(["", "0"])),
+        ("floor_missing", floor.isna() | (floor == 0)),
+        ("floor_out_of_range", (floor < FLOOR_RANGE[0]) | (floor > FLOOR_RANGE[1])),
+        ("area_invalid", area.isna() | (area <= 0) | (area > AREA_MAX)),
+        ("deposit_invalid", deposit.isna() | (deposit < 0) | (deposit % 1 != 0)),
+        ("monthly_rent_invalid", monthly_rent.isna() | (monthly_rent < 0) | (monthly_rent % 1 != 0)),
+        ("deposit_and_rent_zero", (deposit == 0) & (monthly_rent == 0)),
+        ("build_year_invalid", build_year.isna() | ((build_year != 0) & ((build_year < BUILD_YEAR_MIN)
+                                                                        | (build_year > date.today().year + 1)))),
+        ("deal_day_invalid", deal_day.isna() | (deal_day < 1) | (deal_day > 31)),
+    ]
+
+
+def validate_frame(df):
+    """(통과한 행, 걸린 행 + reject_reason) 두 DataFrame 을 돌려준다 (원래 컬럼/타입 유지)"""
+    # 비교 결과의 NA(값 없음)는 누락 규칙에서 따로 잡으므로 범위 규칙에서는 통과로 둔다
+    masks = [(reason, mask.fillna(False).to_numpy(dtype=bool)) for reason, mask in reject_masks(df)]
+    bad = np.zeros(len(df), dtype=bool)
+    for _, mask in masks:
+        bad |= mask
+    if not bad.any():
+        return df, df.iloc[:0].assign(**{REJECT_COLUMN: pd.Series(dtype="string")})
+
+    # 걸린 행만 사유 문자열을 만든다
+    reasons = np.full(int(bad.sum()), "", dtype=object)
+    for reason, mask in masks:
+        hit = mask[bad]
+        if hit.any():
+            reasons[hit] = reasons[hit] + (reason + ";")
+            METRICS.inc("validation_rejected_total", int(hit.sum()), reason=reason)
+    rejected = df[bad].copy()
+    rejected[REJECT_COLUMN] = [value.rstrip(";") for value in reasons]
+    counts = pd.Series([r for value in rejected[REJECT_COLUMN] for r in value.split(";")]).value_counts()
+    print(f"검증: {len(df)}건 중 {len(rejected)}건 격리 ({', '.join(f'{k} {v}' for k, v in counts.items())})")
+    return df[~bad], rejected
+
+
+def write_quarantine(rejected, path):
+    """걸린 행을 CSV 로 저장 (없으면 이전 실행의 파일을 지우고 None)"""
+    if not len(rejected):
+        if os.path.exists(path):
+            os.remove(path)
+        return None
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    rejected[QUARANTINE_COLUMNS].to_csv(path, index=False, encoding="utf-8-sig")
+    print(f"격리 파일: {path} ({len(rejected)}건)")
+    return path
+
+
+def validate_csv(path, quarantine_path, chunksize=200_000):
+    """수집 CSV (utf-8-sig) 를 조각씩 검증해서 통과한 행만 같은 경로에 다시 쓰고 (통과, 격리) 건수를 돌려준다.
+
+    격리 디렉터리 / 파일은 걸린 행이 처음 나올 때 만든다 (모두 통과하면 이전 실행의 격리 파일만 지움).
+    중간에 실패하면 원본과 이전 격리 파일은 그대로 두고 쓰다 만 임시 파일만 지운다.
+    """
+    tmp_path = path + ".tmp"
+    quarantine_tmp = quarantine_path + ".tmp"
+    quarantine = None
+    kept = rejected_count = 0
+    succeeded = False
+    reader = pd.read_csv(path, dtype=str, keep_default_na=False, encoding="utf-8-sig", chunksize=chunksize)
+    try:
+        with open(tmp_path, "w", newline="", encoding="utf-8-sig") as out:
+            out.write(",".join(COLUMNS) + "\n")
+            for chunk in reader:
+                clean, rejected = validate_frame(chunk)
+                clean[COLUMNS].to_csv(out, index=False, header=False)
+                kept += len(clean)
+                if not len(rejected):
+                    continue
+                if quarantine is None:
+                    os.makedirs(os.path.dirname(quarantine_path) or ".", exist_ok=True)
+                    quarantine = open(quarantine_tmp, "w", newline="", encoding="utf-8-sig")
+                    quarantine.write(",".join(QUARANTINE_COLUMNS) + "\n")
+                rejected[QUARANTINE_COLUMNS].to_csv(quarantine, index=False, header=False)
+                rejected_count += len(rejected)
+        succeeded = True
+    finally:
+        if quarantine is not None:
+            quarantine.close()
+        if not succeeded:
+            for partial in (tmp_path, quarantine_tmp):
+                if os.path.exists(partial):
+                    os.remove(partial)
+    os.replace(tmp_path, path)
+    if rejected_count:
+        os.replace(quarantine_tmp, quarantine_path)
+        print(f"격리 파일: {quarantine_path} ({rejected_count}건)")
+    elif os.path.exists(quarantine_path):
+        os.remove(quarantine_path)
+    return kept, rejected_count
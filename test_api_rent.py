@@ -1,23 +1,22 @@
+import os
+
 import requests
-import xml.etree.ElementTree as ET
-
-SERVICE_KEY = "YOUR_API_SERVICE_KEY_HERE"
-
-def get_text(item, tag):
-    """XML 태그에서 텍스트를 안전하게 추출하는 함수"""
-    node = item.find(tag)
-    return node.text.strip() if node is not None and node.text else "0"
-
-def test_rent_api(target_type="officetel"):
-    # 1. 목표에 따라 URL 변경
-    if target_type == "officetel":
-        # 오피스텔 전월세 URL
-        url = "https://apis.data.go.kr/1613000/RTMSDataSvcOffiRent/getRTMSDataSvcOffiRent"
-        type_name = "오피스텔"
-    else:
-        # 연립다세대 전월세 URL
-        url = "http://apis.data.go.kr/1613000/RTMSDataSvcRHRent/getRTMSDataSvcRHRent"
-        type_name = "연립다세대"
+
+from pipeline.collector import WorkUnit
+from pipeline.config import ENDPOINTS, RTMS_API_BASE
+from pipeline.parser import parse_bytes
+
+SERVICE_KEY = os.getenv("API_SERVICE_KEY", "YOUR_API_SERVICE_KEY_HERE")
+
+# 실제 API 를 부르는 수동 확인 스크립트 (pytest 수집 대상 아님): python test_api_rent.py
+# 실제 API 대신 로컬 대역으로 확인할 때:
+#   python -m benchmarks.mock_rtms --port 8080
+#   RTMS_API_BASE=http://127.0.0.1:8080/1613000 python test_api_rent.py
+
+def check_rent_api(target_type="officetel"):
+    # 1. 목표에 따라 URL 변경 (수집기와 같은 pipeline.config.ENDPOINTS 사용)
+    url = ENDPOINTS[target_type]['url']
+    type_name = "오피스텔" if target_type == "officetel" else "연립다세대"
 
     params = {
         'serviceKey': SERVICE_KEY,
@@ -25,33 +24,26 @@ def test_rent_api(target_type="officetel"):
         'DEAL_YMD': '202401'
     }
 
-    print(f"\n[{type_name} 데이터 요청 시작...]")
-    
+    print(f"\n[{type_name} 데이터 요청 시작...] {RTMS_API_BASE}")
+
     try:
         response = requests.get(url, params=params, timeout=30)
-        
+
         if response.status_code == 200:
-            root = ET.fromstring(response.content)
-            res_code = root.find('.//resultCode')
-            
-            if res_code is not None and res_code.text == '00':
-                items = root.findall('.//item')
-                if items:
-                    print(f"수집 성공! (총 {len(items)}건)")
-                    for i, item in enumerate(items[:3]):
-                        # 전월세 데이터 파싱
-                        # 연립다세대는 '연립다세대', 오피스텔은 '단지' 또는 '오피스텔' 태그를 씀
-                        name = get_text(item, '연립다세대') if target_type == 'townhouse' else get_text(item, '단지')
-                        deposit = get_text(item, '보증금액')
-                        rent = get_text(item, '월세금액')
-                        floor = get_text(item, '층')
-                        
-                        print(f"[{i+1}] {name} ({floor}층) | 보증금: {deposit}만원 / 월세: {rent}만원")
+            # 수집기와 같은 파서로 읽어서 영문 태그(offiNm/mhouseNm, deposit, monthlyRent, floor)를 확인
+            unit = WorkUnit(target_type, '11110', '202401', '종로구')
+            parser, rows = parse_bytes(response.content, unit)
+
+            if parser.ok:
+                if rows:
+                    print(f"수집 성공! (이번 페이지 {len(rows)}건 / 전체 {parser.total_count}건)")
+                    for i, row in enumerate(rows[:3]):
+                        print(f"[{i+1}] {row['name']} ({row['floor']}층) | "
+                              f"보증금: {row['deposit']}만원 / 월세: {row['monthly_rent']}만원")
                 else:
                     print("데이터 없음 (거래 내역 없음)")
             else:
-                res_msg = root.find('.//resultMsg')
-                print(f"API 에러: {res_msg.text if res_msg is not None else '코드 확인 필요'}")
+                print(f"API 에러: {parser.result_code} - {parser.result_msg or '코드 확인 필요'}")
         else:
             print(f"HTTP 에러: {response.status_code}")
 
@@ -59,5 +51,5 @@ def test_rent_api(target_type="officetel"):
         print(f"시스템 에러: {e}")
 
 if __name__ == "__main__":
-    test_rent_api("officetel") # 오피스텔 테스트
-    test_rent_api("townhouse") # 연립다세대 테스트
\ No newline at end of file
+    check_rent_api("officetel") # 오피스텔 확인
+    check_rent_api("townhouse") # 연립다세대 확인
@@ -0,0 +1,57 @@
+import importlib.util
+import os
+import sys
+import types
+
+import pytest
+
+# 저장소 루트를 import 경로에 (pipeline, benchmarks, dags 를 바로 import)
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+class _Operator:
+    def __init__(self, *args, **kwargs):
+        pass
+
+    @classmethod
+    def partial(cls, **kwargs):
+        return cls()
+
+    def expand(self, **kwargs):
+        return self
+
+    def __rshift__(self, other):
+        return other
+
+
+class _DAG:
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+@pytest.fixture
+def load_dag(monkeypatch):
+    """dags/{name}.py 를 모듈로 불러온다 (airflow 가 없으면 DAG / PythonOperator 최소 대역으로)"""
+    try:
+        import airflow.operators.python  # noqa: F401
+    except ImportError:
+        for name in ("airflow", "airflow.operators", "airflow.operators.python"):
+            monkeypatch.setitem(sys.modules, name, types.ModuleType(name))
+        monkeypatch.setattr(sys.modules["airflow"], "DAG", _DAG, raising=False)
+        monkeypatch.setattr(sys.modules["airflow.operators.python"], "PythonOperator", _Operator, raising=False)
+
+    def load(name):
+        spec = importlib.util.spec_from_file_location(f"dag_{name}", os.path.join(ROOT, "dags", f"{name}.py"))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return module
+
+    return load
@@ -0,0 +1,59 @@
+"""컬럼 누적 버퍼 (pipeline/accumulator.py) 확인"""
+import pandas as pd
+
+from pipeline.accumulator import RowAccumulator
+from pipeline.config import COLUMNS
+from pipeline.output import PARQUET_SCHEMA, to_typed_frame
+
+
+def make_row(**values):
+    row = {
+        'year_month': '202401', 'district_code': '11680', 'district_name': '강남구', 'dong': '역삼동',
+        'jibun': '1-1', 'name': 'A빌라', 'floor': '3', 'area': '33.5', 'deposit': '1000',
+        'monthly_rent': '50', 'build_year': '2010', 'deal_day': '5', 'type': 'townhouse',
+    }
+    row.update(values)
+    return row
+
+
+ROWS = [
+    make_row(),
+    make_row(dong='삼성동', floor='-1', area='84.97', deposit='120000', monthly_rent='0'),
+    make_row(name='0', floor='', area='abc', build_year='0'),
+]
+
+
+def test_to_arrow_follows_parquet_schema():
+    accumulator = RowAccumulator()
+    accumulator.extend(ROWS)
+    table = accumulator.to_arrow()
+
+    assert len(accumulator) == 3
+    assert table.schema.equals(PARQUET_SCHEMA)
+    assert table.column('floor').to_pylist() == [3, -1, None]
+    assert table.column('area').to_pylist() == [33.5, 84.97, None]
+    assert table.column('dong').to_pylist() == ['역삼동', '삼성동', '역삼동']
+    # 같은 문자열은 사전에 한 번만
+    assert len(accumulator.columns['dong'].values) == 2
+
+
+def test_to_pandas_matches_typed_frame():
+    accumulator = RowAccumulator()
+    for row in ROWS:
+        accumulator.append(row)
+    df = accumulator.to_pandas()
+
+    assert list(df.columns) == COLUMNS
+    assert str(df['deposit'].dtype) == 'Int64'
+    assert str(df['area'].dtype) == 'float64'
+    assert str(df['district_name'].dtype) == 'category'
+
+    expected = to_typed_frame(ROWS)
+    for column in COLUMNS:
+        pd.testing.assert_series_equal(df[column].astype(expected[column].dtype), expected[column],
+                                       check_names=False)
+
+
+def test_empty_accumulator():
+    df = RowAccumulator().to_pandas()
+    assert list(df.columns) == COLUMNS and len(df) == 0
@@ -0,0 +1,106 @@
+"""백필이 장부의 남은 한도 안에서 멈추는지, 결과 파일을 한 번만 만드는지 확인 (API 대신 가짜 iter_collect)"""
+import os
+
+import pytest
+
+from pipeline import backfill
+from pipeline.backfill import QuotaLedger, run_backfill
+
+
+DISTRICTS = {f"{11000 + i}": f"구{i}" for i in range(10)}
+
+
+def make_row(unit):
+    return {
+        'year_month': unit.deal_ymd, 'district_code': unit.lawd_cd, 'district_name': unit.district_name,
+        'dong': '역삼동', 'jibun': '1-1', 'name': 'A빌라', 'floor': '3', 'area': '33.5', 'deposit': '1000',
+        'monthly_rent': '50', 'build_year': '2010', 'deal_day': '5', 'type': unit.type,
+    }
+
+
+class FakeApi:
+    """단위 하나에 requests_per_unit 번 호출한 것처럼 stats 를 채우고, 보낸 단위를 기록"""
+
+    def __init__(self, requests_per_unit=3, quota_after=None):
+        self.requests_per_unit = requests_per_unit
+        self.quota_after = quota_after
+        self.sent = []
+
+    async def iter_collect(self, units, chunk_size=100, stats=None, **kwargs):
+        for start in range(0, len(units), chunk_size):
+            chunk = units[start:start + chunk_size]
+            completed = []
+            for unit in chunk:
+                self.sent.append(unit)
+                if self.quota_after is not None and len(self.sent) > self.quota_after:
+                    stats.requests[unit.type] += 1
+                    stats.quota_exceeded.add(unit.type)
+                    stats.failed[unit] = "한도 초과 (22)"
+                    continue
+                stats.requests[unit.type] += self.requests_per_unit
+                completed.append(unit)
+            yield completed, [make_row(unit) for unit in completed]
+
+
+@pytest.fixture
+def api(monkeypatch):
+    monkeypatch.setattr(backfill, "ResponseCache", lambda: None)
+    monkeypatch.setattr(backfill, "BUDGET_CHUNK_UNITS", 2)
+
+    def install(**kwargs):
+        fake = FakeApi(**kwargs)
+        monkeypatch.setattr(backfill, "iter_collect", fake.iter_collect)
+        return fake
+
+    return install
+
+
+def run(tmp_path, daily_quota):
+    return run_backfill(["townhouse"], 2024, 2024, state_dir=str(tmp_path), daily_quota=daily_quota,
+                        districts=DISTRICTS, service_key="test")
+
+
+def test_stops_sending_units_when_ledger_runs_out(api, tmp_path):
+    # 한도 20 (예비분 2% 빼고 19), 단위마다 3회 -> 19 를 넘긴 묶음 뒤로는 보내지 않음
+    fake = api(requests_per_unit=3)
+    remaining = run(tmp_path, daily_quota=20)
+
+    ledger = QuotaLedger(os.path.join(tmp_path, "quota_ledger.json"), 20)
+    assert ledger.remaining("townhouse") == 0
+    # 넘친 양은 마지막 묶음(BUDGET_CHUNK_UNITS 개) 하나를 넘지 않음
+    assert ledger.spent("townhouse") < 19 + 2 * 3
+    assert len(fake.sent) == ledger.spent("townhouse") // 3
+    assert remaining == {"townhouse": 12 * len(DISTRICTS) - len(fake.sent)}
+
+
+def test_quota_error_stops_remaining_units(api, tmp_path):
+    fake = api(requests_per_unit=1, quota_after=3)
+    run(tmp_path, daily_quota=1000)
+
+    # 한도 초과 응답이 난 묶음 뒤로는 더 보내지 않고 그날은 소진으로 기록
+    assert len(fake.sent) == 4
+    ledger = QuotaLedger(os.path.join(tmp_path, "quota_ledger.json"), 1000)
+    assert ledger.remaining("townhouse") == 0
+
+
+def test_finalize_runs_once_after_completion(api, tmp_path, monkeypatch):
+    api(requests_per_unit=1)
+    assert run(tmp_path, daily_quota=100000) == {"townhouse": 0}
+    output = os.path.join(tmp_path, "townhouse_data.csv")
+    assert os.path.exists(os.path.join(tmp_path, "townhouse_2024_2024", "finalized.json"))
+    with open(output, encoding="utf-8-sig") as f:
+        assert sum(1 for _ in f) == 12 * len(DISTRICTS) + 1
+
+    merged = []
+    monkeypatch.setattr(backfill.CheckpointStore, "merge", lambda self, file_name: merged.append(file_name))
+    assert run(tmp_path, daily_quota=100000) == {"townhouse": 0}
+    assert merged == []
+
+
+def test_days_estimate_counts_requests_per_unit(api, tmp_path, capsys):
+    api(requests_per_unit=1)
+    remaining = run(tmp_path, daily_quota=20)["townhouse"]
+
+    # 남은 단위마다 UNIT_REQUEST_ESTIMATE 회, 하루 19회 (예비분 2% 제외)
+    days = -(-remaining * backfill.UNIT_REQUEST_ESTIMATE // 19)
+    assert f"남은 단위 {remaining}개 (약 {days}일 더 필요)" in capsys.readouterr().out
@@ -0,0 +1,61 @@
+"""순차 모드 수집 (batch_collector.collect_data_sync) 의 요청 간격 / 한도 초과 처리 확인 (로컬 RTMS 대역 사용)"""
+import time
+
+import pytest
+
+from batch_collector import collect_data_sync
+from benchmarks.mock_rtms import MockRTMSServer
+from pipeline.checkpoint import CheckpointStore
+from pipeline.collector import CollectStats, build_units
+from pipeline.config import ENDPOINTS
+
+
+DISTRICTS = {f"{11000 + i}": f"구{i}" for i in range(10)}
+UNITS = build_units(["townhouse"], ["202401", "202402", "202403"], DISTRICTS)
+
+
+@pytest.fixture
+def mock_server():
+    servers = []
+
+    def start(**kwargs):
+        server = MockRTMSServer(rows=5, **kwargs).start()
+        original = server.patch_endpoints()
+        servers.append((server, original))
+        return server
+
+    yield start
+    for server, original in servers:
+        for target_type, url in original.items():
+            ENDPOINTS[target_type]["url"] = url
+        server.stop()
+
+
+def test_requests_are_paced_by_token_bucket(mock_server, tmp_path):
+    server = mock_server()
+    store = CheckpointStore(str(tmp_path / "store"))
+
+    # rate 20: 처음 20회는 버킷에 찬 토큰으로 바로, 나머지 10회는 0.05초 간격
+    started = time.perf_counter()
+    collect_data_sync("townhouse", UNITS, store, page_size=10, rate=20)
+    seconds = time.perf_counter() - started
+
+    assert server.counts["requests"] == len(UNITS) == 30
+    assert store.row_count == 5 * len(UNITS)
+    assert 0.45 <= seconds < 3
+
+
+def test_quota_code_stops_remaining_units(mock_server, tmp_path):
+    server = mock_server(quota=4)
+    store = CheckpointStore(str(tmp_path / "store"))
+    stats = CollectStats()
+
+    collect_data_sync("townhouse", UNITS, store, page_size=10, stats=stats, rate=1000)
+
+    # 다섯 번째 요청에서 한도 초과 -> 그 뒤 단위는 요청하지 않음
+    assert server.counts["requests"] == 5
+    assert stats.quota_exceeded == {"townhouse"}
+    assert len(store.completed()) == 4
+    assert len(stats.failed) == len(UNITS) - 4
+    assert stats.failed[UNITS[4]] == "p1 api_22"
+    assert all(reason == "p1 quota_exceeded" for unit, reason in stats.failed.items() if unit != UNITS[4])
@@ -0,0 +1,158 @@
+"""pipeline/bq.py 적재 작업이 만드는 BigQuery 작업 설정 / SQL 확인 (작업 설정을 기록하는 가짜 클라이언트)"""
+from datetime import date, datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from google.cloud import bigquery
+
+from pipeline import bq
+from pipeline.config import NATURAL_KEY
+
+
+TABLE = "project.dataset.raw_rent_transactions"
+
+
+class FakeJob:
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+        self.total_bytes_processed = 0
+        self.num_dml_affected_rows = 0
+
+    def result(self):
+        return self.rows
+
+
+class FakeClient:
+    """호출한 작업 설정을 순서대로 기록. 설정 없는 SELECT 는 staging_rows 를 돌려준다."""
+
+    def __init__(self, staging_rows=()):
+        self.staging_rows = list(staging_rows)
+        self.queries = []
+        self.loads = []
+        self.updated = []
+        self.deleted = []
+        self.tables = {}
+
+    def get_table(self, table_ref):
+        if table_ref not in self.tables:
+            partitioning = bigquery.TimePartitioning(
+                type_=bigquery.TimePartitioningType.MONTH, field=bq.PARTITION_FIELD
+            )
+            self.tables[table_ref] = SimpleNamespace(time_partitioning=partitioning, expires=None)
+        return self.tables[table_ref]
+
+    def load_table_from_uri(self, uris, destination, job_config=None):
+        self.loads.append((uris, destination, job_config))
+        return FakeJob()
+
+    def query(self, query, job_config=None):
+        self.queries.append((query, job_config))
+        return FakeJob(self.staging_rows if job_config is None else ())
+
+    def update_table(self, table, fields):
+        self.updated.append((table, fields))
+
+    def delete_table(self, table_ref, not_found_ok=False):
+        self.deleted.append(table_ref)
+
+
+def parameters(job_config):
+    values = {}
+    for parameter in job_config.query_parameters:
+        values[parameter.name] = getattr(parameter, "value", None) or getattr(parameter, "values", None)
+    return values
+
+
+def test_replace_partition_truncates_one_month_and_keeps_other_types():
+    client = FakeClient()
+    bq.replace_partition(client, TABLE, TABLE + "__staging", "202401", ["officetel"])
+
+    [(query, job_config)] = client.queries
+    assert job_config.destination.table_id == "raw_rent_transactions$202401"
+    assert job_config.write_disposition == "WRITE_TRUNCATE"
+    # 이번에 적재한 유형은 staging 에서, 같은 달의 다른 유형은 기존 파티션에서
+    assert "UNION ALL" in query
+    assert f"FROM `{TABLE}__staging`" in query
+    assert "type NOT IN UNNEST(@types)" in query
+    assert f"{bq.PARTITION_FIELD} = @deal_month" in query
+    assert parameters(job_config) == {
+        "year_month": "202401", "deal_month": date(2024, 1, 1), "types": ["officetel"],
+    }
+
+
+def test_replace_months_loads_staging_with_expiry_and_replaces_each_month():
+    client = FakeClient(staging_rows=[
+        {"year_month": "202401", "types": ["officetel", "townhouse"]},
+        {"year_month": "202402", "types": ["townhouse"]},
+    ])
+    uris = ["gs://bucket/raw/monthly/202402/rent_data_202402.csv"]
+    before = datetime.now(timezone.utc)
+    months = bq.replace_months(client, uris, TABLE)
+
+    assert months == {"202401": ["officetel", "townhouse"], "202402": ["townhouse"]}
+
+    [(loaded_uris, staging_ref, load_config)] = client.loads
+    assert loaded_uris == uris
+    assert staging_ref == TABLE + "__staging"
+    assert load_config.write_disposition == "WRITE_TRUNCATE"
+    assert load_config.skip_leading_rows == 1
+
+    # staging 은 정리 단계에서 죽어도 하루 뒤 만료
+    [(staging, fields)] = client.updated
+    assert fields == ["expires"]
+    assert before + timedelta(days=1) <= staging.expires <= datetime.now(timezone.utc) + timedelta(days=1)
+
+    replaced = [job_config for _, job_config in client.queries if job_config is not None]
+    assert [job_config.destination.table_id for job_config in replaced] == [
+        "raw_rent_transactions$202401", "raw_rent_transactions$202402",
+    ]
+    assert [parameters(job_config)["types"] for job_config in replaced] == [["officetel", "townhouse"], ["townhouse"]]
+    assert client.deleted == [staging_ref]
+
+
+def test_replace_months_drops_staging_when_load_fails():
+    client = FakeClient()
+
+    class FailingJob(FakeJob):
+        def result(self):
+            raise RuntimeError("load failed")
+
+    client.load_table_from_uri = lambda uris, destination, job_config=None: FailingJob()
+    with pytest.raises(RuntimeError):
+        bq.replace_months(client, ["gs://bucket/x.csv"], TABLE)
+    assert client.deleted == [TABLE + "__staging"]
+    assert not [job_config for _, job_config in client.queries if job_config is not None]
+
+
+def test_apply_delta_merges_on_natural_key_within_loaded_months():
+    client = FakeClient(staging_rows=[{"year_month": "202401"}, {"year_month": "202403"}])
+    months = bq.apply_delta(client, ["gs://bucket/delta/202403/delta.csv"], TABLE)
+
+    assert months == ["202401", "202403"]
+    [(_, staging_ref, load_config)] = client.loads
+    assert staging_ref == TABLE + "__delta_staging"
+    assert [field.name for field in load_config.schema][-2:] == ["op", "copies"]
+
+    [(query, job_config)] = [(q, c) for q, c in client.queries if c is not None]
+    assert f"MERGE `{TABLE}` T" in query
+    on_clause = query.split(" ON ", 1)[1].split("WHEN", 1)[0]
+    for column in NATURAL_KEY:
+        assert f"T.{column} IS NOT DISTINCT FROM S.{column}" in on_clause
+    assert "T.type = S.type" in on_clause
+    assert f"T.{bq.PARTITION_FIELD} IN UNNEST(@deal_months)" in on_clause
+    assert "ON S.action = 'delete'" in query
+    assert "WHEN MATCHED THEN DELETE" in query
+    assert "WHEN NOT MATCHED BY TARGET AND S.action = 'insert'" in query
+    # 중복 행은 DISTINCT 로 합치지 않고 키마다 copies 개까지만 다시 넣음
+    assert f"SELECT DISTINCT * FROM `{TABLE}__delta_staging`" not in query
+    assert "MAX(copies) OVER (PARTITION BY year_month, type, " in query
+    assert "source < 2 AND copy <= target_copies" in query
+    assert parameters(job_config) == {"deal_months": [date(2024, 1, 1), date(2024, 3, 1)]}
+    assert client.deleted == [staging_ref]
+
+
+def test_apply_delta_without_rows_skips_merge():
+    client = FakeClient(staging_rows=[])
+    assert bq.apply_delta(client, ["gs://bucket/delta/202403/delta.csv"], TABLE) == []
+    assert not [job_config for _, job_config in client.queries if job_config is not None]
+    assert client.deleted == [TABLE + "__delta_staging"]
@@ -0,0 +1,100 @@
+"""RTMS 응답 디스크 캐시 (pipeline/cache.py) 확인"""
+from datetime import datetime
+
+import pytest
+
+from benchmarks.mock_rtms import MockRTMSServer
+from pipeline import cache as cache_module
+from pipeline.cache import CURRENT_TTL, RECENT_TTL, ResponseCache, ttl_for
+from pipeline.collector import CollectStats, build_units, collect
+from pipeline.config import ENDPOINTS
+
+
+class Clock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_module.time, "time", clock.time)
+    return clock
+
+
+def test_ttl_by_deal_month():
+    now = datetime(2024, 5, 10)
+    assert ttl_for("202405", now) == CURRENT_TTL
+    assert ttl_for("202404", now) == RECENT_TTL
+    assert ttl_for("202403", now) == RECENT_TTL
+    assert ttl_for("202402", now) is None
+    assert ttl_for("202312", now) is None
+
+
+def test_recent_month_expires_unless_allowed(tmp_path, clock):
+    cache = ResponseCache(str(tmp_path))
+    ymd = datetime.now().strftime("%Y%m")
+    cache.put("townhouse", "11110", ymd, 1, 1000, b"<response/>")
+    assert cache.get("townhouse", "11110", ymd, 1, 1000) == b"<response/>"
+
+    clock.now += CURRENT_TTL + 1
+    assert cache.get("townhouse", "11110", ymd, 1, 1000) is None
+    assert cache.get("townhouse", "11110", ymd, 1, 1000, allow_expired=True) == b"<response/>"
+    # 오래된 달은 만료 없음
+    cache.put("townhouse", "11110", "201901", 1, 1000, b"old")
+    clock.now += 365 * 24 * 60 * 60
+    assert cache.get("townhouse", "11110", "201901", 1, 1000) == b"old"
+
+
+def test_lru_eviction_keeps_recently_used(tmp_path, clock):
+    cache = ResponseCache(str(tmp_path), max_bytes=250)
+    for lawd_cd in ("11110", "11140"):
+        clock.now += 1
+        cache.put("townhouse", lawd_cd, "201901", 1, 1000, lawd_cd.encode() * 20)
+    clock.now += 1
+    assert cache.get("townhouse", "11110", "201901", 1, 1000) is not None
+
+    # 100바이트씩 세 개 -> 250 을 넘으므로 가장 오래 안 쓴 11140 을 지움
+    clock.now += 1
+    cache.put("townhouse", "11170", "201901", 1, 1000, b"11170" * 20)
+    assert cache.total_bytes() == 200
+    assert cache.get("townhouse", "11140", "201901", 1, 1000) is None
+    assert cache.get("townhouse", "11110", "201901", 1, 1000) is not None
+
+
+def test_same_body_is_stored_once(tmp_path):
+    cache = ResponseCache(str(tmp_path), max_bytes=1000)
+    for lawd_cd in ("11110", "11140", "11170"):
+        cache.put("townhouse", lawd_cd, "201901", 1, 1000, b"x" * 400)
+    assert cache.total_bytes() == 400
+
+
+@pytest.fixture
+def server():
+    with MockRTMSServer(rows=12) as server:
+        original = server.patch_endpoints()
+        yield server
+        for target_type, url in original.items():
+            ENDPOINTS[target_type]["url"] = url
+
+
+def test_replay_only_uses_cache_without_network(server, tmp_path):
+    units = build_units(["townhouse"], ["201901"], {"11110": "종로구", "11140": "중구"})
+    cache = ResponseCache(str(tmp_path))
+    first = collect(units, rate=1000, page_size=5, service_key="test", cache=cache).to_pandas()
+    assert server.counts["requests"] == 6
+
+    replayed = collect(units, rate=1000, page_size=5, service_key="test", cache=cache,
+                       replay_only=True).to_pandas()
+    assert server.counts["requests"] == 6
+    assert replayed.equals(first)
+
+    # 캐시에 없는 단위는 요청하지 않고 실패로 남김
+    stats = CollectStats()
+    missing = build_units(["townhouse"], ["201902"], {"11110": "종로구"})
+    assert len(collect(missing, service_key="test", cache=cache, replay_only=True, stats=stats)) == 0
+    assert server.counts["requests"] == 6
+    assert stats.failed == {missing[0]: "p1 cache_miss"}
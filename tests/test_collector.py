@@ -0,0 +1,164 @@
+"""비동기 수집 엔진 (pipeline/collector.py) 확인 (로컬 RTMS 대역 사용)"""
+import asyncio
+import time
+
+import pytest
+
+from benchmarks.mock_rtms import MockRTMSServer
+from benchmarks.synthetic import wrap_items
+from pipeline import collector
+from pipeline.collector import (AdaptiveLimiter, CollectStats, TokenBucket, build_units, collect, is_retryable,
+                                is_throttle, retry_delay)
+from pipeline.config import ENDPOINTS
+from pipeline.parser import parse_bytes
+
+
+DISTRICTS = {f"{11000 + i}": f"구{i}" for i in range(4)}
+
+
+@pytest.fixture
+def mock_server():
+    servers = []
+
+    def start(**kwargs):
+        server = MockRTMSServer(**kwargs).start()
+        original = server.patch_endpoints()
+        servers.append((server, original))
+        return server
+
+    yield start
+    for server, original in servers:
+        for target_type, url in original.items():
+            ENDPOINTS[target_type]["url"] = url
+        server.stop()
+
+
+def test_token_bucket_bursts_to_capacity_then_paces():
+    bucket = TokenBucket(rate=50)
+    started = time.perf_counter()
+    for _ in range(50):
+        bucket.acquire_sync()
+    assert time.perf_counter() - started < 0.05
+
+    # 버킷이 비면 초당 50개 -> 10개에 약 0.2초
+    for _ in range(10):
+        bucket.acquire_sync()
+    assert 0.15 <= time.perf_counter() - started < 1
+
+
+def test_token_bucket_is_shared_by_concurrent_tasks():
+    async def run():
+        bucket = TokenBucket(rate=20, capacity=1)
+        started = time.perf_counter()
+        await asyncio.gather(*(bucket.acquire() for _ in range(6)))
+        return time.perf_counter() - started
+
+    # 첫 토큰 뒤 나머지 5개는 0.05초 간격
+    assert 0.2 <= asyncio.run(run()) < 1
+
+
+def test_collect_returns_every_unit_in_one_session(mock_server):
+    server = mock_server(rows=15)
+    units = build_units(["officetel", "townhouse"], ["202401", "202402"], DISTRICTS)
+
+    rows = collect(units, concurrency=4, rate=1000, page_size=100, service_key="test", strict=True)
+
+    assert server.counts["requests"] == len(units) == 16
+    df = rows.to_pandas()
+    assert len(df) == 15 * len(units)
+    assert sorted(df.groupby(["type", "district_code", "year_month"]).size().unique()) == [15]
+
+
+@pytest.mark.parametrize("rows, pages", [(0, 1), (10, 1), (11, 2), (95, 10)])
+def test_pages_follow_total_count(mock_server, rows, pages):
+    server = mock_server(rows=rows)
+    units = build_units(["townhouse"], ["202401"], {"11110": "종로구"})
+
+    df = collect(units, rate=1000, page_size=10, service_key="test", strict=True).to_pandas()
+
+    assert server.counts["requests"] == pages
+    # 페이지를 동시에 받아도 행은 페이지 순서대로
+    items = server.unit_items("townhouse", "11110", "202401")
+    _, expected = parse_bytes(wrap_items(items, len(items), 1, len(items)), units[0])
+    assert len(df) == rows
+    assert df["jibun"].tolist() == [row["jibun"] for row in expected]
+
+
+def test_failed_page_leaves_unit_incomplete(mock_server):
+    # 1페이지 뒤 한도 초과 -> 동시에 보낸 2, 3페이지가 실패하므로 단위 전체를 미완료로 둠
+    server = mock_server(rows=30, quota=1)
+    units = build_units(["townhouse"], ["202401"], {"11110": "종로구"})
+    stats = CollectStats()
+
+    assert len(collect(units, rate=1000, page_size=10, service_key="test", stats=stats)) == 0
+    assert server.counts["requests"] == 3
+    assert stats.failed[units[0]].endswith("api_22")
+    with pytest.raises(RuntimeError, match="수집 실패 단위 1개"):
+        collect(units, rate=1000, page_size=10, service_key="test", strict=True)
+
+
+@pytest.mark.parametrize("reason, retryable, throttle", [
+    ("timeout", True, True),
+    ("connection", True, True),
+    ("error", True, False),
+    ("http_503", True, True),
+    ("http_429", True, True),
+    ("http_404", False, False),
+    ("api_05", True, True),
+    ("api_99", True, False),
+    ("api_22", False, False),
+    ("api_30", False, False),
+    ("quota_exceeded", False, False),
+    ("cache_miss", False, False),
+])
+def test_failure_reasons(reason, retryable, throttle):
+    assert is_retryable(reason) is retryable
+    assert is_throttle(reason) is throttle
+
+
+def test_retry_delay_is_capped_full_jitter():
+    delays = [retry_delay(attempt, base=0.5, cap=3) for attempt in range(8) for _ in range(50)]
+    assert min(delays) >= 0 and max(delays) <= 3
+    assert all(retry_delay(0, base=0.5, cap=3) <= 0.5 for _ in range(50))
+
+
+def test_adaptive_limiter_halves_once_per_cooldown_and_recovers():
+    limiter = AdaptiveLimiter(max_concurrency=8, max_rate=10, cooldown=60)
+    limiter.on_throttle("http_503")
+    limiter.on_throttle("http_503")
+    assert (limiter.limit, limiter.rate) == (4.0, 5.0)
+
+    for _ in range(200):
+        limiter.on_success()
+    assert (limiter.limit, limiter.rate) == (8, 10)
+
+
+def test_adaptive_limiter_caps_in_flight():
+    async def run():
+        limiter = AdaptiveLimiter(max_concurrency=2, max_rate=1000)
+        peak = 0
+
+        async def request():
+            nonlocal peak
+            async with limiter.slot():
+                peak = max(peak, limiter.in_flight)
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(*(request() for _ in range(10)))
+        return peak, limiter.in_flight
+
+    assert asyncio.run(run()) == (2, 0)
+
+
+def test_transient_errors_are_retried(mock_server, monkeypatch):
+    monkeypatch.setattr(collector, "retry_delay", lambda attempt: 0)
+    server = mock_server(rows=5, http_error_rate=0.2, error_rate=0.2)
+    units = build_units(["townhouse"], ["202401", "202402"], DISTRICTS)
+    stats = CollectStats()
+
+    rows = collect(units, rate=1000, page_size=10, service_key="test", stats=stats, max_retries=20, strict=True)
+
+    assert len(rows) == 5 * len(units)
+    assert stats.retries["townhouse"] > 0
+    assert server.counts["requests"] == len(units) + stats.retries["townhouse"]
+    assert server.counts["http_errors"] + server.counts["api_errors"] == stats.retries["townhouse"]
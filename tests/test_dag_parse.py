@@ -0,0 +1,24 @@
+"""DAG 파일 파싱 시간 / 최상위 import 회귀 확인 (benchmarks/bench_dag_parse.py 와 같은 측정)"""
+import glob
+import os
+
+import pytest
+
+from benchmarks.bench_dag_parse import DAG_DIR, PARSE_BUDGET_MS, parse_once
+
+
+DAG_FILES = sorted(glob.glob(os.path.join(DAG_DIR, "*.py")))
+
+# 최소한 이 모듈들은 Task 실행 때만 import 되어야 함
+FORBIDDEN = ['pandas', 'pyarrow', 'aiohttp', 'google.cloud']
+
+
+@pytest.mark.parametrize("path", DAG_FILES, ids=os.path.basename)
+def test_dag_import_is_cheap(path):
+    # 새 인터프리터에서 여러 번 재서 가장 빠른 값으로 비교 (CI 의 순간적인 부하 무시)
+    runs = [parse_once(path) for _ in range(3)]
+    best_ms = min(run["seconds"] for run in runs) * 1000
+    assert best_ms < PARSE_BUDGET_MS, f"{os.path.basename(path)} 파싱 {best_ms:.1f}ms"
+
+    loaded = {module for run in runs for module in run["heavy"]}
+    assert not loaded & set(FORBIDDEN), f"최상위 import 에 {sorted(loaded)}"
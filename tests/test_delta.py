@@ -0,0 +1,152 @@
+"""지연 신고 delta (pipeline/delta.py) 와 rent_late_reports 의 스냅샷 교체 순서 확인"""
+import os
+
+import pytest
+
+from pipeline import bq
+from pipeline.delta import DELTA_COLUMNS, SnapshotStore, shard_delta
+
+
+def make_row(year_month='202401', jibun='1-1', deposit='1000', monthly_rent='50'):
+    return {
+        'year_month': year_month, 'district_code': '11680', 'district_name': '강남구', 'dong': '역삼동',
+        'jibun': jibun, 'name': 'A빌라', 'floor': '3', 'area': '33.5', 'deposit': deposit,
+        'monthly_rent': monthly_rent, 'build_year': '2010', 'deal_day': '5', 'type': 'townhouse',
+    }
+
+
+FIRST = [
+    make_row(jibun='1-1'),
+    make_row(jibun='1-2'),
+    make_row(jibun='1-3'),
+    make_row(year_month='202402', jibun='2-1'),
+]
+
+
+@pytest.fixture
+def stores(tmp_path):
+    store = SnapshotStore(str(tmp_path / "snapshots"))
+    pending = SnapshotStore(str(tmp_path / "pending"))
+    return store, pending
+
+
+def run(rows, stores, months=('202401', '202402')):
+    store, pending = stores
+    return shard_delta(rows, 'townhouse', '11680', list(months), store, pending)
+
+
+def ops(delta):
+    return sorted((row['op'], row['jibun'], int(row['deposit']), int(row['copies']))
+                  for row in delta.to_dict('records'))
+
+
+def test_first_run_adds_everything_and_writes_only_pending(stores):
+    store, pending = stores
+    delta = run(FIRST, stores)
+    assert list(delta.columns) == DELTA_COLUMNS
+    assert ops(delta) == [('add', '1-1', 1000, 1), ('add', '1-2', 1000, 1), ('add', '1-3', 1000, 1),
+                          ('add', '2-1', 1000, 1)]
+    assert store.load('townhouse', '202401', '11680') is None
+    assert len(pending.load('townhouse', '202401', '11680')) == 3
+
+
+def test_changed_deleted_and_duplicated_rows(stores):
+    store, pending = stores
+    run(FIRST, stores)
+    assert store.promote(pending) == 2
+
+    second = [
+        make_row(jibun='1-1'),
+        make_row(jibun='1-1'),                 # 같은 계약이 한 건 더 -> add 한 건 (키의 행 수 2)
+        make_row(jibun='1-2', deposit='1200'),  # 금액 정정 -> remove + add
+        # 1-3 은 사라짐 -> remove
+        make_row(year_month='202402', jibun='2-1'),
+    ]
+    delta = run(second, stores)
+    assert ops(delta) == [('add', '1-1', 1000, 2), ('add', '1-2', 1200, 1), ('remove', '1-2', 1000, 0),
+                          ('remove', '1-3', 1000, 0)]
+    store.promote(pending)
+
+    # 세 건 중 한 건만 남음 -> 줄어든 두 건만 remove
+    third = [make_row(jibun='1-1')] * 3 + [make_row(jibun='1-2', deposit='1200'), make_row(jibun='1-3')]
+    run(third, stores)
+    store.promote(pending)
+    delta = run([make_row(jibun='1-1'), make_row(jibun='1-2', deposit='1200'), make_row(jibun='1-3')], stores)
+    assert ops(delta) == [('remove', '1-1', 1000, 1), ('remove', '1-1', 1000, 1)]
+
+
+def test_zero_row_month_deletes_nothing(stores):
+    store, pending = stores
+    run(FIRST, stores)
+    store.promote(pending)
+
+    # 202402 가 통째로 비어서 옴 -> 삭제로 보지 않고 그 달 스냅샷도 그대로 둠
+    delta = run([make_row(jibun='1-1'), make_row(jibun='1-2'), make_row(jibun='1-3')], stores)
+    assert len(delta) == 0
+    assert not os.path.exists(pending.path('townhouse', '202402', '11680'))
+    store.promote(pending)
+    assert len(store.load('townhouse', '202402', '11680')) == 1
+
+
+def test_promote_moves_pending_snapshots(stores):
+    store, pending = stores
+    run(FIRST, stores)
+    assert store.promote(pending) == 2
+    assert len(store.load('townhouse', '202401', '11680')) == 3
+    assert len(store.load('townhouse', '202402', '11680')) == 1
+    assert pending.load('townhouse', '202401', '11680') is None
+    # 옮길 것이 없으면 0
+    assert store.promote(pending) == 0
+
+
+class FakeTaskInstance:
+    def __init__(self, value):
+        self.value = value
+
+    def xcom_pull(self, task_ids):
+        return self.value
+
+
+@pytest.fixture
+def late_reports(load_dag, monkeypatch, tmp_path):
+    dag = load_dag("rent_late_reports")
+    monkeypatch.setattr(dag, "STAGING_DIR", str(tmp_path / "staging"))
+    monkeypatch.setattr(dag, "SNAPSHOT_DIR", str(tmp_path / "snapshots"))
+    monkeypatch.setattr(bq, "bigquery_client", lambda key_path: object())
+    monkeypatch.setattr(bq, "refresh_market_view", lambda *args, **kwargs: None)
+    monkeypatch.setattr(bq, "refresh_rollup", lambda *args, **kwargs: None)
+    context = {"ds_nodash": "20260301", "task_instance": FakeTaskInstance("gs://bucket/raw/delta/20260301/delta.csv")}
+    # fetch_delta_task 가 실행 디렉터리에 써 둔 새 스냅샷
+    pending = SnapshotStore(f"{dag.get_run_dir(context)}/snapshots")
+    shard_delta(FIRST, 'townhouse', '11680', ['202401'], SnapshotStore(dag.SNAPSHOT_DIR), pending)
+    return dag, context, SnapshotStore(dag.SNAPSHOT_DIR)
+
+
+def test_merge_delta_promotes_after_merge(late_reports, monkeypatch):
+    dag, context, store = late_reports
+    seen = []
+
+    def apply_delta(client, uris, table_ref, staging_suffix):
+        # MERGE 하는 동안에는 아직 이전 스냅샷
+        seen.append(store.load('townhouse', '202401', '11680'))
+        return ['202401']
+
+    monkeypatch.setattr(bq, "apply_delta", apply_delta)
+    dag.merge_delta(**context)
+    assert seen == [None]
+    assert len(store.load('townhouse', '202401', '11680')) == 3
+    assert not os.path.exists(dag.get_run_dir(context))
+
+
+def test_merge_delta_failure_keeps_old_snapshot(late_reports, monkeypatch):
+    dag, context, store = late_reports
+
+    def apply_delta(client, uris, table_ref, staging_suffix):
+        raise RuntimeError("merge failed")
+
+    monkeypatch.setattr(bq, "apply_delta", apply_delta)
+    with pytest.raises(RuntimeError):
+        dag.merge_delta(**context)
+    # 다음 실행에서 같은 delta 가 다시 나오도록 스냅샷은 그대로
+    assert store.load('townhouse', '202401', '11680') is None
+    assert os.path.exists(SnapshotStore(f"{dag.get_run_dir(context)}/snapshots").path('townhouse', '202401', '11680'))
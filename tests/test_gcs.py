@@ -0,0 +1,130 @@
+"""pipeline/gcs.py 업로드 / 정리 동작 확인 (benchmarks.fake_gcs.FilesystemBucket 사용)"""
+import os
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from benchmarks.fake_gcs import FakeBlob, FilesystemBucket
+from pipeline import gcs
+from pipeline.gcs import delete_stale
+
+
+def write_file(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+
+@pytest.fixture
+def bucket(tmp_path):
+    return FilesystemBucket(str(tmp_path / "bucket"))
+
+
+def object_names(bucket, prefix=""):
+    return [blob.name for blob in bucket.list_blobs(prefix=prefix)]
+
+
+def test_delete_stale_keeps_only_current_objects(bucket):
+    for name in ["raw/monthly/202401/parquet/type=townhouse/year_month=202401/part-11110.parquet",
+                 "raw/monthly/202401/parquet/type=townhouse/year_month=202401/part-11140.parquet",
+                 "raw/monthly/202401/parquet_old/part.parquet",
+                 "raw/monthly/202401/rent_data.csv"]:
+        bucket.blob(name).upload_from_string(b"x")
+    keep = ["raw/monthly/202401/parquet/type=townhouse/year_month=202401/part-11110.parquet"]
+
+    assert delete_stale(bucket, "raw/monthly/202401/parquet", keep) == 1
+    assert object_names(bucket) == [
+        "raw/monthly/202401/parquet/type=townhouse/year_month=202401/part-11110.parquet",
+        "raw/monthly/202401/parquet_old/part.parquet",
+        "raw/monthly/202401/rent_data.csv",
+    ]
+
+
+class FakeTaskInstance:
+    def __init__(self, value):
+        self.value = value
+
+    def xcom_pull(self, task_ids):
+        return self.value
+
+
+def test_parquet_upload_removes_previous_run_files(load_dag, monkeypatch, tmp_path, bucket):
+    dag = load_dag("auto_rent_pipeline")
+    monkeypatch.setattr(dag, "STAGING_DIR", str(tmp_path / "staging"))
+    monkeypatch.setattr(gcs, "storage_client", lambda key_path: SimpleNamespace(bucket=lambda name: bucket))
+
+    prefix = "raw/monthly/202401/parquet"
+    stale = f"{prefix}/type=officetel/year_month=202401/part-11680.parquet"
+    bucket.blob(stale).upload_from_string(b"old")
+
+    local = str(tmp_path / "staging" / "rent_data_202401")
+    write_file(os.path.join(local, "type=townhouse", "year_month=202401", "part-11110.parquet"), b"new")
+    context = {"logical_date": datetime(2024, 2, 1), "task_instance": FakeTaskInstance(local)}
+
+    assert dag.upload_to_gcs(**context) == f"gs://{dag.BUCKET_NAME}/{prefix}/*"
+    assert object_names(bucket, prefix) == [f"{prefix}/type=townhouse/year_month=202401/part-11110.parquet"]
+
+
+CHUNK = 256 * 1024
+
+
+def make_uploader(bucket, tmp_path, **kwargs):
+    return gcs.GcsUploader(bucket, http=bucket, workers=1, chunk_size=CHUNK, resumable_threshold=CHUNK,
+                           state_path=str(tmp_path / "sessions.json"), **kwargs)
+
+
+def read_object(bucket, name):
+    with open(bucket.object_path(name), "rb") as f:
+        return f.read()
+
+
+def test_interrupted_upload_resumes_from_stored_session(bucket, tmp_path):
+    data = os.urandom(4 * CHUNK)
+    path = write_file(str(tmp_path / "rent_data.csv"), data)
+
+    # 두 청크를 보낸 뒤 연결이 끊김 -> 세션 URL 은 state 파일에 남음
+    bucket.fail_after_chunks = 2
+    with pytest.raises(ConnectionError):
+        make_uploader(bucket, tmp_path).upload(path, "raw/rent_data.csv")
+    assert bucket.get_blob("raw/rent_data.csv") is None
+
+    # Task 재시도: 새 업로더가 같은 세션으로 남은 두 청크만 보냄
+    bucket.fail_after_chunks = None
+    uploader = make_uploader(bucket, tmp_path)
+    assert uploader.upload(path, "raw/rent_data.csv") == "uploaded"
+    assert bucket.calls["create_session"] == 1
+    assert bucket.calls["chunk"] == 4
+    assert read_object(bucket, "raw/rent_data.csv") == data
+    assert uploader._sessions == {}
+
+
+def test_identical_object_is_skipped(bucket, tmp_path):
+    path = write_file(str(tmp_path / "part.parquet"), b"same bytes")
+    uploader = make_uploader(bucket, tmp_path)
+    assert uploader.upload(path, "raw/part.parquet") == "uploaded"
+    assert uploader.upload(path, "raw/part.parquet") == "skipped"
+    assert bucket.calls["upload_from_filename"] == 1
+
+    # 내용이 바뀌면 다시 올림
+    write_file(path, b"other bytes")
+    assert uploader.upload(path, "raw/part.parquet") == "uploaded"
+    assert read_object(bucket, "raw/part.parquet") == b"other bytes"
+
+
+def test_checksum_mismatch_after_upload_raises(bucket, tmp_path, monkeypatch):
+    # 전송 중 바이트가 바뀐 것처럼 올라간 객체 끝에 한 바이트를 덧붙임
+    path = write_file(str(tmp_path / "part.parquet"), b"original bytes")
+    upload = FakeBlob.upload_from_filename
+
+    def corrupting_upload(self, filename, checksum=None):
+        upload(self, filename, checksum=checksum)
+        with open(self.bucket.object_path(self.name), "ab") as f:
+            f.write(b"!")
+
+    monkeypatch.setattr(FakeBlob, "upload_from_filename", corrupting_upload)
+    with pytest.raises(RuntimeError, match="체크섬 불일치"):
+        make_uploader(bucket, tmp_path).upload(path, "raw/part.parquet")
+    with pytest.raises(RuntimeError, match="GCS 업로드 실패 1개"):
+        make_uploader(bucket, tmp_path).upload_many([(path, "raw/part.parquet")])
@@ -0,0 +1,77 @@
+"""계측 (pipeline/metrics.py) 확인"""
+import json
+import os
+
+import pytest
+
+from pipeline import metrics
+from pipeline.metrics import METRICS, MetricsRegistry, instrumented, stage
+
+
+def test_registry_snapshot_and_prometheus():
+    registry = MetricsRegistry()
+    registry.inc("rtms_requests_total", endpoint="townhouse", status="ok")
+    registry.inc("rtms_requests_total", 2, endpoint="townhouse", status="ok")
+    registry.set("rtms_rate_limit", 12.5)
+    for seconds in (0.03, 0.2, 20):
+        registry.observe("rtms_request_seconds", seconds, buckets=(0.1, 1.0), endpoint="townhouse")
+
+    snapshot = registry.snapshot()
+    assert snapshot["counters"] == [{"name": "rtms_requests_total",
+                                     "labels": {"endpoint": "townhouse", "status": "ok"}, "value": 3}]
+    histogram = snapshot["histograms"][0]
+    assert (histogram["counts"], histogram["count"]) == ([1, 2], 3)
+
+    text = registry.to_prometheus({"dag_id": "d"}).splitlines()
+    assert 'rtms_requests_total{endpoint="townhouse",status="ok",dag_id="d"} 3' in text
+    assert 'rtms_rate_limit{dag_id="d"} 12.5' in text
+    assert 'rtms_request_seconds_bucket{endpoint="townhouse",dag_id="d",le="1.0"} 2' in text
+    assert 'rtms_request_seconds_bucket{endpoint="townhouse",dag_id="d",le="+Inf"} 3' in text
+
+    registry.reset()
+    assert registry.snapshot() == {"counters": [], "gauges": [], "histograms": []}
+
+
+def test_stage_records_failures():
+    METRICS.reset()
+    with pytest.raises(ValueError):
+        with stage("write_csv"):
+            raise ValueError("boom")
+    counters = {(c["name"], c["labels"]["status"]): c["value"] for c in METRICS.snapshot()["counters"]}
+    assert counters == {("stage_runs_total", "error"): 1}
+    gauges = {g["name"] for g in METRICS.snapshot()["gauges"]}
+    assert {"stage_seconds", "stage_peak_rss_bytes", "stage_peak_rss_growth_bytes"} <= gauges
+
+
+class FakeTaskInstance:
+    dag_id = "auto_rent_pipeline"
+    task_id = "fetch_shard_task"
+    map_index = 3
+
+    def __init__(self):
+        self.pushed = {}
+
+    def xcom_push(self, key, value):
+        self.pushed[key] = value
+
+
+def test_instrumented_exports_task_metrics(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_DIR", str(tmp_path))
+    METRICS.inc("left_over_from_previous_task")
+
+    @instrumented
+    def task(**context):
+        METRICS.inc("rtms_retries_total", endpoint="townhouse", reason="timeout")
+        return "done"
+
+    ti = FakeTaskInstance()
+    assert task(task_instance=ti, ds_nodash="20240201") == "done"
+
+    names = {c["name"] for c in ti.pushed["metrics"]["counters"]}
+    assert names == {"rtms_retries_total", "stage_runs_total"}
+    directory = tmp_path / "auto_rent_pipeline" / "20240201"
+    assert sorted(os.listdir(directory)) == ["fetch_shard_task_3.json", "fetch_shard_task_3.prom"]
+    with open(directory / "fetch_shard_task_3.json", encoding="utf-8") as f:
+        assert json.load(f) == ti.pushed["metrics"]
+    with open(directory / "fetch_shard_task_3.prom", encoding="utf-8") as f:
+        assert 'stage_seconds{stage="fetch_shard_task",dag_id="auto_rent_pipeline",task_id="fetch_shard_task"}' in f.read()
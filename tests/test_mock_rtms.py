@@ -0,0 +1,50 @@
+"""로컬 RTMS 대역 (benchmarks/mock_rtms.py) 이 요청 파라미터대로 응답하는지 확인"""
+import xml.etree.ElementTree as ET
+
+import pytest
+import requests
+
+from benchmarks.mock_rtms import MockRTMSServer
+from pipeline.collector import WorkUnit
+from pipeline.config import ENDPOINTS
+from pipeline.parser import parse_bytes
+
+
+@pytest.fixture
+def server():
+    with MockRTMSServer(rows=25) as server:
+        original = server.patch_endpoints()
+        yield server
+        for target_type, url in original.items():
+            ENDPOINTS[target_type]["url"] = url
+
+
+@pytest.mark.parametrize("target_type, lawd_cd, deal_ymd", [
+    ("officetel", "11110", "202312"),
+    ("townhouse", "41135", "202403"),
+])
+def test_items_follow_request_params(server, target_type, lawd_cd, deal_ymd):
+    params = {"serviceKey": "test", "LAWD_CD": lawd_cd, "DEAL_YMD": deal_ymd, "pageNo": 1, "numOfRows": 10}
+    response = requests.get(ENDPOINTS[target_type]["url"], params=params, timeout=10)
+    assert response.status_code == 200
+
+    root = ET.fromstring(response.content)
+    items = root.findall("./body/items/item")
+    assert root.findtext("./body/totalCount") == "25"
+    assert len(items) == 10
+    for item in items:
+        assert item.findtext("sggCd") == lawd_cd
+        assert item.findtext("dealYear") == deal_ymd[:4]
+        assert item.findtext("dealMonth") == str(int(deal_ymd[4:]))
+
+    parser, rows = parse_bytes(response.content, WorkUnit(target_type, lawd_cd, deal_ymd, "테스트구"))
+    assert parser.ok and parser.total_count == 25
+    assert len(rows) == 10 and all(row["year_month"] == deal_ymd for row in rows)
+
+
+def test_same_unit_returns_same_data(server):
+    params = {"serviceKey": "test", "LAWD_CD": "11680", "DEAL_YMD": "202401", "pageNo": 2, "numOfRows": 10}
+    url = ENDPOINTS["townhouse"]["url"]
+    first = requests.get(url, params=params, timeout=10).content
+    assert requests.get(url, params=params, timeout=10).content == first
+    assert server.counts["requests"] == 2
@@ -0,0 +1,57 @@
+"""RTMS 응답 스트리밍 파서 (pipeline/parser.py) 확인"""
+import pytest
+
+from benchmarks.bench_parser import parse_legacy
+from benchmarks.mock_rtms import QUOTA_EXCEEDED_BODY
+from benchmarks.synthetic import make_payload, wrap_items
+from pipeline.collector import WorkUnit
+from pipeline.parser import ResponseParser, parse_bytes
+
+
+UNIT = WorkUnit("townhouse", "11680", "202401", "강남구")
+
+
+@pytest.mark.parametrize("target_type", ["officetel", "townhouse"])
+def test_same_rows_as_legacy_parser(target_type):
+    unit = UNIT._replace(type=target_type)
+    content = make_payload(300, target_type, seed=3)
+    parser, rows = parse_bytes(content, unit)
+    assert parser.ok and parser.total_count == 300
+    assert rows == list(parse_legacy(content, unit))
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 4096])
+def test_chunk_boundaries_do_not_change_rows(chunk_size):
+    content = make_payload(20, seed=1)
+    parser = ResponseParser(UNIT)
+    rows = []
+    for start in range(0, len(content), chunk_size):
+        rows.extend(parser.feed(content[start:start + chunk_size]))
+    rows.extend(parser.finish())
+    assert rows == parse_bytes(content, UNIT)[1]
+
+
+def test_missing_tags_default_to_zero_and_commas_are_removed():
+    item = ("<item><umdNm> 역삼동 </umdNm><deposit>12,000</deposit><monthlyRent>1,050</monthlyRent>"
+            "<floor></floor><nested><jibun>9-9</jibun></nested><jibun>1-1</jibun></item>")
+    parser, rows = parse_bytes(wrap_items([item], 1, 1, 10), UNIT)
+    assert rows == [{
+        'year_month': '202401', 'district_code': '11680', 'district_name': '강남구', 'dong': '역삼동',
+        'jibun': '1-1', 'name': '0', 'floor': '0', 'area': '0', 'deposit': '12000', 'monthly_rent': '1050',
+        'build_year': '0', 'deal_day': '0', 'type': 'townhouse',
+    }]
+
+
+def test_result_code_error():
+    parser, rows = parse_bytes(wrap_items([], 0, 1, 10, result_code="03", result_msg="NO_DATA"), UNIT)
+    assert not parser.ok
+    assert (parser.result_code, parser.result_msg, parser.total_count, rows) == ("03", "NO_DATA", 0, [])
+
+
+def test_gateway_return_reason_code():
+    # 인증키/한도 오류는 OpenAPI_ServiceResponse 형식 (resultCode 대신 returnReasonCode)
+    parser, rows = parse_bytes(QUOTA_EXCEEDED_BODY, UNIT)
+    assert not parser.ok
+    assert parser.result_code == "22"
+    assert parser.result_msg == "LIMITED_NUMBER_OF_SERVICE_REQUESTS_EXCEEDS_ERROR"
+    assert rows == [] and parser.total_count is None
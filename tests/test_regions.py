@@ -0,0 +1,76 @@
+"""시군구 목록 (pipeline/regions.py) 과 프로세스 풀 샤딩 (batch_collector) 확인"""
+import os
+
+import pandas as pd
+import pytest
+
+from batch_collector import collect_data_parallel, shard_units
+from benchmarks.mock_rtms import MockRTMSServer
+from pipeline.collector import build_units
+from pipeline.config import ENDPOINTS
+from pipeline.regions import describe_selection, load_regions, provinces, select_districts
+
+
+def test_select_by_name_or_code():
+    seoul = select_districts(["서울특별시"])
+    assert len(seoul) == 25 and seoul["11680"] == "강남구"
+    assert select_districts(["11"]) == seoul
+
+    both = select_districts([" 11 ", "세종특별자치시", ""])
+    assert len(both) == 26 and "36110" in both
+
+
+def test_all_or_empty_selects_nationwide():
+    regions = load_regions()
+    assert len(select_districts()) == len(select_districts(["all"])) == len(regions)
+    assert len({region.lawd_cd for region in regions}) == len(regions)
+    assert len(provinces()) == 17
+
+
+def test_unknown_province_raises():
+    with pytest.raises(ValueError, match="알 수 없는 시도"):
+        select_districts(["서울"])
+
+
+def test_shard_units_keeps_district_on_one_worker():
+    districts = {f"{11000 + i}": f"구{i}" for i in range(5)}
+    units = build_units(["townhouse"], ["202401", "202402"], districts)
+    shards = shard_units(units, 3)
+
+    assert [len(shard) for shard in shards] == [4, 4, 2]
+    assert sorted(unit for shard in shards for unit in shard) == sorted(units)
+    owners = [{unit.lawd_cd for unit in shard} for shard in shards]
+    assert owners == [{"11000", "11003"}, {"11001", "11004"}, {"11002"}]
+    # 작업자가 단위보다 많으면 빈 샤드는 만들지 않음
+    assert len(shard_units(units, 8)) == len(districts)
+
+
+@pytest.fixture
+def server():
+    with MockRTMSServer(rows=7) as server:
+        original = server.patch_endpoints()
+        yield server
+        for target_type, url in original.items():
+            ENDPOINTS[target_type]["url"] = url
+
+
+def test_collect_data_parallel_writes_every_unit(server, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    districts = {f"{11000 + i}": f"구{i}" for i in range(5)}
+    months = ["202401", "202402"]
+
+    collect_data_parallel("townhouse", months, districts, "store", workers=2, concurrency=4, rate=1000,
+                          page_size=100, use_cache=False, output_format="csv", file_name="townhouse_data.csv")
+
+    assert server.counts["requests"] == len(months) * len(districts)
+    df = pd.read_csv("townhouse_data.csv", dtype=str, encoding="utf-8-sig")
+    assert len(df) == 7 * len(months) * len(districts)
+    assert df.groupby(["district_code", "year_month"]).size().eq(7).all()
+    # 모두 끝나면 체크포인트 디렉터리를 지움
+    assert not os.path.exists("store")
+
+
+def test_describe_selection():
+    assert describe_selection(["11"]) == "서울특별시"
+    assert describe_selection(["41", "서울특별시"]) == "서울특별시, 경기도"
+    assert describe_selection(["all"]) == describe_selection([]) == "전국"
@@ -0,0 +1,152 @@
+"""스트리밍 모드 (pipeline/stream.py) 확인 (로컬 RTMS 대역 + benchmarks.fake_gcs.FilesystemBucket 사용)"""
+from types import SimpleNamespace
+
+import pyarrow.parquet as pq
+import pytest
+
+from benchmarks.fake_gcs import FakeBlob, FilesystemBucket
+from benchmarks.mock_rtms import MockRTMSServer
+from pipeline import gcs
+from pipeline.collector import WorkUnit, collect
+from pipeline.config import COLUMNS, ENDPOINTS
+from pipeline.stream import PartWriter, compose, compose_csv, delete_parts
+
+
+@pytest.fixture
+def bucket(tmp_path):
+    return FilesystemBucket(str(tmp_path / "bucket"))
+
+
+@pytest.fixture
+def server():
+    with MockRTMSServer(rows=100, latency=0.05) as server:
+        original = server.patch_endpoints()
+        yield server
+        for target_type, url in original.items():
+            ENDPOINTS[target_type]["url"] = url
+
+
+def test_parts_upload_before_last_page(server, bucket, monkeypatch):
+    # 100건 / 10건씩 = 10페이지를 하나씩 받는 동안 조각 업로드 시점의 서버 요청 수를 기록
+    requests_at_upload = []
+    upload = FakeBlob.upload_from_string
+
+    def recording_upload(self, data, content_type=None, checksum=None):
+        requests_at_upload.append(server.counts["requests"])
+        upload(self, data, content_type=content_type, checksum=checksum)
+
+    monkeypatch.setattr(FakeBlob, "upload_from_string", recording_upload)
+    unit = WorkUnit("townhouse", "11110", "202401", "종로구")
+    with PartWriter(bucket, "raw/monthly/202401/parts", "townhouse_11110", chunk_rows=10) as writer:
+        collect([unit], concurrency=1, page_size=10, service_key="test", strict=True, sink=writer)
+
+    assert server.counts["requests"] == 10
+    assert writer.rows == 100 and len(writer.names) == 10
+    # 단위 하나의 마지막 페이지를 받기 전에 첫 조각이 올라감
+    assert requests_at_upload[0] < 10
+
+
+def object_names(bucket, prefix=""):
+    return [blob.name for blob in bucket.list_blobs(prefix=prefix)]
+
+
+def test_compose_csv_over_limit_keeps_only_destination(bucket):
+    # 40개 + 헤더 = 41개 -> 32개짜리 중간 객체 두 개를 거쳐 합침
+    names = [f"raw/monthly/202401/parts/townhouse_{i:05d}-00000.csv" for i in range(40)]
+    for i, name in enumerate(names):
+        bucket.blob(name).upload_from_string(f"row{i}\n".encode("utf-8"))
+
+    uri = compose_csv(bucket, names, "raw/monthly/202401/rent_data.csv")
+
+    assert uri == "gs://fake-bucket/raw/monthly/202401/rent_data.csv"
+    assert bucket.calls["compose"] == 3
+    assert object_names(bucket) == ["raw/monthly/202401/rent_data.csv"]
+    with open(bucket.object_path("raw/monthly/202401/rent_data.csv"), encoding="utf-8-sig") as f:
+        lines = f.read().splitlines()
+    assert lines == [",".join(COLUMNS)] + [f"row{i}" for i in range(40)]
+
+
+def test_compose_stream_deletes_parts(load_dag, monkeypatch, bucket):
+    dag = load_dag("auto_rent_pipeline")
+    monkeypatch.setattr(dag, "OUTPUT_FORMAT", "csv")
+    monkeypatch.setattr(gcs, "storage_client", lambda key_path: SimpleNamespace(bucket=lambda name: bucket))
+    names = [f"raw/monthly/202401/parts/townhouse_1111{i}-00000.csv" for i in range(3)]
+    for name in names:
+        bucket.blob(name).upload_from_string(b"x\n")
+
+    assert dag.compose_stream("202401", names) == f"gs://{bucket.name}/raw/monthly/202401/rent_data.csv"
+    assert object_names(bucket, "raw/monthly/202401/parts/") == []
+
+
+@pytest.mark.parametrize("count, compose_calls", [(32, 1), (33, 3), (1025, 36)])
+def test_compose_tree(bucket, count, compose_calls):
+    names = [f"parts/p-{i:05d}" for i in range(count)]
+    for i, name in enumerate(names):
+        bucket.blob(name).upload_from_string(f"{i}\n".encode("utf-8"))
+
+    compose(bucket, names, "out.csv")
+
+    assert bucket.calls["compose"] == compose_calls
+    with open(bucket.object_path("out.csv"), encoding="utf-8") as f:
+        assert f.read().splitlines() == [str(i) for i in range(count)]
+    # 중간 객체는 지우고 원본은 그대로 (원본 정리는 compose_csv 몫)
+    assert object_names(bucket) == ["out.csv"] + names
+
+
+def make_row(**values):
+    row = {
+        'year_month': '202401', 'district_code': '11680', 'district_name': '강남구', 'dong': '역삼동',
+        'jibun': '1-1', 'name': 'A빌라', 'floor': '3', 'area': '33.5', 'deposit': '1000',
+        'monthly_rent': '50', 'build_year': '2010', 'deal_day': '5', 'type': 'townhouse',
+    }
+    row.update(values)
+    return row
+
+
+def test_part_writer_chunks_and_validates(bucket):
+    rows = [make_row(jibun=str(i)) for i in range(25)]
+    rows[3]['floor'] = '0'
+    with PartWriter(bucket, "raw/parts", "townhouse_11680", chunk_rows=10, max_pending=1, validate=True) as writer:
+        writer.extend(rows[:12])
+        writer.extend(rows[12:])
+
+    assert writer.names == [f"raw/parts/townhouse_11680-{i:05d}.csv" for i in range(3)]
+    assert writer.rows == 24
+    assert writer.rejected_frame()['jibun'].tolist() == ['3']
+    jibun = []
+    for name in writer.names:
+        with open(bucket.object_path(name), encoding="utf-8") as f:
+            jibun += [line.split(",")[COLUMNS.index("jibun")] for line in f.read().splitlines()]
+    assert jibun == [str(i) for i in range(25) if i != 3]
+
+
+def test_part_writer_parquet_uses_partition_paths(bucket):
+    rows = [make_row(), make_row(type='officetel'), make_row(year_month='202402')]
+    with PartWriter(bucket, "raw/monthly/202401/parquet", "part-11680", "parquet") as writer:
+        writer.extend(rows)
+
+    assert sorted(writer.names) == [
+        "raw/monthly/202401/parquet/type=officetel/year_month=202401/part-11680-00000.parquet",
+        "raw/monthly/202401/parquet/type=townhouse/year_month=202401/part-11680-00001.parquet",
+        "raw/monthly/202401/parquet/type=townhouse/year_month=202402/part-11680-00002.parquet",
+    ]
+    table = pq.read_table(bucket.object_path(writer.names[0]))
+    assert table.num_rows == 1 and table.schema.field("deposit").type == "int64"
+
+
+def test_failed_collection_uploads_nothing_more(bucket):
+    with pytest.raises(RuntimeError):
+        with PartWriter(bucket, "raw/parts", "townhouse_11680", chunk_rows=10) as writer:
+            writer.extend([make_row(jibun=str(i)) for i in range(15)])
+            raise RuntimeError("수집 실패")
+    # 다 찬 조각 하나만 올라가고 남은 5행은 올리지 않음
+    assert object_names(bucket) == ["raw/parts/townhouse_11680-00000.csv"]
+
+
+def test_delete_parts_only_removes_this_shard(bucket):
+    for name in ["raw/parts/townhouse_11110-00000.csv", "raw/parts/townhouse_11110-00001.csv",
+                 "raw/parts/townhouse_111100-00000.csv", "raw/parts/officetel_11110-00000.csv"]:
+        bucket.blob(name).upload_from_string(b"x")
+
+    assert delete_parts(bucket, "raw/parts/", "townhouse_11110") == 2
+    assert object_names(bucket) == ["raw/parts/officetel_11110-00000.csv", "raw/parts/townhouse_111100-00000.csv"]
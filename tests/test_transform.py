@@ -0,0 +1,109 @@
+"""pipeline/transform.py 가 MARKET_VIEW_SELECT 와 같은 값을 내는지 고정 입력으로 확인
+
+기대값은 BigQuery 문서의 의미(ROUND 는 0 에서 먼 쪽, IF(NULL = 0) 은 거짓)를 따라 적은 것이다.
+"""
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pipeline.transform import MARKET_VIEW_COLUMNS, check_parity, format_korean_won, market_view_frame, sql_round
+
+
+# 6.6116 / 3.3058 = 2 평이라 평단가가 정확히 x.5 가 되는 보증금/월세를 고를 수 있다
+TWO_PYUNG = '6.6116'
+
+
+def make_row(**values):
+    row = {
+        'year_month': '202401', 'district_code': '11680', 'district_name': '강남구', 'dong': '역삼동',
+        'jibun': '1-1', 'name': 'A빌라', 'floor': '3', 'area': TWO_PYUNG, 'deposit': '0',
+        'monthly_rent': '0', 'build_year': '2010', 'deal_day': '1', 'type': 'townhouse',
+    }
+    row.update(values)
+    return row
+
+
+@pytest.mark.parametrize("value, digits, expected", [
+    (0.5, 0, 1.0), (1.5, 0, 2.0), (2.5, 0, 3.0),
+    (-0.5, 0, -1.0), (-2.5, 0, -3.0), (0.49, 0, 0.0),
+    (0.25, 1, 0.3), (-0.25, 1, -0.3), (0.0, 0, 0.0),
+])
+def test_sql_round_is_half_away_from_zero(value, digits, expected):
+    assert sql_round(np.array([value]), digits)[0] == expected
+
+
+@pytest.mark.parametrize("deposit, expected", [
+    (0, '0만원'), (9999, '9999만원'), (10000, '1억 '), (10001, '1억 1만원'),
+    (15000, '1억 5000만원'), (20000, '2억 '), (123456, '12억 3456만원'),
+])
+def test_format_korean_won_boundaries(deposit, expected):
+    assert format_korean_won(pd.Series([deposit], dtype='Int64'))[0] == expected
+
+
+def test_format_korean_won_keeps_null():
+    result = format_korean_won(pd.Series([15000, None, 15000], dtype='Int64'))
+    assert result.tolist() == ['1억 5000만원', None, '1억 5000만원']
+
+
+def test_market_view_frame_fixed_rows():
+    view = market_view_frame([
+        make_row(deposit='5'),                         # 2.5 -> 3
+        make_row(deposit='3', monthly_rent='1'),       # 1.5 -> 2, 0.5 -> 1
+        make_row(deposit='-5'),                        # -2.5 -> -3
+        make_row(deposit='15000', monthly_rent=''),    # 월세 null -> 'Monthly', 평단가 0
+        make_row(deposit='10000', year_month='202312'),
+    ])
+    assert list(view.columns) == MARKET_VIEW_COLUMNS
+    assert view['deposit_per_pyung'].tolist() == [3.0, 2.0, -3.0, 7500.0, 5000.0]
+    assert view['rent_per_pyung'].tolist() == [0.0, 1.0, 0.0, 0.0, 0.0]
+    assert view['area_pyung'].tolist() == [2.0] * 5
+    assert view['rent_type'].tolist() == ['Jeonse', 'Monthly', 'Jeonse', 'Monthly', 'Jeonse']
+    assert view['deposit_korean'].tolist() == ['5만원', '3만원', '-5만원', '1억 5000만원', '1억 ']
+    assert view['deal_date'].tolist() == [date(2024, 1, 1)] * 4 + [date(2023, 12, 1)]
+    assert view['deal_year'].tolist() == [2024] * 4 + [2023]
+    assert view['deal_month'].tolist() == [1] * 4 + [12]
+    assert view['building_name'].tolist() == ['A빌라'] * 5
+
+
+def test_market_view_frame_zero_area_is_null():
+    view = market_view_frame([make_row(area='0', deposit='100', monthly_rent='10')])
+    assert np.isnan(view['deposit_per_pyung'][0])
+    assert np.isnan(view['rent_per_pyung'][0])
+
+
+class FakeResult:
+    def __init__(self, frame):
+        self.frame = frame
+
+    def to_dataframe(self):
+        return self.frame
+
+
+class FakeClient:
+    """첫 쿼리는 원본 행, 둘째 쿼리는 BigQuery 가 계산했다고 치는 rent_market_view 행을 돌려준다."""
+
+    def __init__(self, raw, remote):
+        self.results = [raw, remote]
+        self.queries = []
+
+    def query(self, query, job_config=None):
+        self.queries.append((query, job_config))
+        return FakeResult(self.results[len(self.queries) - 1])
+
+
+def test_check_parity_reports_mismatched_columns():
+    raw = pd.DataFrame([make_row(deposit='5'), make_row(deposit='15000', monthly_rent='1')])
+    expected = market_view_frame(raw)
+
+    client = FakeClient(raw, expected.copy())
+    assert check_parity(client, "project.dataset.raw_rent_transactions", "202401") == {}
+    assert all("PARSE_DATE('%Y%m', @year_month)" in query for query, _ in client.queries)
+    assert client.queries[0][1].query_parameters[0].value == "202401"
+
+    # 0.5 를 짝수 쪽으로 반올림한 결과(2.5 -> 2)는 불일치로 잡혀야 함
+    remote = expected.copy()
+    remote.loc[remote['deposit'] == 5, 'deposit_per_pyung'] = 2.0
+    client = FakeClient(raw, remote)
+    assert check_parity(client, "project.dataset.raw_rent_transactions", "202401") == {'deposit_per_pyung': 1}
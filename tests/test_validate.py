@@ -0,0 +1,93 @@
+"""적재 전 검증 (pipeline/validate.py) 확인"""
+import os
+
+import pandas as pd
+import pytest
+
+from pipeline import validate
+from pipeline.config import COLUMNS
+from pipeline.validate import QUARANTINE_COLUMNS, REJECT_COLUMN, validate_csv, validate_frame
+
+
+def make_row(**values):
+    row = {
+        'year_month': '202401', 'district_code': '11680', 'district_name': '강남구', 'dong': '역삼동',
+        'jibun': '1-1', 'name': 'A빌라', 'floor': '3', 'area': '33.5', 'deposit': '1000',
+        'monthly_rent': '50', 'build_year': '2010', 'deal_day': '5', 'type': 'townhouse',
+    }
+    row.update(values)
+    return row
+
+
+def write_csv(path, rows):
+    pd.DataFrame(rows, columns=COLUMNS).to_csv(path, index=False, encoding="utf-8-sig")
+
+
+def read_csv(path):
+    return pd.read_csv(path, dtype=str, keep_default_na=False, encoding="utf-8-sig")
+
+
+def test_validate_frame_collects_every_reason():
+    df = pd.DataFrame([make_row(), make_row(floor='0', area='0'), make_row(deposit='0', monthly_rent='0')])
+    clean, rejected = validate_frame(df)
+    assert len(clean) == 1
+    assert rejected[REJECT_COLUMN].tolist() == ["floor_missing;area_invalid", "deposit_and_rent_zero"]
+
+
+def test_validate_csv_without_rejects_creates_no_quarantine_dir(tmp_path):
+    path = str(tmp_path / "rent_data.csv")
+    quarantine_path = str(tmp_path / "quarantine" / "rent_data.csv")
+    write_csv(path, [make_row(jibun=str(i)) for i in range(5)])
+
+    assert validate_csv(path, quarantine_path, chunksize=2) == (5, 0)
+    assert not os.path.exists(tmp_path / "quarantine")
+    assert len(read_csv(path)) == 5
+    assert sorted(os.listdir(tmp_path)) == ["rent_data.csv"]
+
+
+def test_validate_csv_writes_rejects_across_chunks(tmp_path):
+    path = str(tmp_path / "rent_data.csv")
+    quarantine_path = str(tmp_path / "quarantine" / "rent_data.csv")
+    rows = [make_row(jibun=str(i)) for i in range(5)]
+    rows[1]['dong'] = ''
+    rows[4]['deal_day'] = '40'
+    write_csv(path, rows)
+
+    assert validate_csv(path, quarantine_path, chunksize=2) == (3, 2)
+    assert read_csv(path)['jibun'].tolist() == ['0', '2', '3']
+    quarantine = read_csv(quarantine_path)
+    assert list(quarantine.columns) == QUARANTINE_COLUMNS
+    assert quarantine[REJECT_COLUMN].tolist() == ['dong_missing', 'deal_day_invalid']
+
+    # 다음 실행에서 모두 통과하면 이전 격리 파일을 지움
+    write_csv(path, [make_row()])
+    assert validate_csv(path, quarantine_path) == (1, 0)
+    assert not os.path.exists(quarantine_path)
+
+
+def test_validate_csv_failure_keeps_original_and_removes_tmp(tmp_path, monkeypatch):
+    path = str(tmp_path / "rent_data.csv")
+    quarantine_path = str(tmp_path / "quarantine" / "rent_data.csv")
+    rows = [make_row(jibun=str(i)) for i in range(5)]
+    rows[0]['dong'] = ''
+    write_csv(path, rows)
+    with open(path, "rb") as f:
+        original = f.read()
+
+    # 첫 조각(격리 행 포함)을 쓴 뒤 두 번째 조각에서 실패
+    calls = []
+
+    def failing_validate(df):
+        calls.append(len(df))
+        if len(calls) == 2:
+            raise ValueError("boom")
+        return validate_frame(df)
+
+    monkeypatch.setattr(validate, "validate_frame", failing_validate)
+    with pytest.raises(ValueError):
+        validate_csv(path, quarantine_path, chunksize=2)
+
+    with open(path, "rb") as f:
+        assert f.read() == original
+    assert sorted(os.listdir(tmp_path)) == ["quarantine", "rent_data.csv"]
+    assert os.listdir(tmp_path / "quarantine") == []
@@ -1,35 +1,46 @@
-from google.cloud import storage
 import os
 
+from pipeline.gcs import GcsUploader, directory_jobs, storage_client
+from pipeline.output import list_parquet_files
+
 # 1. 설정 정보
-KEY_PATH = "keys/service-account-key.json" 
+KEY_PATH = "keys/service-account-key.json"
 BUCKET_NAME = "your-gcs-bucket-name"
+# 큰 파일 resumable 업로드 세션 (중간에 끊기면 다음 실행에서 이어서 올림)
+SESSION_STATE_PATH = "checkpoints/gcs_sessions.json"
 
-def upload_blob(bucket_name, source_file_name, destination_blob_name):
-    """파일을 GCS 버킷에 업로드합니다."""
-    try:
-        # 클라이언트 생성
-        storage_client = storage.Client.from_service_account_json(KEY_PATH)
-        bucket = storage_client.bucket(bucket_name)
-        blob = bucket.blob(destination_blob_name)
+def get_uploader(bucket_name):
+    bucket = storage_client(KEY_PATH).bucket(bucket_name)
+    return GcsUploader(bucket, state_path=SESSION_STATE_PATH)
 
-        # 업로드 수행
-        blob.upload_from_filename(source_file_name)
+def upload_blob(bucket_name, source_file_name, destination_blob_name):
+    """파일을 GCS 버킷에 업로드합니다. (버킷에 같은 내용이 있으면 건너뜀)"""
+    get_uploader(bucket_name).upload_many([(source_file_name, destination_blob_name)], strict=False)
 
-        print(f"업로드 성공: {source_file_name} -> gs://{bucket_name}/{destination_blob_name}")
-        
-    except Exception as e:
-        print(f"업로드 실패 ({source_file_name}): {e}")
+def upload_directory(bucket_name, source_dir, destination_prefix):
+    """source_dir 아래 Parquet 파티션 파일을 같은 상대 경로로 병렬 업로드합니다."""
+    jobs = directory_jobs(source_dir, destination_prefix, list_parquet_files(source_dir))
+    get_uploader(bucket_name).upload_many(jobs, strict=False)
 
 if __name__ == "__main__":
+    jobs = []
+
     # 1. 오피스텔 데이터 업로드
     if os.path.exists("officetel_data.csv"):
-        upload_blob(BUCKET_NAME, "officetel_data.csv", "raw/officetel/officetel_data.csv")
+        jobs.append(("officetel_data.csv", "raw/officetel/officetel_data.csv"))
     else:
         print("officetel_data.csv 파일이 없습니다.")
 
     # 2. 연립다세대 데이터 업로드
     if os.path.exists("townhouse_data.csv"):
-        upload_blob(BUCKET_NAME, "townhouse_data.csv", "raw/townhouse/townhouse_data.csv")
+        jobs.append(("townhouse_data.csv", "raw/townhouse/townhouse_data.csv"))
     else:
-        print("townhouse_data.csv 파일이 없습니다.")
\ No newline at end of file
+        print("townhouse_data.csv 파일이 없습니다.")
+
+    # 3. Parquet 파티션 업로드 (batch_collector 의 output_format="parquet")
+    if os.path.exists("parquet"):
+        jobs.extend(directory_jobs("parquet", "raw/parquet", list_parquet_files("parquet")))
+
+    # 한 번에 모아서 병렬 업로드
+    if jobs:
+        get_uploader(BUCKET_NAME).upload_many(jobs, strict=False)